@@ -14,6 +14,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 from groq import Groq
 
+from services.executors import GROQ, get_executor
+
 router = APIRouter(prefix="/api/intelligence", tags=["intelligence"])
 logger = logging.getLogger(__name__)
 
@@ -77,16 +79,14 @@ class SensorDiagResponse(BaseModel):
     recommended_action: str
 
 # ── ENDPOINT A: Ghost Flight Threat Assessment ───────────
-@router.post("/analyse-track", response_model=ThreatResponse)
-async def analyse_track(req: ThreatRequest, groq: Groq = Depends(get_groq)):
+def assess_track(req: ThreatRequest, groq: Groq) -> ThreatResponse:
     """
-    Analyse an aircraft track and return a threat assessment.
-    Called automatically when a new aircraft appears on the MLAT map.
-    Latency target: <300ms (Groq llama-3.3-70b-versatile).
+    Blocking Groq threat assessment shared by the endpoint and the MLAT pipeline's
+    in-process AI dispatcher. Never raises: failures degrade to threat_level "unknown".
     """
     track_summary = [
         f" - {pt.timestamp_iso}: lat={pt.lat:.4f} lon={pt.lon:.4f}"
-        f" alt={pt.alt_ft:.0f}ft conf={pt.confidence:.0%}"
+        f" alt={f'{pt.alt_ft:.0f}ft' if pt.alt_ft is not None else 'unknown'} conf={pt.confidence:.0%}"
         for pt in req.track[-8:]  # last 8 positions
     ]
     
@@ -134,6 +134,15 @@ low-altitude, restricted-airspace, evasive-maneuver, normal-traffic, scheduled-r
             confidence_in_assessment=0.0,
         )
 
+@router.post("/analyse-track", response_model=ThreatResponse)
+async def analyse_track(req: ThreatRequest, groq: Groq = Depends(get_groq)):
+    """
+    Analyse an aircraft track and return a threat assessment.
+    Called automatically when a new aircraft appears on the MLAT map.
+    Latency target: <300ms (Groq llama-3.3-70b-versatile).
+    """
+    return await get_executor(GROQ).run(assess_track, req, groq)
+
 # ── ENDPOINT B: Natural Language Flight Query ────────────
 @router.post("/query", response_model=QueryResponse)
 async def nl_query(req: QueryRequest, groq: Groq = Depends(get_groq)):
@@ -3,10 +3,14 @@ Hedera Logger Client - HCS and HTS operations
 
 This module wraps the existing HederaService with a cleaner SDK-ready interface.
 """
+import asyncio
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from .models import HCSLogResult, HTSMintResult
 
+# One HCS transaction carries 1024 bytes
+DEFAULT_MESSAGE_BYTES = 1024
+
 
 class HederaLogger:
     """
@@ -16,6 +20,11 @@ class HederaLogger:
         operator_id: Hedera account ID (e.g., "0.0.123456")
         operator_key: Hedera private key (DER encoded hex string)
         network: Hedera network ("mainnet" or "testnet")
+        max_concurrency: Most submissions ``log_batch`` keeps in flight at once
+        service: HederaService to use; the process-wide shared one otherwise
+
+    The logger uses one HederaService (and so one Hedera client and operator
+    setup) for its lifetime instead of building one per call.
         
     Example:
         logger = HederaLogger(
@@ -39,12 +48,26 @@ class HederaLogger:
         self,
         operator_id: str,
         operator_key: str,
-        network: str = "testnet"
+        network: str = "testnet",
+        max_concurrency: int = 16,
+        service: Optional[Any] = None,
     ):
         self.operator_id = operator_id
         self.operator_key = operator_key
         self.network = network
-        self._client = None
+        self.max_concurrency = max(1, max_concurrency)
+        self._service = service
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def service(self):
+        """The HederaService in use, the process-wide shared one by default."""
+        if self._service is None:
+            # Import here to avoid circular dependency
+            from services.hedera_client import get_hedera_service
+
+            self._service = get_hedera_service()
+        return self._service
     
     async def log_position(
         self,
@@ -61,29 +84,34 @@ class HederaLogger:
         Returns:
             HCSLogResult with transaction details
         """
+        return (await self._log_message(topic_id, json.dumps(position_data), [None]))[0]
+
+    async def _log_message(
+        self,
+        topic_id: str,
+        message: str,
+        batch_indexes: List[Optional[int]]
+    ) -> List[HCSLogResult]:
+        """Submit one message; returns one result per position it carries."""
         try:
-            # Import here to avoid circular dependency
-            from services.hedera_service import HederaService
-            
-            service = HederaService()
-            message = json.dumps(position_data)
-            
-            result = await service.submit_topic_message(topic_id, message)
-            
-            return HCSLogResult(
+            async with self._semaphore:
+                result = await self.service.submit_topic_message(topic_id, message)
+        except Exception as e:
+            return [
+                HCSLogResult(success=False, topic_id=topic_id, error=str(e), batch_index=index)
+                for index in batch_indexes
+            ]
+        return [
+            HCSLogResult(
                 success=True,
                 topic_id=topic_id,
                 sequence_number=result.get("sequence_number"),
                 transaction_id=result.get("transaction_id"),
-                consensus_timestamp=result.get("consensus_timestamp")
-            )
-            
-        except Exception as e:
-            return HCSLogResult(
-                success=False,
-                topic_id=topic_id,
-                error=str(e)
+                consensus_timestamp=result.get("consensus_timestamp"),
+                batch_index=index,
             )
+            for index in batch_indexes
+        ]
     
     async def mint_flight_track_token(
         self,
@@ -101,12 +129,10 @@ class HederaLogger:
             HTSMintResult with minting details
         """
         try:
-            from services.hedera_service import HederaService
-            
-            service = HederaService()
             metadata_bytes = json.dumps(metadata).encode('utf-8')
             
-            result = await service.mint_token(token_id, metadata_bytes)
+            async with self._semaphore:
+                result = await self.service.mint_token(token_id, metadata_bytes)
             
             return HTSMintResult(
                 success=True,
@@ -125,20 +151,54 @@ class HederaLogger:
     async def log_batch(
         self,
         topic_id: str,
-        positions: list[Dict[str, Any]]
+        positions: list[Dict[str, Any]],
+        pack: bool = False,
+        max_message_bytes: int = DEFAULT_MESSAGE_BYTES
     ) -> list[HCSLogResult]:
         """
         Log multiple positions in batch
         
+        Messages are submitted concurrently, at most ``max_concurrency`` at a time.
+        With ``pack``, consecutive positions share one ``{"positions": [...]}``
+        message of up to ``max_message_bytes``; their results carry the same
+        sequence number and their ``batch_index`` within the message.
+        
         Args:
             topic_id: HCS topic ID
             positions: List of position data dictionaries
+            pack: Pack small positions into shared messages
+            max_message_bytes: Size limit for a packed message
             
         Returns:
-            List of HCSLogResult for each position
+            List of HCSLogResult for each position, in input order
         """
-        results = []
+        if not pack:
+            messages = [(json.dumps(position), [None]) for position in positions]
+        else:
+            messages = [
+                (json.dumps({"positions": group}), list(range(len(group))))
+                for group in self._pack(positions, max_message_bytes)
+            ]
+        submitted = await asyncio.gather(
+            *(self._log_message(topic_id, message, indexes) for message, indexes in messages)
+        )
+        return [result for results in submitted for result in results]
+
+    @staticmethod
+    def _pack(positions: list[Dict[str, Any]], max_message_bytes: int) -> List[List[Dict[str, Any]]]:
+        """Greedy in-order grouping; a position too large to share a message goes alone."""
+        envelope = len(json.dumps({"positions": []}))
+        groups: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        size = envelope
         for position in positions:
-            result = await self.log_position(topic_id, position)
-            results.append(result)
-        return results
+            encoded = len(json.dumps(position).encode("utf-8")) + (2 if current else 0)
+            if current and size + encoded > max_message_bytes:
+                groups.append(current)
+                current, size = [], envelope
+                encoded -= 2
+            current.append(position)
+            size += encoded
+        if current:
+            groups.append(current)
+        return groups
@@ -14,6 +14,7 @@ class HCSLogResult:
     transaction_id: Optional[str] = None
     consensus_timestamp: Optional[str] = None
     error: Optional[str] = None
+    batch_index: Optional[int] = None  # position's index in a packed message
 
 
 @dataclass
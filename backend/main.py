@@ -1,16 +1,66 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 
-from routers import agent, evaluation, hedera, auth
-# from routers import mlat  # Temporarily disabled due to websockets conflict
+from routers import agent, evaluation, hedera, auth, mlat
 from api.intelligence import router as intelligence_router
 from api.realtime_flights import router as flights_router
 
 load_dotenv()
 
-app = FastAPI(title="SynapseWorth Backend", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Hedera client for the process, built and warmed before the first request
+    from services.hedera_client import get_hedera_provider
+
+    await get_hedera_provider().start()
+    # One pooled Supabase client per role (anon, service) shared by every route and service
+    from services.supabase_service import close_supabase_clients, init_supabase_clients
+
+    init_supabase_clients()
+    # Background MLAT runtime draining the Neuron buyer stream (opt-in)
+    runtime_enabled = os.getenv("MLAT_RUNTIME_ENABLED", "false").lower() in ("1", "true", "yes")
+    # Replay MLAT writes a previous run spooled while Supabase or Hedera were unavailable
+    from services.mlat_pipeline import get_pipeline_service, stop_pipeline_service, write_behind_spool_path
+
+    if runtime_enabled or write_behind_spool_path().exists():
+        await get_pipeline_service().start()
+    if runtime_enabled:
+        from services.neuron_buyer import NeuronBuyerService
+        from services.pipeline_runtime import start_pipeline_runtime, stop_pipeline_runtime
+
+        await start_pipeline_runtime(get_pipeline_service(), NeuronBuyerService())
+    # Periodic netted escrow payouts to sensor operators (opt-in)
+    payouts_enabled = os.getenv("PAYOUT_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+    if payouts_enabled:
+        from services.payout_scheduler import get_payout_scheduler
+
+        get_payout_scheduler().start()
+    try:
+        yield
+    finally:
+        if payouts_enabled:
+            from services.payout_scheduler import stop_payout_scheduler
+
+            await stop_payout_scheduler()
+        if runtime_enabled:
+            await stop_pipeline_runtime()
+        await stop_pipeline_service()
+        get_hedera_provider().close()
+        from services.transaction_verifier import close_transaction_verifier
+
+        await close_transaction_verifier()
+        close_supabase_clients()
+        from services.executors import shutdown_executors
+
+        shutdown_executors()
+
+
+app = FastAPI(title="SynapseWorth Backend", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +73,7 @@ app.add_middleware(
 app.include_router(agent.router, prefix="/api/agent", tags=["agent"])
 app.include_router(evaluation.router, prefix="/api/evaluation", tags=["evaluation"])
 app.include_router(hedera.router, prefix="/api/hedera", tags=["hedera"])
-# app.include_router(mlat.router, prefix="/api/mlat", tags=["mlat"])  # Temporarily disabled
+app.include_router(mlat.router, prefix="/api/mlat", tags=["mlat"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(intelligence_router)
 app.include_router(flights_router)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Profile(BaseModel):
     name: str
@@ -55,6 +55,7 @@ class AircraftPosition(BaseModel):
     sensorCount: int
     calculationMethod: Optional[str] = "TDOA"
     hederaSequenceNumber: Optional[int] = None
+    hederaTopicId: Optional[str] = None
     flightTrackTokenId: Optional[str] = None
     calculatedAt: Optional[str] = None
 
@@ -73,6 +74,30 @@ class MLATProcessResponse(BaseModel):
     hederaSequenceNumber: Optional[int] = None
 
 
+class MLATBatchProcessRequest(BaseModel):
+    icaoAddresses: List[str] = Field(default_factory=list, description="Aircraft to solve; defaults to every ICAO in messages")
+    messages: Optional[List[ModeSMessage]] = None
+    timeWindowMs: int = 2000
+
+
+class MLATBatchResult(BaseModel):
+    icaoAddress: str
+    success: bool
+    message: str
+    position: Optional[AircraftPosition] = None
+    hederaSequenceNumber: Optional[int] = None
+
+
+class MLATBatchProcessResponse(BaseModel):
+    results: List[MLATBatchResult]
+    storedMessageCount: int = 0
+    solvedCount: int = 0
+
+
+class MLATInterestRequest(BaseModel):
+    viewers: Dict[str, int] = Field(default_factory=dict, description="Current map viewers per ICAO")
+
+
 class ModeSIngestRequest(BaseModel):
     messages: List[ModeSMessage]
 
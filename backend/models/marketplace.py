@@ -59,6 +59,10 @@ class PurchaseConfirm(BaseModel):
     transaction_id: str
 
 
+class TransactionVerifyRequest(BaseModel):
+    transaction_ids: List[str] = Field(..., min_length=1, max_length=200)
+
+
 class SubscriptionBase(BaseModel):
     consumer_account: str
     offering_id: uuid.UUID
@@ -13,7 +13,7 @@ import secrets
 load_dotenv()
 
 # Import Supabase service
-from services.supabase_service import SupabaseService
+from services.supabase_service import SupabaseService, get_supabase_service
 
 router = APIRouter()
 
@@ -44,7 +44,7 @@ async def test_env():
     }
 
 @router.post("/magic-link", response_model=MagicLinkResponse)
-async def send_magic_link(request: MagicLinkRequest, supabase: SupabaseService = Depends()):
+async def send_magic_link(request: MagicLinkRequest, supabase: SupabaseService = Depends(get_supabase_service)):
     """Send magic link for email authentication"""
     
     print(f"DEBUG: RESEND_API_KEY = {os.getenv('RESEND_API_KEY')}")
@@ -177,7 +177,7 @@ async def send_magic_link(request: MagicLinkRequest, supabase: SupabaseService =
         )
 
 @router.post("/verify-magic-link")
-async def verify_magic_link(token: str, supabase: SupabaseService = Depends()):
+async def verify_magic_link(token: str, supabase: SupabaseService = Depends(get_supabase_service)):
     """Verify magic link token and return user info"""
     
     try:
@@ -280,7 +280,7 @@ async def verify_magic_link(token: str, supabase: SupabaseService = Depends()):
         )
 
 @router.post("/cleanup-expired-tokens")
-async def cleanup_expired_tokens(supabase: SupabaseService = Depends()):
+async def cleanup_expired_tokens(supabase: SupabaseService = Depends(get_supabase_service)):
     """Clean up expired magic link tokens"""
     
     try:
@@ -299,7 +299,7 @@ async def cleanup_expired_tokens(supabase: SupabaseService = Depends()):
         )
 
 @router.get("/token-stats")
-async def get_token_stats(supabase: SupabaseService = Depends()):
+async def get_token_stats(supabase: SupabaseService = Depends(get_supabase_service)):
     """Get magic link token statistics"""
     
     try:
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from models import LogEvaluationRequest, LogEvaluationResponse, MintTokenRequest, MintTokenResponse
+from services.hedera_client import get_hedera_provider, get_hedera_service
 from services.hedera_service import HederaService
+from services.payout_scheduler import payout_scheduler_stats
 
 router = APIRouter()
-hedera_service = HederaService()
+
+@router.get("/health")
+async def hedera_health():
+    return {
+        "client": get_hedera_provider().health(),
+        "limiter": get_hedera_service().limiter.stats(),
+        "payouts": payout_scheduler_stats(),
+    }
 
 @router.post("/log-evaluation", response_model=LogEvaluationResponse)
-async def log_evaluation(request: LogEvaluationRequest):
+async def log_evaluation(request: LogEvaluationRequest, hedera_service: HederaService = Depends(get_hedera_service)):
     try:
         sequence_number = await hedera_service.log_evaluation(request.model_dump())
         return LogEvaluationResponse(sequenceNumber=sequence_number)
@@ -14,7 +23,7 @@ async def log_evaluation(request: LogEvaluationRequest):
         raise HTTPException(status_code=400, detail="Failed to log evaluation")
 
 @router.post("/mint-skill-token", response_model=MintTokenResponse)
-async def mint_skill_token(request: MintTokenRequest):
+async def mint_skill_token(request: MintTokenRequest, hedera_service: HederaService = Depends(get_hedera_service)):
     try:
         token_id = await hedera_service.mint_skill_token(request.userId, request.skillWorth)
         return MintTokenResponse(tokenId=token_id)
@@ -7,7 +7,7 @@ from models.marketplace import (
     SensorOffering, SensorOfferingCreate, SensorOfferingUpdate,
     MarketSensor, MarketplaceStats
 )
-from services.supabase_service import SupabaseService
+from services.supabase_service import SupabaseService, get_supabase_service
 from services.hedera_service import HederaService
 from services.auth_service import get_current_user
 
@@ -22,7 +22,7 @@ async def get_marketplace_sensors(
     lon_max: Optional[float] = None,
     data_type: Optional[str] = None,
     pricing_model: Optional[str] = None,
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Get sensors with active offerings for marketplace display"""
     
@@ -88,7 +88,7 @@ async def get_all_offerings(
     data_type: Optional[str] = None,
     pricing_model: Optional[str] = None,
     is_active: Optional[bool] = None,
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Get all sensor offerings with optional filters"""
     
@@ -129,7 +129,7 @@ async def get_all_offerings(
 async def create_offering(
     offering: SensorOfferingCreate,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Create a new sensor offering (sensor operator only)"""
     
@@ -170,7 +170,7 @@ async def update_offering(
     offering_id: uuid.UUID,
     offering_update: SensorOfferingUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Update a sensor offering (sensor operator only)"""
     
@@ -224,7 +224,7 @@ async def update_offering(
 async def delete_offering(
     offering_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Deactivate a sensor offering (sensor operator only)"""
     
@@ -263,7 +263,7 @@ async def delete_offering(
 
 
 @router.get("/stats", response_model=MarketplaceStats)
-async def get_marketplace_stats(supabase: SupabaseService = Depends()):
+async def get_marketplace_stats(supabase: SupabaseService = Depends(get_supabase_service)):
     """Get marketplace statistics"""
     
     # Count sensors with offerings
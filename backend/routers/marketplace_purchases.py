@@ -6,11 +6,11 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 
 from models.marketplace import (
-    PurchaseRequest, PurchaseResponse, PurchaseConfirm,
+    PurchaseRequest, PurchaseResponse, PurchaseConfirm, TransactionVerifyRequest,
     Subscription, APIKey, APIKeyCreate, DataAccessRequest
 )
-from services.supabase_service import SupabaseService
-from services.hedera_service import HederaService
+from services.supabase_service import SupabaseService, get_supabase_service
+from services.hedera_marketplace_service import HederaService, get_marketplace_hedera_service
 from services.auth_service import get_current_user
 from services.marketplace_service import MarketplaceService
 
@@ -21,8 +21,8 @@ router = APIRouter(prefix="/api/marketplace", tags=["marketplace"])
 async def initiate_purchase(
     purchase: PurchaseRequest,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends(),
-    hedera: HederaService = Depends(),
+    supabase: SupabaseService = Depends(get_supabase_service),
+    hedera: HederaService = Depends(get_marketplace_hedera_service),
     marketplace: MarketplaceService = Depends()
 ):
     """Initiate a purchase - returns transaction data for wallet signing"""
@@ -73,8 +73,8 @@ async def confirm_purchase(
     confirmation: PurchaseConfirm,
     background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends(),
-    hedera: HederaService = Depends(),
+    supabase: SupabaseService = Depends(get_supabase_service),
+    hedera: HederaService = Depends(get_marketplace_hedera_service),
     marketplace: MarketplaceService = Depends()
 ):
     """Confirm purchase after transaction is submitted"""
@@ -148,10 +148,21 @@ async def confirm_purchase(
     }
 
 
+@router.post("/transactions/verify")
+async def verify_transactions(
+    request: TransactionVerifyRequest,
+    current_user: dict = Depends(get_current_user),
+    hedera: HederaService = Depends(get_marketplace_hedera_service)
+):
+    """Verify many pending purchase transactions at once"""
+    
+    return await hedera.verify_transactions(request.transaction_ids, current_user['account_id'])
+
+
 @router.get("/my-subscriptions", response_model=List[Subscription])
 async def get_my_subscriptions(
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Get current user's active subscriptions"""
     
@@ -181,7 +192,7 @@ async def get_transaction_history(
     limit: int = 50,
     offset: int = 0,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Get user's transaction history"""
     
@@ -198,7 +209,7 @@ async def get_transaction_history(
 async def create_api_key(
     api_key_create: APIKeyCreate,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Create a new API key for data access"""
     
@@ -222,7 +233,7 @@ async def create_api_key(
 @router.get("/api-keys", response_model=List[APIKey])
 async def get_api_keys(
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Get user's API keys"""
     
@@ -237,7 +248,7 @@ async def get_api_keys(
 async def delete_api_key(
     key_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Delete an API key"""
     
@@ -258,7 +269,7 @@ async def delete_api_key(
 async def get_marketplace_data(
     request: DataAccessRequest,
     api_key: str,
-    supabase: SupabaseService = Depends(),
+    supabase: SupabaseService = Depends(get_supabase_service),
     marketplace: MarketplaceService = Depends()
 ):
     """Get data based on active subscription (API key authenticated)"""
@@ -302,7 +313,7 @@ async def get_marketplace_data(
 async def cancel_subscription(
     subscription_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Cancel an active subscription"""
     
@@ -1,20 +1,27 @@
-from fastapi import APIRouter, HTTPException
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 
 from models import (
+    AircraftPosition,
+    MLATBatchProcessRequest,
+    MLATBatchProcessResponse,
+    MLATInterestRequest,
     MLATProcessRequest,
     MLATProcessResponse,
     ModeSIngestRequest,
     ModeSIngestResponse,
 )
-from services.mlat_pipeline import MLATPipelineService
+from services.mlat_pipeline import MLATPipelineService, get_pipeline_service
+from services.pipeline_runtime import get_pipeline_runtime
 
 
 router = APIRouter()
-pipeline = MLATPipelineService()
 
 
 @router.post("/ingest", response_model=ModeSIngestResponse)
-async def ingest_mode_s(request: ModeSIngestRequest):
+async def ingest_mode_s(request: ModeSIngestRequest, pipeline: MLATPipelineService = Depends(get_pipeline_service)):
     try:
         count = await pipeline.ingest_messages(request.messages)
         return ModeSIngestResponse(ingested=count)
@@ -23,13 +30,74 @@ async def ingest_mode_s(request: ModeSIngestRequest):
 
 
 @router.post("/process", response_model=MLATProcessResponse)
-async def process_mlat(request: MLATProcessRequest):
+async def process_mlat(request: MLATProcessRequest, pipeline: MLATPipelineService = Depends(get_pipeline_service)):
     try:
         return await pipeline.process_mlat(request)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"MLAT processing failed: {exc}")
 
 
+@router.post("/process-batch", response_model=MLATBatchProcessResponse)
+async def process_mlat_batch(request: MLATBatchProcessRequest, pipeline: MLATPipelineService = Depends(get_pipeline_service)):
+    try:
+        return await pipeline.process_mlat_batch(request)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"MLAT batch processing failed: {exc}")
+
+
+@router.post("/interest")
+async def report_interest(request: MLATInterestRequest, pipeline: MLATPipelineService = Depends(get_pipeline_service)):
+    """Map clients report which aircraft are on screen so their solves are prioritised."""
+    pipeline.set_viewer_interest(request.viewers)
+    return {"viewedAircraft": len(request.viewers)}
+
+
+@router.get("/track/{icao_address}", response_model=List[AircraftPosition])
+async def aircraft_track(
+    icao_address: str,
+    limit: int = Query(8, ge=1, le=256),
+    pipeline: MLATPipelineService = Depends(get_pipeline_service),
+):
+    """Recent solved positions for one aircraft, oldest first."""
+    try:
+        return await pipeline.recent_track(icao_address, limit=limit)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Failed to load track: {exc}")
+
+
+@router.get("/proof/{icao_address}")
+async def position_proof(
+    icao_address: str,
+    calculated_at: str = Query(..., alias="calculatedAt"),
+    pipeline: MLATPipelineService = Depends(get_pipeline_service),
+):
+    """Merkle inclusion proof tying a stored position to the HCS root of its window."""
+    proof = await pipeline.position_proof(icao_address, calculated_at)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="No inclusion proof retained for this position")
+    return proof
+
+
+@router.get("/hcs/topics")
+async def hcs_topics(pipeline: MLATPipelineService = Depends(get_pipeline_service)):
+    """How positions are routed across HCS topics, so auditors know which topic to read."""
+    return pipeline.hedera.topics.mapping()
+
+
 @router.get("/health")
-async def mlat_health():
+async def mlat_health(pipeline: MLATPipelineService = Depends(get_pipeline_service)):
     return pipeline.health()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def mlat_metrics(pipeline: MLATPipelineService = Depends(get_pipeline_service)):
+    """Stage latency histograms and outcome counters in Prometheus text format."""
+    return PlainTextResponse(pipeline.metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/runtime")
+async def mlat_runtime():
+    runtime = get_pipeline_runtime()
+    if runtime is None:
+        return {"running": False, "stages": {}}
+    return runtime.stats()
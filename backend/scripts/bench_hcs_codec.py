@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Compare HCS bytes per position: the old str(dict), canonical JSON and the binary codec."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_ROOT))
+
+from services import hcs_codec
+
+
+def _positions(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc)
+    return [
+        {
+            "type": "mlat_position",
+            "icao": f"{rng.randrange(0x1000000):06X}",
+            "latitude": 51.0 + rng.random(),
+            "longitude": -0.5 + rng.random(),
+            "altitude_ft": None,
+            "confidence": rng.uniform(60, 100),
+            "sensor_count": 4,
+            "sensor_ids": [f"sensor_{rng.randrange(100)}" for _ in range(4)],
+            "calculation_method": "TDOA",
+            "timestamp": (start + timedelta(milliseconds=idx * 250)).isoformat(),
+        }
+        for idx in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positions", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    positions = _positions(args.positions)
+    batches = [
+        {"type": "mlat_position_batch", "positions": [{k: v for k, v in p.items() if k != "type"} for p in chunk]}
+        for chunk in (positions[i:i + args.batch_size] for i in range(0, len(positions), args.batch_size))
+    ]
+    encoders = {
+        "str(dict) (before)": lambda payload: str(payload).encode("utf-8"),
+        "canonical JSON": hcs_codec.canonical_json,
+        "binary codec": hcs_codec.encode,
+    }
+
+    print(f"{'encoding':<22}{'single B/pos':>14}{'batched B/pos':>15}{'HCS msgs':>10}")
+    for name, encoder in encoders.items():
+        single = sum(len(encoder(p)) for p in positions) / len(positions)
+        batched_messages = [encoder(batch) for batch in batches]
+        batched = sum(len(m) for m in batched_messages) / len(positions)
+        chunks = sum(hcs_codec.chunk_count(m) for m in batched_messages)
+        print(f"{name:<22}{single:>14.1f}{batched:>15.1f}{chunks:>10}")
+
+    groups = hcs_codec.split_positions(positions)
+    print(f"\nSize-aware packing: {len(positions)} positions in {len(groups)} single-chunk HCS messages "
+          f"({len(positions) / len(groups):.1f} per message)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ import asyncio
 import json
 import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from dotenv import load_dotenv
 
@@ -15,17 +15,20 @@ BACKEND_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(BACKEND_ROOT))
 load_dotenv(BACKEND_ROOT / ".env")
 
-from models import ModeSMessage, SensorLocation, MLATProcessRequest
+from models import ModeSMessage, SensorLocation, MLATBatchProcessRequest
 from services.mlat_pipeline import MLATPipelineService
 from services.supabase_service import SupabaseService
 
 
-async def replay_from_file(file_path: Path, batch_size: int = 10) -> None:
+async def replay_from_file(file_path: Path, batch_size: int = 10, hcs_map: Optional[Path] = None) -> None:
     """
     Replay Mode-S messages from NDJSON file through MLAT pipeline.
     
     File format (one JSON object per line):
     {"sensorId": "...", "icaoAddress": "...", "rawMessage": "...", "timestampNs": ..., "sensorLocation": {...}}
+
+    With ``hcs_map``, writes the HCS topic routing followed by one line per solved
+    position with the topic and sequence number it was logged to.
     """
     if not file_path.exists():
         print(f"ERROR: File not found: {file_path}")
@@ -35,12 +38,21 @@ async def replay_from_file(file_path: Path, batch_size: int = 10) -> None:
     import os
     os.environ["SUPABASE_ANON_KEY"] = os.getenv("SUPABASE_SERVICE_ROLE_KEY", os.getenv("SUPABASE_ANON_KEY", ""))
     
+    if hcs_map:
+        # Log inline so each result already carries its topic and sequence number
+        os.environ["MLAT_WRITE_BEHIND"] = "false"
+
     pipeline = MLATPipelineService()
     supabase = SupabaseService()
 
     print(f"=== MLAT Replay Tool ===")
     print(f"File: {file_path}")
-    print(f"Pipeline configured: Supabase={supabase.is_configured}, Hedera={pipeline.hedera.client is not None}\n")
+    print(f"Pipeline configured: Supabase={supabase.is_configured}, Hedera={pipeline.hedera.client is not None}")
+    print(f"HCS topics: {', '.join(pipeline.hedera.topics.topic_ids) or 'none'} "
+          f"(routing: {pipeline.hedera.topics.routing})\n")
+    map_file = hcs_map.open("w", encoding="utf-8") if hcs_map else None
+    if map_file:
+        map_file.write(json.dumps({"type": "routing", **pipeline.hedera.topics.mapping()}) + "\n")
 
     # Load all messages
     messages: List[ModeSMessage] = []
@@ -72,35 +84,48 @@ async def replay_from_file(file_path: Path, batch_size: int = 10) -> None:
 
     print(f"Found {len(icao_groups)} unique aircraft\n")
 
-    # Process each aircraft
+    # Process aircraft together: each round sends the next batch of every ICAO
     total_processed = 0
     total_success = 0
 
-    for icao, icao_messages in icao_groups.items():
-        print(f"Processing {icao} ({len(icao_messages)} messages)...")
+    rounds = max(len(icao_messages) for icao_messages in icao_groups.values())
+    for i in range(0, rounds, batch_size):
+        batch = [msg for icao_messages in icao_groups.values() for msg in icao_messages[i:i + batch_size]]
+        icaos = list(dict.fromkeys(msg.icaoAddress for msg in batch))
+        print(f"Processing round {i // batch_size + 1}: {len(icaos)} aircraft, {len(batch)} messages...")
 
-        # Process in batches
-        for i in range(0, len(icao_messages), batch_size):
-            batch = icao_messages[i:i + batch_size]
+        request = MLATBatchProcessRequest(
+            icaoAddresses=icaos,
+            messages=batch,
+            timeWindowMs=2000,
+        )
 
-            request = MLATProcessRequest(
-                icaoAddress=icao,
-                messages=batch,
-                timeWindowMs=2000,
-            )
+        response = await pipeline.process_mlat_batch(request)
 
-            response = await pipeline.process_mlat(request)
+        for result in response.results:
             total_processed += 1
-
-            if response.success:
+            if result.success:
                 total_success += 1
-                pos = response.position
-                print(f"  ✓ Solution: {pos.latitude:.4f}, {pos.longitude:.4f} | "
+                pos = result.position
+                print(f"  ✓ {result.icaoAddress}: {pos.latitude:.4f}, {pos.longitude:.4f} | "
                       f"Confidence: {pos.confidenceScore:.1f}% | "
                       f"Sensors: {pos.sensorCount} | "
-                      f"HCS: #{pos.hederaSequenceNumber or 'N/A'}")
+                      f"HCS: {pos.hederaTopicId or '-'}#{pos.hederaSequenceNumber or 'N/A'}")
+                if map_file:
+                    map_file.write(json.dumps({
+                        "type": "position",
+                        "icaoAddress": pos.icaoAddress,
+                        "calculatedAt": pos.calculatedAt,
+                        "topicId": pos.hederaTopicId,
+                        "sequenceNumber": pos.hederaSequenceNumber,
+                    }) + "\n")
             else:
-                print(f"  ✗ {response.message}")
+                print(f"  ✗ {result.icaoAddress}: {result.message}")
+
+    await pipeline.stop()
+    if map_file:
+        map_file.close()
+        print(f"\nHCS position map written to: {hcs_map}")
 
     print(f"\n=== Replay Complete ===")
     print(f"Total requests: {total_processed}")
@@ -169,13 +194,14 @@ async def main() -> None:
     parser.add_argument("--aircraft", type=int, default=3, help="Number of aircraft for sample data")
     parser.add_argument("--messages", type=int, default=20, help="Messages per aircraft for sample data")
     parser.add_argument("--batch-size", type=int, default=10, help="Batch size for processing")
+    parser.add_argument("--hcs-map", type=Path, help="Write the HCS topic and sequence of each position here")
 
     args = parser.parse_args()
 
     if args.generate:
         await generate_sample_data(args.generate, args.aircraft, args.messages)
     elif args.file:
-        await replay_from_file(args.file, args.batch_size)
+        await replay_from_file(args.file, args.batch_size, args.hcs_map)
     else:
         print("ERROR: Specify --file to replay or --generate to create sample data")
         parser.print_help()
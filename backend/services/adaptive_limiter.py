@@ -0,0 +1,146 @@
+"""AIMD concurrency limit and jittered retries for Hedera submissions."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Precheck and receipt statuses meaning "slow down and try again", as they appear in SDK error text
+THROTTLE_MARKERS = (
+    "BUSY",
+    "THROTTLED_AT_CONSENSUS",
+    "PLATFORM_TRANSACTION_NOT_CREATED",
+    "PLATFORM_NOT_ACTIVE",
+    "MAX_PENDING",
+)
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """True for BUSY/throttling statuses and timeouts, the errors worth backing off and retrying."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    text = str(exc).upper()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight Hedera submissions.
+
+    Every success raises the limit by ``increase / limit``, so about ``increase``
+    per round of ``limit`` successes. A BUSY, throttle or timeout multiplies it by
+    ``decrease``, at most once per ``backoff_cooldown_s`` so one burst of BUSY
+    responses from the same round only cuts once. The limit stays within
+    ``[min_limit, max_limit]``; ``acquire`` waits while ``in_flight`` is at it.
+    """
+
+    def __init__(
+        self,
+        initial: float = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        backoff_cooldown_s: float = 1.0,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff_cooldown_s = backoff_cooldown_s
+        self.in_flight = 0
+        self._released = asyncio.Event()
+        self._last_backoff = float("-inf")
+        self.successes = 0
+        self.backoffs = 0
+        self.retries = 0
+        self.peak_limit = self.limit
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    async def acquire(self) -> None:
+        while self.in_flight >= self.current_limit:
+            self._released.clear()
+            await self._released.wait()
+        self.in_flight += 1
+
+    def release(self, outcome: Optional[BaseException] = None) -> None:
+        """
+        Free a slot. ``outcome`` is the error the submission ended with, if any;
+        only throttles and timeouts cut the limit, other errors leave it alone.
+        """
+        self.in_flight -= 1
+        if outcome is None:
+            self.on_success()
+        elif is_throttle(outcome):
+            self.on_throttle()
+        self._released.set()
+
+    def on_success(self) -> None:
+        self.successes += 1
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        self.peak_limit = max(self.peak_limit, self.limit)
+
+    def on_throttle(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        if now - self._last_backoff < self.backoff_cooldown_s:
+            return
+        self._last_backoff = now
+        self.backoffs += 1
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        logger.info("Hedera throttled; in-flight limit cut to %d", self.current_limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.current_limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "peak_limit": int(self.peak_limit),
+            "in_flight": self.in_flight,
+            "successes": self.successes,
+            "backoffs": self.backoffs,
+            "retries": self.retries,
+        }
+
+
+def backoff_delay(attempt: int, base_delay_s: float = 0.25, max_delay_s: float = 8.0) -> float:
+    """Full-jitter exponential backoff, so retries from many callers do not arrive together."""
+    return random.uniform(0, min(max_delay_s, base_delay_s * 2 ** attempt))
+
+
+async def with_retries(
+    limiter: AdaptiveLimiter,
+    call: Callable[[], Awaitable[T]],
+    max_attempts: int = 4,
+    base_delay_s: float = 0.25,
+    max_delay_s: float = 8.0,
+) -> T:
+    """
+    Run ``call`` under a limiter slot, retrying throttles with full-jitter exponential backoff.
+
+    Errors that are not throttles are raised straight away.
+    """
+    for attempt in range(max(1, max_attempts)):
+        await limiter.acquire()
+        try:
+            result = await call()
+        except BaseException as exc:
+            limiter.release(exc)
+            if not isinstance(exc, Exception) or not is_throttle(exc) or attempt + 1 >= max_attempts:
+                raise
+            limiter.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, base_delay_s, max_delay_s))
+            continue
+        limiter.release()
+        return result
+    raise AssertionError("unreachable")
@@ -0,0 +1,116 @@
+"""Bounded, per-ICAO deduplicating dispatcher for background AI track analysis."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AnalysisHandler = Callable[[str, Any], Awaitable[None]]
+
+
+class AIAnalysisDispatcher:
+    """
+    Runs ``handler(icao, item)`` on a fixed pool of workers.
+
+    At most one request per ICAO waits at a time: a newer submission replaces the
+    waiting one (latest wins, counted as coalesced). After an ICAO's analysis
+    starts, further submissions for it are dropped for ``cooldown_s`` seconds,
+    and new ICAOs are dropped once ``max_pending`` are waiting.
+    """
+
+    def __init__(
+        self,
+        handler: AnalysisHandler,
+        workers: int = 2,
+        max_pending: int = 256,
+        cooldown_s: float = 30.0,
+    ) -> None:
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.cooldown_s = cooldown_s
+        self._pending: Dict[str, Any] = {}
+        self._order: asyncio.Queue = asyncio.Queue()
+        self._last_started: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped: Dict[str, int] = {"cooldown": 0, "queue_full": 0}
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ai-dispatch-{idx}")
+            for idx in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, icao: str, item: Any, now: Optional[float] = None) -> bool:
+        """Queue ``item`` for analysis; returns False if it was dropped."""
+        self.start()
+        now = time.monotonic() if now is None else now
+        icao = icao.upper()
+        self.submitted += 1
+
+        if icao in self._pending:
+            self._pending[icao] = item
+            self.coalesced += 1
+            return True
+        last = self._last_started.get(icao)
+        if last is not None and now - last < self.cooldown_s:
+            self.dropped["cooldown"] += 1
+            return False
+        if len(self._pending) >= self.max_pending:
+            self.dropped["queue_full"] += 1
+            return False
+
+        self._pending[icao] = item
+        self._order.put_nowait(icao)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            icao = await self._order.get()
+            item = self._pending.pop(icao, None)
+            if item is None:
+                continue
+            now = time.monotonic()
+            self._last_started[icao] = now
+            if len(self._last_started) > 4096:
+                self._last_started = {
+                    key: started for key, started in self._last_started.items()
+                    if now - started < self.cooldown_s
+                }
+            try:
+                await self.handler(icao, item)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Never let one bad analysis take a worker down
+                self.failed += 1
+                logger.warning("AI analysis failed for %s: %s", icao, exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": dict(self.dropped),
+            "cooldown_s": self.cooldown_s,
+        }
@@ -4,7 +4,7 @@ from typing import Optional, Dict, Any
 import jwt
 from datetime import datetime, timedelta
 
-from services.supabase_service import SupabaseService
+from services.supabase_service import SupabaseService, get_supabase_service
 
 # JWT Secret for API key authentication
 JWT_SECRET = "aircraftworth_marketplace_secret"
@@ -15,7 +15,7 @@ security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ) -> Dict[str, Any]:
     """Get current user from Hedera account authentication"""
     
@@ -69,7 +69,7 @@ async def get_current_user(
 
 async def verify_api_key(
     api_key: str,
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ) -> Dict[str, Any]:
     """Verify API key for data access"""
     
@@ -130,7 +130,7 @@ async def require_sensor_operator(
 
 async def require_active_subscription(
     api_key: str,
-    supabase: SupabaseService = Depends()
+    supabase: SupabaseService = Depends(get_supabase_service)
 ) -> Dict[str, Any]:
     """Require user to have active subscription for data access"""
     
@@ -0,0 +1,127 @@
+"""Bounded thread pool with admission control for blocking work called from asyncio."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a job is rejected because the executor queue is full."""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables on a dedicated thread pool without stalling the event loop.
+
+    Admission is bounded: at most ``max_workers`` jobs run and at most ``max_queue``
+    wait behind them. Anything beyond that is rejected immediately with
+    ``ExecutorSaturatedError`` instead of piling up latency.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_queue: int = 32) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+        self._run_total_s = 0.0
+        self._run_max_s = 0.0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on the pool, rejecting fast when saturated."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"{self.name} executor saturated ({self._pending} jobs pending)"
+                )
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def _job() -> T:
+            started_at = time.perf_counter()
+            with self._lock:
+                self._active += 1
+                wait = started_at - submitted_at
+                self._wait_total_s += wait
+                self._wait_max_s = max(self._wait_max_s, wait)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - started_at
+                with self._lock:
+                    self._active -= 1
+                    self._pending -= 1
+                    self._run_total_s += elapsed
+                    self._run_max_s = max(self._run_max_s, elapsed)
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        try:
+            future = self._pool.submit(_job)
+        except RuntimeError:
+            # Pool already shut down; release the admission slot we just took
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release_if_cancelled)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Caller gave up; drop the job if it is still queued (a running one finishes on its own)
+            future.cancel()
+            raise
+
+    def _release_if_cancelled(self, future: "Future[Any]") -> None:
+        # A job cancelled before it started never runs ``_job``, so free its admission slot here
+        if future.cancelled():
+            with self._lock:
+                self._pending -= 1
+                self._cancelled += 1
+
+    @property
+    def queued(self) -> int:
+        with self._lock:
+            return self._pending - self._active
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self._completed + self._failed
+            started = finished + self._active
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._wait_total_s / started * 1000, 3) if started else 0.0,
+                "max_wait_ms": round(self._wait_max_s * 1000, 3),
+                "avg_run_ms": round(self._run_total_s / finished * 1000, 3) if finished else 0.0,
+                "max_run_ms": round(self._run_max_s * 1000, 3),
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,60 @@
+"""Dedicated, sized thread pools for each external dependency's blocking calls."""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+from services.bounded_executor import BoundedExecutor
+
+HEDERA = "hedera"
+SUPABASE = "supabase"
+GROQ = "groq"
+
+# (workers, queue) per dependency; overridable as EXECUTOR_<NAME>_WORKERS / EXECUTOR_<NAME>_MAX_QUEUE.
+# Hedera receipts wait seconds for consensus, so that pool is wide enough to cover the HCS in-flight window.
+_DEFAULT_SIZES: Dict[str, Tuple[int, int]] = {
+    HEDERA: (32, 512),
+    SUPABASE: (8, 1024),
+    GROQ: (4, 64),
+}
+
+_executors: Dict[str, BoundedExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """
+    Return the process-wide executor for ``name``, creating it on first use.
+
+    Each dependency gets its own pool so slow Hedera receipts cannot starve
+    Supabase writes (and vice versa) the way the shared ``asyncio.to_thread``
+    default executor does.
+    """
+    with _lock:
+        executor = _executors.get(name)
+        if executor is None:
+            workers, queue = _DEFAULT_SIZES.get(name, (4, 64))
+            prefix = f"EXECUTOR_{name.upper()}"
+            executor = _executors[name] = BoundedExecutor(
+                name,
+                max_workers=int(os.getenv(f"{prefix}_WORKERS", str(workers))),
+                max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", str(queue))),
+            )
+        return executor
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Saturation of every dependency pool: active, queued, rejected and wait times."""
+    with _lock:
+        executors = dict(_executors)
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+def shutdown_executors() -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
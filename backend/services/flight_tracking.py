@@ -109,7 +109,7 @@ class FlightTrackingService:
         for state in states:
             try:
                 icao = state[0]
-                callsign = state[1]?.strip() or ""
+                callsign = (state[1] or "").strip()
                 lat = state[6]
                 lon = state[5]
                 alt_ft = state[7]  # geometric altitude in meters, convert to feet
@@ -0,0 +1,191 @@
+"""Flight Track Token minting per flight track session, batched in the background."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models import AircraftPosition
+
+logger = logging.getLogger(__name__)
+
+MintFn = Callable[[int], Awaitable[str]]
+MintedCallback = Callable[[List["TrackSession"]], Awaitable[None]]
+
+
+@dataclass
+class TrackSession:
+    """One continuous track of an aircraft; a gap longer than the session gap starts a new one."""
+
+    session_id: str
+    icao: str
+    started_at: Optional[str]
+    first_seen: float
+    last_seen: float
+    positions: int = 0
+    qualifying_positions: int = 0
+    best_confidence: float = 0.0
+    token_id: Optional[str] = None
+    queued: bool = False
+
+    @property
+    def worth(self) -> int:
+        return int(self.best_confidence)
+
+
+class FlightTrackMinter:
+    """
+    Groups positions into per-aircraft track sessions and mints one token amount per session.
+
+    A session becomes eligible with its first position of at least ``min_confidence``
+    from at least ``min_sensors`` sensors. Eligible sessions are minted by a
+    background loop: up to ``batch_size`` sessions share one mint transaction for the
+    sum of their worth, so HTS transactions scale with flights rather than fixes.
+    ``should_mint`` lets the load governor hold batches back without losing them.
+    """
+
+    def __init__(
+        self,
+        mint: MintFn,
+        on_minted: Optional[MintedCallback] = None,
+        should_mint: Optional[Callable[[], bool]] = None,
+        session_gap_s: float = 300.0,
+        batch_size: int = 20,
+        flush_interval_s: float = 10.0,
+        min_confidence: float = 90.0,
+        min_sensors: int = 4,
+    ) -> None:
+        self.mint = mint
+        self.on_minted = on_minted
+        self.should_mint = should_mint or (lambda: True)
+        self.session_gap_s = session_gap_s
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.min_confidence = min_confidence
+        self.min_sensors = min_sensors
+        self._sessions: Dict[str, TrackSession] = {}
+        self._pending: List[TrackSession] = []
+        self._counter = itertools.count(1)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._next_sweep = 0.0
+        self.sessions_started = 0
+        self.sessions_minted = 0
+        self.mint_batches = 0
+        self.mint_failures = 0
+        self.deferred_flushes = 0
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    def observe(self, position: AircraftPosition, now: Optional[float] = None) -> TrackSession:
+        """Attach a position to its session, queueing the session for minting once it qualifies."""
+        now = time.monotonic() if now is None else now
+        icao = position.icaoAddress.upper()
+        session = self._sessions.get(icao)
+        if session is None or now - session.last_seen > self.session_gap_s:
+            session = self._sessions[icao] = TrackSession(
+                session_id=f"{icao}-{next(self._counter)}",
+                icao=icao,
+                started_at=position.calculatedAt,
+                first_seen=now,
+                last_seen=now,
+            )
+            self.sessions_started += 1
+        session.last_seen = now
+        session.positions += 1
+
+        if position.confidenceScore >= self.min_confidence and position.sensorCount >= self.min_sensors:
+            session.qualifying_positions += 1
+            session.best_confidence = max(session.best_confidence, position.confidenceScore)
+            if session.token_id is None and not session.queued:
+                session.queued = True
+                self._pending.append(session)
+                self._ensure_started()
+                if len(self._pending) >= self.batch_size:
+                    self._wakeup.set()
+
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return session
+
+    def _sweep(self, now: float) -> None:
+        self._sessions = {
+            icao: session for icao, session in self._sessions.items()
+            if now - session.last_seen <= self.session_gap_s or session.queued
+        }
+        self._next_sweep = now + max(1.0, self.session_gap_s / 4)
+
+    # ------------------------------------------------------------------
+    # Background minting
+    # ------------------------------------------------------------------
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="ftt-minter")
+
+    async def stop(self) -> None:
+        """Stop the loop and mint whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._pending and self.should_mint():
+            if not await self.flush():
+                break
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                if not self.should_mint():
+                    self.deferred_flushes += 1
+                    break
+                if not await self.flush():
+                    break
+
+    async def flush(self) -> bool:
+        """Mint one batch of pending sessions; returns False if the mint failed."""
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if not batch:
+            return True
+        try:
+            token_id = await self.mint(sum(session.worth for session in batch))
+        except asyncio.CancelledError:
+            self._pending[:0] = batch
+            raise
+        except Exception as exc:
+            self._pending[:0] = batch
+            self.mint_failures += 1
+            logger.warning("Flight Track Token mint for %d sessions failed: %s", len(batch), exc)
+            return False
+
+        for session in batch:
+            session.token_id = token_id
+            session.queued = False
+        self.mint_batches += 1
+        self.sessions_minted += len(batch)
+        if self.on_minted is not None:
+            try:
+                await self.on_minted(batch)
+            except Exception as exc:
+                logger.warning("Failed to record minted Flight Track Tokens: %s", exc)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_sessions": len(self._sessions),
+            "pending_sessions": len(self._pending),
+            "sessions_started": self.sessions_started,
+            "sessions_minted": self.sessions_minted,
+            "mint_batches": self.mint_batches,
+            "mint_failures": self.mint_failures,
+            "deferred_flushes": self.deferred_flushes,
+        }
@@ -0,0 +1,257 @@
+"""Compact canonical binary encoding of HCS payloads, with a decoder for auditors.
+
+Every message starts with ``MAGIC``, a version byte and a type byte:
+
+* ``TYPE_JSON`` — canonical JSON (sorted keys, no whitespace) for payloads the
+  binary layouts do not cover, e.g. marketplace evaluations.
+* ``TYPE_POSITION`` — one position record.
+* ``TYPE_POSITION_BATCH`` — flags (bit 0: deferred), uint16 count, records.
+* ``TYPE_MERKLE_ROOT`` — uint32 batch id, 32-byte SHA-256 root, uint32 leaf
+  count, int64 window start and end in microseconds since the epoch.
+
+A position record is, big-endian and in this order: 3-byte ICAO address,
+int32 latitude and longitude in 1e-7 degrees (~1 cm), int32 altitude in feet,
+uint16 confidence in 1/100 %, uint8 sensor count, int64 timestamp in
+microseconds since the epoch, uint8 calculation method, then uint8 sensor-id
+count followed by uint8-length-prefixed UTF-8 sensor ids.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+MAGIC = 0xA7
+VERSION = 1
+
+TYPE_JSON = 0
+TYPE_POSITION = 1
+TYPE_POSITION_BATCH = 2
+TYPE_MERKLE_ROOT = 3
+
+# One HCS transaction carries 1024 bytes; the SDK splits larger messages into up to 20 chunks
+HCS_CHUNK_BYTES = 1024
+HCS_MAX_CHUNKS = 20
+
+COORD_SCALE = 10_000_000
+CONFIDENCE_SCALE = 100
+_NONE_INT32 = -(2 ** 31)
+_NONE_INT64 = -(2 ** 63)
+_METHODS = ("TDOA",)
+
+_HEADER = struct.Struct(">BBB")
+_RECORD = struct.Struct(">3siiiHBqB")
+_BATCH = struct.Struct(">BH")
+_MERKLE = struct.Struct(">I32sIqq")
+
+_POSITION_KEYS = frozenset({
+    "type", "icao", "latitude", "longitude", "altitude_ft", "confidence",
+    "sensor_count", "sensor_ids", "calculation_method", "timestamp",
+})
+_MERKLE_KEYS = frozenset({"type", "batch_id", "root", "leaf_count", "hash", "window_start", "window_end"})
+
+
+class _Unencodable(ValueError):
+    """Payload does not fit a binary layout; it is sent as canonical JSON instead."""
+
+
+class HCSMessageTooLarge(ValueError):
+    pass
+
+
+# ----------------------------------------------------------------------
+# Field helpers
+# ----------------------------------------------------------------------
+def _timestamp_us(value: Optional[str]) -> int:
+    if value is None:
+        return _NONE_INT64
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError as exc:
+        raise _Unencodable(f"timestamp {value!r}") from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _timestamp_iso(value: int) -> Optional[str]:
+    if value == _NONE_INT64:
+        return None
+    return datetime.fromtimestamp(value // 1_000_000, timezone.utc).replace(microsecond=value % 1_000_000).isoformat()
+
+
+def _scaled(value: Any, scale: int, lo: int, hi: int) -> int:
+    if value is None or not math.isfinite(float(value)):
+        raise _Unencodable("missing or non-finite number")
+    scaled = round(float(value) * scale)
+    if not lo <= scaled <= hi:
+        raise _Unencodable(f"{value!r} out of range")
+    return scaled
+
+
+def _encode_record(payload: Dict[str, Any]) -> bytes:
+    if set(payload) != _POSITION_KEYS:
+        raise _Unencodable("unexpected position fields")
+    try:
+        icao = bytes.fromhex(str(payload["icao"]))
+    except ValueError as exc:
+        raise _Unencodable("ICAO address is not hex") from exc
+    if len(icao) != 3:
+        raise _Unencodable("ICAO address is not 24-bit")
+    if payload["calculation_method"] not in _METHODS:
+        raise _Unencodable("unknown calculation method")
+    altitude = payload["altitude_ft"]
+    sensor_ids = [str(sensor_id).encode("utf-8") for sensor_id in payload["sensor_ids"] or []]
+    if len(sensor_ids) > 255 or any(len(sensor_id) > 255 for sensor_id in sensor_ids):
+        raise _Unencodable("too many or too long sensor ids")
+
+    record = _RECORD.pack(
+        icao,
+        _scaled(payload["latitude"], COORD_SCALE, -900_000_000, 900_000_000),
+        _scaled(payload["longitude"], COORD_SCALE, -1_800_000_000, 1_800_000_000),
+        _NONE_INT32 if altitude is None else _scaled(altitude, 1, _NONE_INT32 + 1, 2 ** 31 - 1),
+        _scaled(payload["confidence"], CONFIDENCE_SCALE, 0, 0xFFFF),
+        min(int(payload["sensor_count"] or 0), 255),
+        _timestamp_us(payload["timestamp"]),
+        _METHODS.index(payload["calculation_method"]),
+    )
+    return record + bytes([len(sensor_ids)]) + b"".join(bytes([len(s)]) + s for s in sensor_ids)
+
+
+def _decode_record(data: bytes, offset: int) -> tuple[Dict[str, Any], int]:
+    icao, lat, lon, altitude, confidence, sensor_count, timestamp, method = _RECORD.unpack_from(data, offset)
+    offset += _RECORD.size
+    sensor_ids = []
+    for _ in range(data[offset]):
+        length = data[offset + 1]
+        sensor_ids.append(data[offset + 2:offset + 2 + length].decode("utf-8"))
+        offset += 1 + length
+    offset += 1
+    return {
+        "type": "mlat_position",
+        "icao": icao.hex().upper(),
+        "latitude": lat / COORD_SCALE,
+        "longitude": lon / COORD_SCALE,
+        "altitude_ft": None if altitude == _NONE_INT32 else altitude,
+        "confidence": confidence / CONFIDENCE_SCALE,
+        "sensor_count": sensor_count,
+        "sensor_ids": sensor_ids,
+        "calculation_method": _METHODS[method],
+        "timestamp": _timestamp_iso(timestamp),
+    }, offset
+
+
+# ----------------------------------------------------------------------
+# Messages
+# ----------------------------------------------------------------------
+def canonical_json(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _encode_binary(payload: Dict[str, Any]) -> bytes:
+    kind = payload.get("type")
+    if kind == "mlat_position":
+        return _HEADER.pack(MAGIC, VERSION, TYPE_POSITION) + _encode_record(payload)
+    if kind == "mlat_position_batch":
+        if not set(payload) <= {"type", "positions", "deferred"} or len(payload["positions"]) > 0xFFFF:
+            raise _Unencodable("unexpected batch fields")
+        records = [_encode_record({**position, "type": "mlat_position"}) for position in payload["positions"]]
+        flags = 1 if payload.get("deferred") else 0
+        return _HEADER.pack(MAGIC, VERSION, TYPE_POSITION_BATCH) + _BATCH.pack(flags, len(records)) + b"".join(records)
+    if kind == "mlat_merkle_root":
+        if set(payload) != _MERKLE_KEYS or payload["hash"] != "sha256":
+            raise _Unencodable("unexpected Merkle root fields")
+        root = bytes.fromhex(payload["root"])
+        if len(root) != 32:
+            raise _Unencodable("root is not a SHA-256 digest")
+        return _HEADER.pack(MAGIC, VERSION, TYPE_MERKLE_ROOT) + _MERKLE.pack(
+            payload["batch_id"], root, payload["leaf_count"],
+            _timestamp_us(payload["window_start"]), _timestamp_us(payload["window_end"]),
+        )
+    raise _Unencodable(f"no binary layout for {kind!r}")
+
+
+def encode(payload: Dict[str, Any]) -> bytes:
+    """Binary layout when the payload fits one, canonical JSON otherwise."""
+    try:
+        return _encode_binary(payload)
+    except (_Unencodable, struct.error, TypeError, KeyError):
+        return _HEADER.pack(MAGIC, VERSION, TYPE_JSON) + canonical_json(payload)
+
+
+def decode(data: bytes) -> Dict[str, Any]:
+    magic, version, kind = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an HCS codec message")
+    body = _HEADER.size
+    if kind == TYPE_JSON:
+        return json.loads(data[body:].decode("utf-8"))
+    if kind == TYPE_POSITION:
+        return _decode_record(data, body)[0]
+    if kind == TYPE_POSITION_BATCH:
+        flags, count = _BATCH.unpack_from(data, body)
+        offset = body + _BATCH.size
+        positions = []
+        for _ in range(count):
+            record, offset = _decode_record(data, offset)
+            positions.append(record)
+        decoded: Dict[str, Any] = {"type": "mlat_position_batch", "positions": positions}
+        if flags & 1:
+            decoded["deferred"] = True
+        return decoded
+    if kind == TYPE_MERKLE_ROOT:
+        batch_id, root, leaf_count, start, end = _MERKLE.unpack_from(data, body)
+        return {
+            "type": "mlat_merkle_root",
+            "batch_id": batch_id,
+            "root": root.hex(),
+            "leaf_count": leaf_count,
+            "hash": "sha256",
+            "window_start": _timestamp_iso(start),
+            "window_end": _timestamp_iso(end),
+        }
+    raise ValueError(f"Unknown HCS message type {kind}")
+
+
+def chunk_count(message: bytes) -> int:
+    return max(1, math.ceil(len(message) / HCS_CHUNK_BYTES))
+
+
+def ensure_fits(message: bytes) -> bytes:
+    if chunk_count(message) > HCS_MAX_CHUNKS:
+        raise HCSMessageTooLarge(
+            f"HCS message of {len(message)} bytes exceeds {HCS_MAX_CHUNKS} chunks of {HCS_CHUNK_BYTES} bytes"
+        )
+    return message
+
+
+def split_positions(
+    payloads: List[Dict[str, Any]],
+    max_bytes: int = HCS_CHUNK_BYTES,
+    max_positions: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Group position payload indexes so each group's batch message fits ``max_bytes``.
+
+    Groups keep input order. A position too large to share a message gets a group
+    of its own (and relies on HCS chunking).
+    """
+    overhead = _HEADER.size + _BATCH.size
+    groups: List[List[int]] = []
+    current: List[int] = []
+    size = overhead
+    for idx, payload in enumerate(payloads):
+        record = len(encode({"type": "mlat_position_batch", "positions": [payload]})) - overhead
+        full = max_positions is not None and len(current) >= max_positions
+        if current and (size + record > max_bytes or full):
+            groups.append(current)
+            current, size = [], overhead
+        current.append(idx)
+        size += record
+    if current:
+        groups.append(current)
+    return groups
@@ -0,0 +1,157 @@
+"""Pipelined HCS topic submission under an adaptive in-flight limit."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from services import hcs_codec
+from services.adaptive_limiter import AdaptiveLimiter, backoff_delay, is_throttle
+from services.bounded_executor import BoundedExecutor
+from services.executors import HEDERA, get_executor
+from services.hedera_service import HederaService
+
+logger = logging.getLogger(__name__)
+
+
+class HCSSubmitter:
+    """
+    Submits topic messages without waiting for each receipt before sending the next.
+
+    ``submit`` returns as soon as the transaction has been handed to the network,
+    with a future for its sequence number; receipts are collected concurrently.
+    How many messages may be in flight (submitted, receipt outstanding) is set by
+    ``limiter``, which grows while receipts succeed and shrinks on BUSY, throttling
+    or receipt timeouts. Each message is frozen once, so a throttled or timed-out
+    submission is re-sent with the same transaction ID and cannot be posted twice;
+    after the network took it only the receipt lookup is retried. Both retry up to
+    ``max_attempts`` times with jittered backoff; a receipt that still fails
+    resolves its future with the error and is left to the caller to retry.
+
+    Each topic has its own submission lane: messages to one topic take limiter
+    slots and are dispatched in call order (retries aside), while their network
+    calls overlap and lanes for different topics run in parallel.
+    """
+
+    def __init__(
+        self,
+        hedera: HederaService,
+        limiter: Optional[AdaptiveLimiter] = None,
+        receipt_timeout_s: float = 30.0,
+        max_attempts: int = 4,
+        executor: Optional[BoundedExecutor] = None,
+    ) -> None:
+        self.hedera = hedera
+        self.limiter = limiter or AdaptiveLimiter()
+        self.executor = executor
+        self.receipt_timeout_s = receipt_timeout_s
+        self.max_attempts = max(1, max_attempts)
+        self._receipts: Set[asyncio.Task] = set()
+        self._lanes: Dict[str, asyncio.Lock] = {}
+        self.per_topic: Dict[str, int] = {}
+        self.submitted = 0
+        self.confirmed = 0
+        self.failed = 0
+        self._receipt_ms_total = 0.0
+        self._receipt_ms_max = 0.0
+
+    async def submit(self, payload: Dict[str, Any], topic_id: Optional[str] = None) -> asyncio.Future:
+        """Hand ``payload`` to the network; the returned future resolves to its sequence number."""
+        future = asyncio.get_running_loop().create_future()
+        if not self.hedera.topic_configured(topic_id):
+            # Stub mode: log_evaluation hands out local sequence numbers
+            future.set_result(await self.hedera.log_evaluation(payload, topic_id))
+            return future
+
+        message = hcs_codec.ensure_fits(hcs_codec.encode(payload))
+        lane = topic_id or "primary"
+        response, started = await self._execute(message, topic_id, lane)
+        self.submitted += 1
+        self.per_topic[lane] = self.per_topic.get(lane, 0) + 1
+
+        task = asyncio.create_task(self._collect_receipt(response, future, started))
+        self._receipts.add(task)
+        task.add_done_callback(self._receipts.discard)
+        return future
+
+    async def _execute(self, message: bytes, topic_id: Optional[str], lane: str) -> Tuple[Any, float]:
+        """Hand one message to the network under a limiter slot, re-sending the same transaction on throttles."""
+        send = await self._executor.run(self.hedera.prepare_topic_message, message, topic_id)
+        attempt = 0
+        while True:
+            async with self._lanes.setdefault(lane, asyncio.Lock()):
+                await self.limiter.acquire()
+                started = time.perf_counter()
+                execution = asyncio.ensure_future(self._executor.run(send))
+            try:
+                return await execution, started
+            except BaseException as exc:
+                execution.cancel()
+                self.limiter.release(exc)
+                attempt += 1
+                if not isinstance(exc, Exception) or not is_throttle(exc) or attempt >= self.max_attempts:
+                    self.failed += 1
+                    raise
+                self.limiter.retries += 1
+                await asyncio.sleep(backoff_delay(attempt - 1))
+
+    async def log(self, payload: Dict[str, Any], topic_id: Optional[str] = None) -> int:
+        """Submit and wait for the sequence number."""
+        return await (await self.submit(payload, topic_id))
+
+    async def _collect_receipt(self, response: Any, future: asyncio.Future, started: float) -> None:
+        attempt = 0
+        while True:
+            try:
+                sequence = await asyncio.wait_for(
+                    self._executor.run(self.hedera.topic_receipt, response), timeout=self.receipt_timeout_s
+                )
+            except Exception as exc:
+                self.limiter.release(exc)
+                attempt += 1
+                if is_throttle(exc) and attempt < self.max_attempts:
+                    # Ask again for the same transaction's receipt; never send it again
+                    self.limiter.retries += 1
+                    await asyncio.sleep(backoff_delay(attempt - 1))
+                    await self.limiter.acquire()
+                    continue
+                self.failed += 1
+                logger.warning("HCS receipt failed: %s", exc)
+                if not future.done():
+                    future.set_exception(exc)
+                return
+            except BaseException as exc:
+                self.limiter.release(exc)
+                raise
+            break
+        self.limiter.release()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.confirmed += 1
+        self._receipt_ms_total += elapsed_ms
+        self._receipt_ms_max = max(self._receipt_ms_max, elapsed_ms)
+        if not future.done():
+            future.set_result(sequence)
+
+    @property
+    def _executor(self) -> BoundedExecutor:
+        return self.executor or get_executor(HEDERA)
+
+    async def drain(self) -> None:
+        """Wait for every outstanding receipt."""
+        if self._receipts:
+            await asyncio.gather(*list(self._receipts), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limiter.current_limit,
+            "in_flight": self.limiter.in_flight,
+            "submitted": self.submitted,
+            "confirmed": self.confirmed,
+            "failed": self.failed,
+            "per_topic": dict(self.per_topic),
+            "avg_receipt_ms": round(self._receipt_ms_total / self.confirmed, 3) if self.confirmed else 0.0,
+            "max_receipt_ms": round(self._receipt_ms_max, 3),
+        }
@@ -0,0 +1,75 @@
+"""Deterministic routing of MLAT positions across a set of HCS topics."""
+
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+ROUTING_ICAO = "icao"
+ROUTING_REGION = "region"
+
+
+class TopicRouter:
+    """
+    Picks the HCS topic a position is logged to.
+
+    ``icao`` routing shards by ``crc32(ICAO) % len(topics)``, so each aircraft
+    stays on one topic and its messages keep consensus order. ``region`` routing
+    splits the globe into equal longitude sectors, one per topic, west to east from
+    -180°; an aircraft crossing a sector boundary moves to the next topic. Both are
+    pure functions of the position, so ``mapping()`` is enough for an auditor to
+    find the topic any position was logged to.
+    """
+
+    def __init__(self, topic_ids: List[str], routing: str = ROUTING_ICAO, primary: Optional[str] = None) -> None:
+        if routing not in (ROUTING_ICAO, ROUTING_REGION):
+            raise ValueError(f"Unknown HCS topic routing {routing!r}")
+        self.topic_ids = [topic_id for topic_id in topic_ids if topic_id]
+        self.routing = routing
+        self._primary = primary
+
+    @classmethod
+    def from_env(cls) -> "TopicRouter":
+        # HCS_TOPIC_IDS shards positions across topics; HCS_TOPIC_ID alone keeps one topic
+        primary = os.getenv("HCS_TOPIC_ID") or None
+        topic_ids = [topic_id.strip() for topic_id in os.getenv("HCS_TOPIC_IDS", "").split(",") if topic_id.strip()]
+        if not topic_ids and primary:
+            topic_ids = [primary]
+        return cls(topic_ids, routing=os.getenv("HCS_TOPIC_ROUTING", ROUTING_ICAO).lower(), primary=primary)
+
+    @property
+    def primary(self) -> Optional[str]:
+        """Topic for messages that are not about one position, e.g. evaluations and Merkle roots."""
+        return self._primary or (self.topic_ids[0] if self.topic_ids else None)
+
+    def shard(self, icao: str, longitude: Optional[float] = None) -> int:
+        count = len(self.topic_ids)
+        if count <= 1:
+            return 0
+        if self.routing == ROUTING_REGION and longitude is not None:
+            normalised = (float(longitude) + 180.0) % 360.0
+            return min(count - 1, int(normalised * count / 360.0))
+        return zlib.crc32(icao.upper().encode("ascii")) % count
+
+    def topic_for(self, icao: str, longitude: Optional[float] = None) -> Optional[str]:
+        if not self.topic_ids:
+            return None
+        return self.topic_ids[self.shard(icao, longitude)]
+
+    def mapping(self) -> Dict[str, Any]:
+        """Routing description for auditors: which topic holds which positions."""
+        count = len(self.topic_ids)
+        shards = []
+        for index, topic_id in enumerate(self.topic_ids):
+            shard: Dict[str, Any] = {"index": index, "topicId": topic_id}
+            if self.routing == ROUTING_REGION:
+                shard["longitudeFrom"] = -180.0 + index * 360.0 / count
+                shard["longitudeTo"] = -180.0 + (index + 1) * 360.0 / count
+            shards.append(shard)
+        rule = (
+            "index = floor(((longitude + 180) mod 360) * topics / 360)"
+            if self.routing == ROUTING_REGION
+            else "index = crc32(upper(icao)) mod topics"
+        )
+        return {"routing": self.routing, "rule": rule, "primaryTopicId": self.primary, "topics": shards}
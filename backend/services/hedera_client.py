@@ -0,0 +1,159 @@
+"""Process-wide Hedera client: built once at startup, warmed, and shared by every service."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from services.executors import HEDERA, get_executor
+from services.hedera_service import HederaService
+
+logger = logging.getLogger(__name__)
+
+STATE_UNINITIALISED = "uninitialised"
+STATE_STUB = "stub"
+STATE_SIMULATOR = "simulator"
+STATE_READY = "ready"
+STATE_WARM = "warm"
+STATE_DEGRADED = "degraded"
+STATE_CLOSED = "closed"
+
+
+def _ping_all(client: Any) -> None:
+    """Open a channel to every node so the first real transaction does not pay for it."""
+    ping_all = getattr(client, "pingAll", None) or getattr(client, "ping_all", None)
+    if ping_all is not None:
+        ping_all()
+
+
+def _network_size(client: Any) -> Optional[int]:
+    network = getattr(client, "getNetwork", None) or getattr(client, "get_network", None)
+    if network is None:
+        return None
+    try:
+        nodes = network()
+        return nodes.size() if hasattr(nodes, "size") else len(nodes)
+    except Exception:
+        return None
+
+
+class HederaClientProvider:
+    """
+    Owns the one ``HederaService`` the process uses.
+
+    Building the SDK client parses the operator key and, on first use, opens gRPC
+    channels to the network's nodes; sharing one instance means that happens once,
+    and that every caller shares one adaptive in-flight limit against the network.
+    ``start`` builds the service on the Hedera pool and pings every node, so the
+    first request finds the channels open. ``health`` reports where that got to:
+    ``stub`` or ``simulator`` when there is no network, ``ready`` once the client is
+    built, ``warm`` once the nodes answered and ``degraded`` if warm-up failed (the
+    client still works; channels are opened by the first transaction instead).
+    """
+
+    def __init__(self, factory: Callable[[], HederaService] = HederaService) -> None:
+        self._factory = factory
+        self._service: Optional[HederaService] = None
+        self._lock = threading.Lock()
+        # Skip pinging every node on startup with HEDERA_WARMUP=false
+        self.warmup_enabled = os.getenv("HEDERA_WARMUP", "true").lower() in ("1", "true", "yes")
+        self.warmup_timeout_s = float(os.getenv("HEDERA_WARMUP_TIMEOUT_S", "10"))
+        self.state = STATE_UNINITIALISED
+        self.created_at: Optional[str] = None
+        self.init_ms: Optional[float] = None
+        self.warmed_at: Optional[str] = None
+        self.warmup_ms: Optional[float] = None
+        self.nodes: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def service(self) -> HederaService:
+        """The shared service, built on first use if ``start`` has not run yet."""
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    started = time.perf_counter()
+                    service = self._factory()
+                    self.init_ms = (time.perf_counter() - started) * 1000
+                    self.created_at = datetime.now(timezone.utc).isoformat()
+                    if service.simulator is not None:
+                        self.state = STATE_SIMULATOR
+                    elif service.client is None:
+                        self.state = STATE_STUB
+                    else:
+                        self.state = STATE_READY
+                        self.nodes = _network_size(service.client)
+                    self._service = service
+        return self._service
+
+    async def start(self) -> HederaService:
+        """Build the client off the event loop and warm its node channels."""
+        service = await get_executor(HEDERA).run(lambda: self.service)
+        if self.warmup_enabled and self.state in (STATE_READY, STATE_DEGRADED):
+            await self.warm()
+        return service
+
+    async def warm(self) -> bool:
+        client = self.service.client
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(get_executor(HEDERA).run(_ping_all, client), self.warmup_timeout_s)
+        except Exception as exc:
+            self.state = STATE_DEGRADED
+            self.last_error = str(exc) or type(exc).__name__
+            logger.warning("Hedera client warm-up failed: %s", self.last_error)
+            return False
+        self.warmup_ms = (time.perf_counter() - started) * 1000
+        self.warmed_at = datetime.now(timezone.utc).isoformat()
+        self.nodes = _network_size(client)
+        self.state = STATE_WARM
+        self.last_error = None
+        logger.info("Hedera client warm: %s nodes in %.0f ms", self.nodes, self.warmup_ms)
+        return True
+
+    def close(self) -> None:
+        service, self._service = self._service, None
+        if service is None:
+            return
+        close = getattr(service.client, "close", None) if service.simulator is None else None
+        if close is not None:
+            try:
+                close()
+            except Exception as exc:
+                logger.warning("Failed to close Hedera client: %s", exc)
+        self.state = STATE_CLOSED
+
+    def health(self) -> Dict[str, Any]:
+        service = self._service
+        return {
+            "state": self.state,
+            "operator_id": os.getenv("HEDERA_OPERATOR_ID") if service is not None and service.client else None,
+            "nodes": self.nodes,
+            "created_at": self.created_at,
+            "init_ms": round(self.init_ms, 1) if self.init_ms is not None else None,
+            "warmed_at": self.warmed_at,
+            "warmup_ms": round(self.warmup_ms, 1) if self.warmup_ms is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+_provider: Optional[HederaClientProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_hedera_provider() -> HederaClientProvider:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = HederaClientProvider()
+        return _provider
+
+
+def get_hedera_service() -> HederaService:
+    """The shared HederaService; use as ``Depends(get_hedera_service)`` in routes."""
+    return get_hedera_provider().service
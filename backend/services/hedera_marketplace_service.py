@@ -1,16 +1,42 @@
-from hedera import Hbar, TransferTransaction, Client, AccountId, TokenId, PrivateKey, TransactionId, TransactionReceiptQuery, TransactionQuery, AccountBalanceQuery, Status
-from typing import Dict, Any, Optional, List
+from hedera import Hbar, TransferTransaction, Client, AccountId, TokenId, PrivateKey, TransactionId, TransactionRecordQuery, AccountBalanceQuery, Status
+from typing import Dict, Any, Optional, List, Tuple
 import json
 
+from services.adaptive_limiter import with_retries
+from services.executors import HEDERA, get_executor
+from services.hedera_client import get_hedera_service
+from services.hedera_service import HederaService as BaseHederaService, _get_receipt, _transaction_id
+from services.transaction_verifier import TransactionVerifier, get_transaction_verifier
+
+def _tinybars(amount) -> int:
+    """Hbar amount from a transaction record as tinybars, the unit the mirror node reports"""
+    to_tinybars = getattr(amount, "to_tinybars", None) or getattr(amount, "toTinybars", None)
+    return int(to_tinybars()) if to_tinybars is not None else int(amount)
+
 class HederaService:
-    def __init__(self, operator_id: str, operator_key: str):
-        self.client = Client.for_testnet()
-        self.operator_id = AccountId.fromString(operator_id)
-        self.operator_key = PrivateKey.fromString(operator_key)
-        self.client.set_operator(self.operator_id, self.operator_key)
+    def __init__(
+        self,
+        operator_id: Optional[str] = None,
+        operator_key: Optional[str] = None,
+        base: Optional[BaseHederaService] = None,
+        verifier: Optional[TransactionVerifier] = None
+    ):
+        # Share the process-wide client (built and warmed at startup) unless a different operator is asked for
+        self.base = base or get_hedera_service()
+        if operator_id and operator_key:
+            self.client = Client.for_testnet()
+            self.client.set_operator(AccountId.fromString(operator_id), PrivateKey.fromString(operator_key))
+        else:
+            self.client = self.base.client
         
         # Marketplace escrow account
         self.escrow_account = AccountId.fromString("0.0.1234567")
+
+        # Blocking SDK calls run on the Hedera pool, not the default to_thread executor
+        self.executor = get_executor(HEDERA)
+
+        # Shared TTL cache of verified transactions, so retried confirms do not query again
+        self.verifier = verifier or get_transaction_verifier()
     
     async def create_transfer_transaction(
         self,
@@ -69,54 +95,50 @@ class HederaService:
         transaction_id: str,
         expected_payer: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Verify a transaction was executed on Hedera"""
+        """Verify a transaction was executed on Hedera (cached by transaction ID)"""
+        
+        # Mirror node first; a purchase submitted a moment ago may only be known to the consensus nodes
+        fallback = self._query_transaction if self.client and self.base.simulator is None else None
+        return await self.verifier.verify(transaction_id, expected_payer, fallback=fallback)
+    
+    async def verify_transactions(
+        self,
+        transaction_ids: List[str],
+        expected_payer: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Verify many pending purchases concurrently through the mirror node"""
+        
+        return await self.verifier.verify_many(transaction_ids, expected_payer)
+    
+    async def _query_transaction(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Transaction record from the consensus nodes, in the mirror node's record shape"""
+        
+        # Parse transaction ID
+        tx_id = TransactionId.fromString(transaction_id)
         
+        # The record, unlike the receipt, carries the transfers, fee, memo and consensus time
         try:
-            # Parse transaction ID
-            tx_id = TransactionId.fromString(transaction_id)
-            
-            # Get transaction record
-            record = await TransactionReceiptQuery().set_transaction_id(tx_id).execute(self.client)
-            
-            # Verify transaction status
-            if record.status != Status.SUCCESS:
-                return {
-                    "success": False,
-                    "error": f"Transaction failed with status: {record.status}"
-                }
-            
-            # Get transaction details
-            transaction = await TransactionQuery().set_transaction_id(tx_id).execute(self.client)
-            
-            # Verify payer if specified
-            if expected_payer:
-                # This would require parsing the transaction to get the payer
-                # For now, we'll assume it's correct if the transaction succeeded
-                pass
-            
-            # Extract transfer amounts
-            transfers = []
-            if record.transfer_list:
-                for account_amount in record.transfer_list.account_amounts:
-                    transfers.append({
-                        "account": str(account_amount.account_id),
-                        "amount": account_amount.amount
-                    })
-            
-            return {
-                "success": True,
-                "transaction_id": transaction_id,
-                "consensus_timestamp": str(record.consensus_timestamp),
-                "transaction_fee": record.transaction_fee,
-                "transfers": transfers,
-                "memo": transaction.transaction_memo
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Failed to verify transaction: {str(e)}"
-            }
+            record = await self.executor.run(TransactionRecordQuery().set_transaction_id(tx_id).execute, self.client)
+        except Exception as exc:
+            if "RECORD_NOT_FOUND" in str(exc).upper() or "RECEIPT_NOT_FOUND" in str(exc).upper():
+                return None
+            raise
+        
+        # Verify transaction status
+        if record.receipt.status != Status.SUCCESS:
+            return {"transaction_id": transaction_id, "result": str(record.receipt.status)}
+        
+        return {
+            "transaction_id": transaction_id,
+            "result": "SUCCESS",
+            "consensus_timestamp": str(record.consensus_timestamp),
+            "charged_tx_fee": _tinybars(record.transaction_fee),
+            "transfers": [
+                {"account": str(transfer.account_id), "amount": _tinybars(transfer.amount)}
+                for transfer in record.transfers or []
+            ],
+            "memo": record.transaction_memo
+        }
     
     async def log_marketplace_purchase(
         self,
@@ -125,17 +147,13 @@ class HederaService:
         """Log marketplace purchase to HCS"""
         
         try:
-            from services.hedera_service import HederaService as BaseHederaService
-            
-            # Use existing HCS logging functionality
-            base_hedera = BaseHederaService()
-            
+            # Use existing HCS logging functionality on the shared client
             message = json.dumps({
                 "type": "marketplace_purchase",
                 "data": purchase_data
             })
             
-            sequence = await base_hedera.log_evaluation({
+            sequence = await self.base.log_evaluation({
                 "marketplace_purchase": message
             })
             
@@ -163,7 +181,7 @@ class HederaService:
                 # HBAR balance
                 balance_query = AccountBalanceQuery().set_account_id(account)
             
-            balance = await balance_query.execute(self.client)
+            balance = await self.executor.run(balance_query.execute, self.client)
             
             if token_id and token_id != "HBAR":
                 return {
@@ -182,39 +200,91 @@ class HederaService:
     async def distribute_funds(
         self,
         from_escrow: bool = True,
-        distributions: List[Dict[str, Any]] = None
+        distributions: List[Dict[str, Any]] = None,
+        token_id: Optional[str] = None,
+        memo: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Distribute funds from escrow to sensor operators"""
+        """Distribute funds from escrow to sensor operators in one transfer transaction"""
+        
+        if not distributions:
+            return {"success": False, "error": "No distributions provided"}
         
         try:
-            if not distributions:
-                return {"success": False, "error": "No distributions provided"}
-            
-            # Create transfer transaction for distributions
-            transaction = TransferTransaction()
-            
-            if from_escrow:
-                transaction = transaction.add_hbar_transfer(
-                    self.escrow_account, 
-                    Hbar.from_tinybars(-sum(d["amount"] for d in distributions))
-                )
-            
-            for distribution in distributions:
-                to_account = AccountId.fromString(d["account_id"])
-                amount = Hbar.from_tinybars(d["amount"])
-                transaction = transaction.add_hbar_transfer(to_account, amount)
-            
-            # Execute transaction
-            receipt = await transaction.freeze_with(self.client).execute(self.client)
+            frozen, transaction_id = await self.prepare_distribution(distributions, token_id, memo, from_escrow)
+        except Exception as e:
+            return {"success": False, "transaction_id": None, "error": f"Failed to distribute funds: {str(e)}"}
+        
+        result = await self.submit_distribution(frozen, transaction_id)
+        result["distributed_amount"] = sum(d["amount"] for d in distributions)
+        return result
+    
+    async def prepare_distribution(
+        self,
+        distributions: List[Dict[str, Any]],
+        token_id: Optional[str] = None,
+        memo: Optional[str] = None,
+        from_escrow: bool = True
+    ) -> Tuple[Any, str]:
+        """Build and freeze a distribution without sending it; returns it with its transaction ID"""
+        
+        total = sum(d["amount"] for d in distributions)
+        
+        # Create transfer transaction for distributions
+        transaction = TransferTransaction()
+        token = TokenId.fromString(token_id) if token_id and token_id != "HBAR" else None
+        
+        if from_escrow:
+            if token is not None:
+                transaction = transaction.add_token_transfer(token, self.escrow_account, -total)
+            else:
+                transaction = transaction.add_hbar_transfer(self.escrow_account, Hbar.from_tinybars(-total))
+        
+        for distribution in distributions:
+            to_account = AccountId.fromString(distribution["account_id"])
+            if token is not None:
+                transaction = transaction.add_token_transfer(token, to_account, distribution["amount"])
+            else:
+                transaction = transaction.add_hbar_transfer(to_account, Hbar.from_tinybars(distribution["amount"]))
+        
+        if memo:
+            transaction = transaction.set_transaction_memo(memo)
+        
+        # Freezing fixes the transaction ID, so callers can record it before anything is sent
+        frozen = transaction.freeze_with(self.client)
+        return frozen, _transaction_id(frozen)
+    
+    async def submit_distribution(self, frozen: Any, transaction_id: str) -> Dict[str, Any]:
+        """Send a prepared distribution exactly once and wait for its receipt"""
+        
+        try:
+            # One attempt only: a value transfer whose outcome is unknown is reconciled, never resent
+            response = await with_retries(
+                self.base.limiter,
+                lambda: self.executor.run(frozen.execute, self.client),
+                max_attempts=1
+            )
+            receipt = await self.executor.run(_get_receipt, response, self.client)
             
             return {
                 "success": receipt.status == Status.SUCCESS,
-                "transaction_id": str(receipt.transaction_id),
-                "distributed_amount": sum(d["amount"] for d in distributions)
+                "transaction_id": transaction_id,
+                "error": None if receipt.status == Status.SUCCESS else f"Transaction failed with status: {receipt.status}"
             }
             
         except Exception as e:
+            # The transfer may still reach consensus; transaction_id is what reconciles it
             return {
                 "success": False,
+                "transaction_id": transaction_id,
                 "error": f"Failed to distribute funds: {str(e)}"
             }
+
+_marketplace_hedera: Optional[HederaService] = None
+
+
+def get_marketplace_hedera_service() -> HederaService:
+    """Shared marketplace Hedera service; use as ``Depends(get_marketplace_hedera_service)``"""
+    global _marketplace_hedera
+    if _marketplace_hedera is None:
+        _marketplace_hedera = HederaService()
+    return _marketplace_hedera
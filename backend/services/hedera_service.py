@@ -1,7 +1,7 @@
-import asyncio
 import logging
 import os
 import uuid
+from typing import Optional, Union
 
 from hedera import (
     Client,
@@ -15,6 +15,13 @@ from hedera import (
     TokenSupplyType,
 )
 
+from services import hcs_codec
+from services.adaptive_limiter import AdaptiveLimiter, with_retries
+from services.bounded_executor import BoundedExecutor
+from services.executors import HEDERA, get_executor
+from services.hcs_topics import TopicRouter
+from services import hedera_simulator
+
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +44,18 @@ def _private_key_from_string(value: str) -> PrivateKey:
     raise AttributeError("PrivateKey parsing method not found")
 
 
+def _transaction_id(tx_response) -> Optional[str]:
+    tx_id = getattr(tx_response, "transactionId", None) or getattr(tx_response, "transaction_id", None)
+    return str(tx_id) if tx_id is not None else None
+
+
+def _get_receipt(tx_response, client):
+    try:
+        return tx_response.getReceipt(client)
+    except AttributeError:
+        return tx_response.get_receipt(client)
+
+
 def _call_setter(obj, snake_name: str, camel_name: str, *args, **kwargs):
     method = getattr(obj, snake_name, None)
     if method is None:
@@ -44,15 +63,54 @@ def _call_setter(obj, snake_name: str, camel_name: str, *args, **kwargs):
     return method(*args, **kwargs)
 
 
+class _AcceptedTransaction:
+    """Response for a re-send the network rejected as DUPLICATE_TRANSACTION: an earlier send was taken."""
+
+    def __init__(self, transaction_id) -> None:
+        self.transactionId = transaction_id
+
+    def getReceipt(self, client):
+        from hedera import TransactionReceiptQuery
+        query = TransactionReceiptQuery()
+        _call_setter(query, "set_transaction_id", "setTransactionId", self.transactionId)
+        return query.execute(client)
+
+
+def _sender(transaction, client):
+    """
+    Callable that sends a frozen ``transaction`` and returns its response.
+
+    Every call sends the same transaction ID. When an earlier send that timed out
+    had in fact been taken, the network answers DUPLICATE_TRANSACTION; that is
+    turned into a response whose receipt is looked up by ID, so the caller goes
+    on to the receipt instead of failing or sending a new copy.
+    """
+    def _send():
+        try:
+            return transaction.execute(client)
+        except Exception as exc:
+            if "DUPLICATE_TRANSACTION" not in str(exc).upper():
+                raise
+            return _AcceptedTransaction(_call_setter(transaction, "get_transaction_id", "getTransactionId"))
+
+    return _send
+
+
 class HederaService:
     def __init__(self):
         self.client = None
+        self.simulator: Optional[hedera_simulator.HederaSimulator] = None
         operator_id = os.getenv("HEDERA_OPERATOR_ID")
         operator_key = os.getenv("HEDERA_OPERATOR_KEY")
 
         client_ctor = getattr(Client, "for_testnet", None) or getattr(Client, "forTestnet", None)
 
-        if operator_id and operator_key and client_ctor:
+        # HEDERA_BACKEND=simulator swaps the network for the in-process simulator (load tests)
+        if os.getenv("HEDERA_BACKEND", "sdk").lower() == "simulator":
+            self.simulator = hedera_simulator.get_simulator()
+            self.client = self.simulator
+            logger.info("Hedera backend: in-process simulator")
+        elif operator_id and operator_key and client_ctor:
             try:
                 client = client_ctor()
                 # Try both method naming conventions (SDK version compatibility)
@@ -67,12 +125,36 @@ class HederaService:
         else:
             logger.info("Hedera credentials not fully provided – running in stub mode.")
 
-    async def log_evaluation(self, evaluation: dict) -> int:
-        topic_id_str = os.getenv("HCS_TOPIC_ID")
-        message = str(evaluation)
+        # In-flight HCS/HTS submissions: grows on success, halves on BUSY/throttle/timeout
+        self.limiter = AdaptiveLimiter(
+            initial=float(os.getenv("HEDERA_INFLIGHT_INITIAL", "8")),
+            min_limit=int(os.getenv("HEDERA_INFLIGHT_MIN", "1")),
+            max_limit=int(os.getenv("HEDERA_INFLIGHT_MAX", "64")),
+        )
+        self.max_attempts = int(os.getenv("HEDERA_MAX_ATTEMPTS", "4"))
+        # HCS_TOPIC_IDS shards MLAT positions across topics; other messages use the primary topic
+        self.topics = TopicRouter.from_env()
+        if self.simulator is not None and not self.topics.topic_ids:
+            self.topics = TopicRouter([hedera_simulator.DEFAULT_TOPIC_ID])
 
-        if not self.client or not topic_id_str:
-            return self._fallback_sequence()
+    @property
+    def executor(self) -> BoundedExecutor:
+        """Dedicated pool for blocking SDK calls, separate from Supabase's."""
+        return get_executor(HEDERA)
+
+    def topic_configured(self, topic_id: Optional[str] = None) -> bool:
+        return bool(self.client and (topic_id or self.topics.primary))
+
+    def prepare_topic_message(self, message: bytes, topic_id: Optional[str] = None):
+        """
+        Build a topic message and return a callable that sends it and returns the TransactionResponse.
+
+        The SDK transaction is frozen here, so every call sends the same transaction ID
+        and the network rejects a second copy instead of posting the message twice.
+        """
+        topic_id_str = topic_id or self.topics.primary
+        if self.simulator is not None:
+            return lambda: self.simulator.submit_message(topic_id_str, message)
 
         # Parse topic ID from string
         from hedera import TopicId
@@ -81,27 +163,85 @@ class HederaService:
         transaction = TopicMessageSubmitTransaction()
         _call_setter(transaction, "set_topic_id", "setTopicId", topic_id)
         _call_setter(transaction, "set_message", "setMessage", message)
+        _call_setter(transaction, "freeze_with", "freezeWith", self.client)
 
-        # Execute synchronously (Java SDK doesn't support Python async)
-        def _execute_sync():
-            try:
-                tx_response = transaction.execute(self.client)
-            except AttributeError:
-                # Try camelCase variant
-                tx_response = transaction.execute(self.client)
-            
-            try:
-                receipt = tx_response.getReceipt(self.client)
-            except AttributeError:
-                receipt = tx_response.get_receipt(self.client)
-            
-            return receipt.topicSequenceNumber if hasattr(receipt, 'topicSequenceNumber') else receipt.topic_sequence_number
-        
-        return await asyncio.to_thread(_execute_sync)
+        # Blocking Java SDK call; run it off the event loop
+        return _sender(transaction, self.client)
+
+    def topic_receipt(self, tx_response) -> int:
+        """Wait for consensus on a submitted topic message and return its sequence number."""
+        receipt = _get_receipt(tx_response, self.client)
+        return receipt.topicSequenceNumber if hasattr(receipt, 'topicSequenceNumber') else receipt.topic_sequence_number
+
+    async def log_evaluation(self, evaluation: dict, topic_id: Optional[str] = None) -> int:
+        # Compact canonical bytes; services.hcs_codec.decode reads them back
+        message = hcs_codec.ensure_fits(hcs_codec.encode(evaluation))
+
+        if not self.topic_configured(topic_id):
+            return self._fallback_sequence()
+
+        send = await self.executor.run(self.prepare_topic_message, message, topic_id)
+        return await self._send_and_confirm(send, self.topic_receipt)
+
+    async def submit_topic_message(self, topic_id: str, message: Union[str, bytes]) -> dict:
+        """
+        Submit raw ``message`` to ``topic_id`` and wait for consensus.
+
+        Returns ``sequence_number``, ``transaction_id`` and ``consensus_timestamp``.
+        The receipt does not carry the consensus timestamp, so it is ``None`` here;
+        look it up on a mirror node by transaction ID when needed.
+        """
+        data = hcs_codec.ensure_fits(message.encode("utf-8") if isinstance(message, str) else message)
+
+        if not self.topic_configured(topic_id):
+            return {"sequence_number": self._fallback_sequence(), "transaction_id": None, "consensus_timestamp": None}
+
+        send = await self.executor.run(self.prepare_topic_message, data, topic_id)
+
+        def _confirm(tx_response) -> dict:
+            return {
+                "sequence_number": self.topic_receipt(tx_response),
+                "transaction_id": _transaction_id(tx_response),
+                "consensus_timestamp": None,
+            }
+
+        return await self._send_and_confirm(send, _confirm)
+
+    async def mint_token(self, token_id: str, metadata_bytes: bytes) -> dict:
+        """Mint one NFT of ``token_id`` carrying ``metadata_bytes``; returns ``serial_number`` and ``transaction_id``."""
+        if not self.client or not token_id:
+            return {"serial_number": self._fallback_sequence(), "transaction_id": None}
+
+        if self.simulator is not None:
+            receipt = await self._simulate(lambda: self.simulator.mint(token_id, metadata=[metadata_bytes]))
+            return {"serial_number": receipt.serials[0], "transaction_id": receipt.transaction_id}
+
+        from hedera import TokenId
+        token = TokenId.fromString(token_id) if hasattr(TokenId, 'fromString') else TokenId.from_string(token_id)
+
+        transaction = TokenMintTransaction()
+        _call_setter(transaction, "set_token_id", "setTokenId", token)
+        _call_setter(transaction, "add_metadata", "addMetadata", metadata_bytes)
+        _call_setter(transaction, "freeze_with", "freezeWith", self.client)
+
+        def _confirm(tx_response) -> dict:
+            receipt = _get_receipt(tx_response, self.client)
+            serials = receipt.serials if hasattr(receipt, "serials") else receipt.serial_numbers
+            return {
+                "serial_number": int(serials[0]) if serials else None,
+                "transaction_id": _transaction_id(tx_response),
+            }
+
+        return await self._send_and_confirm(_sender(transaction, self.client), _confirm)
 
     async def mint_skill_token(self, user_id: str, skill_worth: int) -> str:
         token_id_str = os.getenv("SWT_TOKEN_ID")
 
+        if self.simulator is not None:
+            token = token_id_str or hedera_simulator.DEFAULT_TOKEN_ID
+            receipt = await self._simulate(lambda: self.simulator.mint(token, amount=skill_worth))
+            return str(receipt.token_id)
+
         if not self.client or not token_id_str:
             return self._fallback_token_id()
 
@@ -114,23 +254,14 @@ class HederaService:
         transaction = TokenMintTransaction()
         _call_setter(transaction, "set_token_id", "setTokenId", token_id)
         _call_setter(transaction, "set_amount", "setAmount", skill_worth)
+        _call_setter(transaction, "freeze_with", "freezeWith", self.client)
 
-        # Execute synchronously (Java SDK doesn't support Python async)
-        def _execute_sync():
-            try:
-                tx_response = transaction.execute(self.client)
-            except AttributeError:
-                tx_response = transaction.execute(self.client)
-            
-            try:
-                receipt = tx_response.getReceipt(self.client)
-            except AttributeError:
-                receipt = tx_response.get_receipt(self.client)
-            
+        def _confirm(tx_response) -> str:
+            receipt = _get_receipt(tx_response, self.client)
             token_id_result = receipt.tokenId if hasattr(receipt, 'tokenId') else receipt.token_id
             return str(token_id_result)
-        
-        return await asyncio.to_thread(_execute_sync)
+
+        return await self._send_and_confirm(_sender(transaction, self.client), _confirm)
 
     async def create_skill_token(self) -> str:
         operator_id = os.getenv("HEDERA_OPERATOR_ID")
@@ -138,6 +269,8 @@ class HederaService:
 
         if not self.client:
             return self._fallback_token_id()
+        if self.simulator is not None:
+            return self.simulator.create_token()
 
         transaction = TokenCreateTransaction()
         _call_setter(transaction, "set_token_name", "setTokenName", "Skill Worth Token")
@@ -154,6 +287,26 @@ class HederaService:
         receipt = await tx_response.get_receipt_async(self.client)
         return str(receipt.token_id)
 
+    async def _simulate(self, submit) -> "hedera_simulator.SimulatedReceipt":
+        """Run a simulated transaction and wait for its receipt, with the same limits and retries as the SDK path."""
+        return await self._send_and_confirm(submit, lambda tx_response: _get_receipt(tx_response, self.client))
+
+    async def _send_and_confirm(self, send, confirm):
+        """
+        Send a transaction, then wait for its receipt, both under the limiter.
+
+        A throttled send is retried: a BUSY precheck means the network did not take
+        the transaction, and SDK transactions are frozen first so a re-send carries
+        the same transaction ID. Once it was taken only ``confirm`` is retried, so a
+        receipt timeout or BUSY never sends (and mints or posts) it a second time.
+        """
+        tx_response = await with_retries(
+            self.limiter, lambda: self.executor.run(send), max_attempts=self.max_attempts
+        )
+        return await with_retries(
+            self.limiter, lambda: self.executor.run(confirm, tx_response), max_attempts=self.max_attempts
+        )
+
     def _fallback_sequence(self) -> int:
         global _fallback_sequence
         seq = _fallback_sequence
@@ -0,0 +1,289 @@
+"""In-process stand-in for the Hedera network: HCS topics and HTS mints with latency and BUSY."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_TOPIC_ID = "0.0.1001"
+DEFAULT_TOKEN_ID = "0.0.2001"
+
+
+class SimulatedStatusError(RuntimeError):
+    """Raised like the SDK's PrecheckStatusException/ReceiptStatusException, status in the text."""
+
+    def __init__(self, status: str, transaction_id: Optional[str] = None) -> None:
+        super().__init__(f"Hedera status {status} for transaction {transaction_id or '-'}")
+        self.status = status
+        self.transaction_id = transaction_id
+
+
+class LatencyModel:
+    """
+    Samples latencies in seconds.
+
+    ``kind`` is ``fixed`` (always ``mean_ms``), ``uniform`` (``mean_ms`` ± ``jitter``
+    as a fraction) or ``lognormal`` (median ``mean_ms``, ``jitter`` is sigma), which
+    gives consensus latency its long tail.
+    """
+
+    KINDS = ("fixed", "uniform", "lognormal")
+
+    def __init__(self, kind: str = "lognormal", mean_ms: float = 3000.0, jitter: float = 0.3) -> None:
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        self.kind = kind
+        self.mean_ms = max(0.0, mean_ms)
+        self.jitter = max(0.0, jitter)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed" or self.mean_ms == 0:
+            ms = self.mean_ms
+        elif self.kind == "uniform":
+            ms = self.mean_ms * rng.uniform(1 - self.jitter, 1 + self.jitter)
+        else:
+            ms = self.mean_ms * math.exp(rng.gauss(0.0, self.jitter))
+        return max(0.0, ms) / 1000
+
+
+@dataclass
+class SimulatedReceipt:
+    status: str
+    transaction_id: str
+    topic_sequence_number: Optional[int] = None
+    token_id: Optional[str] = None
+    total_supply: Optional[int] = None
+    serials: List[int] = field(default_factory=list)
+    consensus_timestamp: Optional[str] = None
+
+
+class SimulatedResponse:
+    """What ``execute`` returns; ``get_receipt`` blocks until consensus like the SDK."""
+
+    def __init__(self, simulator: "HederaSimulator", transaction_id: str) -> None:
+        self._simulator = simulator
+        self.transaction_id = transaction_id
+
+    def get_receipt(self, client: Any = None) -> SimulatedReceipt:
+        return self._simulator.receipt(self.transaction_id)
+
+
+@dataclass(order=True)
+class _Pending:
+    consensus_at: float
+    order: int
+    transaction_id: str = field(compare=False)
+    topic_id: Optional[str] = field(compare=False, default=None)
+    message: bytes = field(compare=False, default=b"")
+    mint: Optional[Tuple[str, int, List[bytes]]] = field(compare=False, default=None)
+    status: str = field(compare=False, default="SUCCESS")
+
+
+class HederaSimulator:
+    """
+    Thread-safe simulated network for load tests without Hedera access.
+
+    ``submit_message`` and ``mint`` behave like ``execute``: they pay the precheck
+    latency, may fail with ``BUSY`` (randomly at ``busy_rate``, or when more than
+    ``capacity_tps`` transactions arrived in the last second), and return a response
+    whose receipt is ready after a sampled consensus latency. Transactions reach
+    consensus in consensus-time order, so topic sequence numbers follow consensus
+    order rather than submission order. A ``receipt_failure_rate`` share fails at
+    consensus with ``BUSY``, like a transaction the network dropped.
+    """
+
+    def __init__(
+        self,
+        submit_latency: Optional[LatencyModel] = None,
+        consensus_latency: Optional[LatencyModel] = None,
+        busy_rate: float = 0.0,
+        receipt_failure_rate: float = 0.0,
+        capacity_tps: float = 0.0,
+        seed: Optional[int] = None,
+        max_messages_per_topic: int = 10000,
+        max_receipts: int = 100000,
+    ) -> None:
+        self.submit_latency = submit_latency or LatencyModel("fixed", 20.0)
+        self.consensus_latency = consensus_latency or LatencyModel("lognormal", 3000.0, 0.3)
+        self.busy_rate = busy_rate
+        self.receipt_failure_rate = receipt_failure_rate
+        self.capacity_tps = capacity_tps
+        self.max_messages_per_topic = max_messages_per_topic
+        self.max_receipts = max_receipts
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._pending: List[_Pending] = []
+        self._receipts: Dict[str, SimulatedReceipt] = {}
+        self._consensus_at: Dict[str, float] = {}
+        self._sequences: Dict[str, int] = {}
+        self._messages: Dict[str, Deque[Tuple[int, bytes]]] = {}
+        self._tokens: Dict[str, Dict[str, Any]] = {}
+        self._arrivals: Deque[float] = deque()
+        self._created_tokens = itertools.count(2002)
+        self._last_valid_start_ns = 0
+        self.operator_id = os.getenv("HEDERA_OPERATOR_ID") or "0.0.2"
+        self.submitted = 0
+        self.busy = 0
+        self.reached_consensus = 0
+
+    @classmethod
+    def from_env(cls) -> "HederaSimulator":
+        kind = os.getenv("HEDERA_SIM_LATENCY", "lognormal")
+        seed = os.getenv("HEDERA_SIM_SEED")
+        return cls(
+            submit_latency=LatencyModel("fixed", float(os.getenv("HEDERA_SIM_SUBMIT_MS", "20"))),
+            consensus_latency=LatencyModel(
+                kind,
+                float(os.getenv("HEDERA_SIM_CONSENSUS_MS", "3000")),
+                float(os.getenv("HEDERA_SIM_JITTER", "0.3")),
+            ),
+            busy_rate=float(os.getenv("HEDERA_SIM_BUSY_RATE", "0")),
+            receipt_failure_rate=float(os.getenv("HEDERA_SIM_RECEIPT_FAILURE_RATE", "0")),
+            capacity_tps=float(os.getenv("HEDERA_SIM_CAPACITY_TPS", "0")),
+            seed=int(seed) if seed else None,
+        )
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+    def submit_message(self, topic_id: str, message: bytes) -> SimulatedResponse:
+        return self._submit(topic_id=topic_id, message=bytes(message))
+
+    def mint(self, token_id: str, amount: int = 0, metadata: Optional[List[bytes]] = None) -> SimulatedResponse:
+        return self._submit(mint=(token_id, amount, list(metadata or [])))
+
+    def create_token(self) -> str:
+        with self._lock:
+            token_id = f"0.0.{next(self._created_tokens)}"
+            self._tokens[token_id] = {"supply": 0, "next_serial": 1}
+        return token_id
+
+    def _submit(self, **kwargs: Any) -> SimulatedResponse:
+        time.sleep(self._sample(self.submit_latency))
+        now = time.monotonic()
+        with self._lock:
+            # Valid-start timestamps are unique, as the SDK's are per operator
+            self._last_valid_start_ns = max(time.time_ns(), self._last_valid_start_ns + 1)
+            seconds, nanos = divmod(self._last_valid_start_ns, 1_000_000_000)
+            transaction_id = f"{self.operator_id}@{seconds}.{nanos:09d}"
+            self._arrivals.append(now)
+            while self._arrivals and now - self._arrivals[0] > 1.0:
+                self._arrivals.popleft()
+            over_capacity = self.capacity_tps > 0 and len(self._arrivals) > self.capacity_tps
+            if over_capacity or self._rng.random() < self.busy_rate:
+                self._arrivals.pop()
+                self.busy += 1
+                raise SimulatedStatusError("BUSY", transaction_id)
+            status = "BUSY" if self._rng.random() < self.receipt_failure_rate else "SUCCESS"
+            consensus_at = now + self.consensus_latency.sample(self._rng)
+            heapq.heappush(self._pending, _Pending(consensus_at, next(self._order), transaction_id, status=status, **kwargs))
+            self._consensus_at[transaction_id] = consensus_at
+            self.submitted += 1
+        return SimulatedResponse(self, transaction_id)
+
+    def _sample(self, model: LatencyModel) -> float:
+        with self._lock:
+            return model.sample(self._rng)
+
+    def receipt(self, transaction_id: str) -> SimulatedReceipt:
+        with self._lock:
+            consensus_at = self._consensus_at.get(transaction_id)
+            known = consensus_at is not None or transaction_id in self._receipts
+        if not known:
+            raise SimulatedStatusError("RECEIPT_NOT_FOUND", transaction_id)
+        if consensus_at is not None:
+            time.sleep(max(0.0, consensus_at - time.monotonic()))
+        self.advance()
+        with self._lock:
+            receipt = self._receipts.get(transaction_id)
+        if receipt is None:
+            raise SimulatedStatusError("RECEIPT_NOT_FOUND", transaction_id)
+        if receipt.status != "SUCCESS":
+            raise SimulatedStatusError(receipt.status, transaction_id)
+        return receipt
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Bring every transaction whose consensus time has passed to consensus, in order."""
+        now = time.monotonic() if now is None else now
+        reached = 0
+        with self._lock:
+            while self._pending and self._pending[0].consensus_at <= now:
+                self._apply(heapq.heappop(self._pending))
+                reached += 1
+        return reached
+
+    def _apply(self, pending: _Pending) -> None:
+        self._consensus_at.pop(pending.transaction_id, None)
+        receipt = SimulatedReceipt(
+            status=pending.status,
+            transaction_id=pending.transaction_id,
+            consensus_timestamp=datetime.now(timezone.utc).isoformat(),
+        )
+        self._receipts[pending.transaction_id] = receipt
+        if len(self._receipts) > self.max_receipts:
+            # Like the network, receipts are only kept for a while
+            del self._receipts[next(iter(self._receipts))]
+        if pending.status != "SUCCESS":
+            return
+        self.reached_consensus += 1
+        if pending.topic_id is not None:
+            sequence = self._sequences.get(pending.topic_id, 0) + 1
+            self._sequences[pending.topic_id] = sequence
+            self._messages.setdefault(
+                pending.topic_id, deque(maxlen=self.max_messages_per_topic)
+            ).append((sequence, pending.message))
+            receipt.topic_sequence_number = sequence
+        elif pending.mint is not None:
+            token_id, amount, metadata = pending.mint
+            token = self._tokens.setdefault(token_id, {"supply": 0, "next_serial": 1})
+            if metadata:
+                receipt.serials = list(range(token["next_serial"], token["next_serial"] + len(metadata)))
+                token["next_serial"] += len(metadata)
+                token["supply"] += len(metadata)
+            else:
+                token["supply"] += amount
+            receipt.token_id = token_id
+            receipt.total_supply = token["supply"]
+
+    # ------------------------------------------------------------------
+    # Inspection
+    # ------------------------------------------------------------------
+    def topic_messages(self, topic_id: str) -> List[Tuple[int, bytes]]:
+        """Messages a mirror node would show for ``topic_id``, in consensus order."""
+        self.advance()
+        with self._lock:
+            return list(self._messages.get(topic_id, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "busy": self.busy,
+                "reached_consensus": self.reached_consensus,
+                "pending": len(self._pending),
+                "topics": dict(self._sequences),
+                "token_supply": {token_id: token["supply"] for token_id, token in self._tokens.items()},
+            }
+
+
+_simulator: Optional[HederaSimulator] = None
+_simulator_lock = threading.Lock()
+
+
+def get_simulator() -> HederaSimulator:
+    """Process-wide simulator, so every HederaService sees the same topics and tokens."""
+    global _simulator
+    with _simulator_lock:
+        if _simulator is None:
+            _simulator = HederaSimulator.from_env()
+        return _simulator
@@ -0,0 +1,99 @@
+"""Load-driven degradation policy for optional MLAT pipeline work."""
+
+from __future__ import annotations
+
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DegradationMode(IntEnum):
+    """Each level sheds everything the levels below it shed, plus one more kind of work."""
+
+    NORMAL = 0
+    NO_AI = 1  # skip Groq track analysis
+    NO_MINT = 2  # also hold back Flight Track Token minting
+    DEFER_HCS = 3  # also spool HCS logs for later submission
+
+
+class LoadGovernor:
+    """
+    Steps the pipeline through ``DegradationMode`` levels based on queue depth and latency.
+
+    Load is the larger of ``queue_depth / queue_high`` and ``latency / latency_slo_ms``,
+    where latency is an exponentially weighted average. Above 1.0 the governor
+    escalates one level at most every ``step_s`` seconds; below ``recover_ratio``
+    it relaxes one level at most every ``cooldown_s`` seconds. The gap between
+    the two thresholds keeps it from flapping.
+    """
+
+    def __init__(
+        self,
+        queue_high: int = 24,
+        latency_slo_ms: float = 1500.0,
+        recover_ratio: float = 0.5,
+        step_s: float = 2.0,
+        cooldown_s: float = 10.0,
+        latency_alpha: float = 0.2,
+    ) -> None:
+        self.queue_high = max(1, queue_high)
+        self.latency_slo_ms = latency_slo_ms
+        self.recover_ratio = recover_ratio
+        self.step_s = step_s
+        self.cooldown_s = cooldown_s
+        self.latency_alpha = latency_alpha
+        self.mode = DegradationMode.NORMAL
+        self.latency_ms = 0.0
+        self.load = 0.0
+        self._last_change = float("-inf")
+        self.transitions: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {}
+
+    def observe_latency(self, latency_ms: float) -> None:
+        self.latency_ms += self.latency_alpha * (latency_ms - self.latency_ms)
+
+    def update(self, queue_depth: int, now: Optional[float] = None) -> DegradationMode:
+        now = time.monotonic() if now is None else now
+        self.load = max(queue_depth / self.queue_high, self.latency_ms / self.latency_slo_ms)
+        since_change = now - self._last_change
+
+        if self.load > 1.0 and self.mode < DegradationMode.DEFER_HCS and since_change >= self.step_s:
+            self._transition(DegradationMode(self.mode + 1), now)
+        elif self.load < self.recover_ratio and self.mode > DegradationMode.NORMAL and since_change >= self.cooldown_s:
+            self._transition(DegradationMode(self.mode - 1), now)
+        return self.mode
+
+    def _transition(self, mode: DegradationMode, now: float) -> None:
+        key = f"{self.mode.name}->{mode.name}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        log = logger.warning if mode > self.mode else logger.info
+        log("MLAT load governor %s (load=%.2f, latency=%.0fms)", key, self.load, self.latency_ms)
+        self.mode = mode
+        self._last_change = now
+
+    @property
+    def allows_ai(self) -> bool:
+        return self.mode < DegradationMode.NO_AI
+
+    @property
+    def allows_mint(self) -> bool:
+        return self.mode < DegradationMode.NO_MINT
+
+    @property
+    def allows_hcs(self) -> bool:
+        return self.mode < DegradationMode.DEFER_HCS
+
+    def record_shed(self, kind: str, count: int = 1) -> None:
+        self.shed[kind] = self.shed.get(kind, 0) + count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode.name,
+            "load": round(self.load, 3),
+            "latency_ewma_ms": round(self.latency_ms, 1),
+            "transitions": dict(self.transitions),
+            "shed": dict(self.shed),
+        }
@@ -5,12 +5,15 @@ import uuid
 import secrets
 import json
 
-from services.supabase_service import SupabaseService
+from services.supabase_service import SupabaseService, get_supabase_service
+from fastapi import Depends
+
 from services.hedera_service import HederaService
+from services.hedera_client import get_hedera_service
 
 
 class MarketplaceService:
-    def __init__(self, supabase: SupabaseService, hedera: HederaService):
+    def __init__(self, supabase: SupabaseService = Depends(get_supabase_service), hedera: HederaService = Depends(get_hedera_service)):
         self.supabase = supabase
         self.hedera = hedera
         self.escrow_account = "0.0.1234567"  # Marketplace escrow account
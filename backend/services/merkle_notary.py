@@ -0,0 +1,319 @@
+"""Merkle-batched HCS notarization: one root per time window, leaves stored for inclusion proofs."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from services.hcs_codec import canonical_json
+
+logger = logging.getLogger(__name__)
+
+# (root message, topic ID) -> HCS sequence number
+SubmitRoot = Callable[[Dict[str, Any], Optional[str]], Awaitable[Optional[int]]]
+# (root row, leaf rows): what a window needs to rebuild any of its proofs later
+StoreBatch = Callable[[Dict[str, Any], List[Dict[str, Any]]], Awaitable[None]]
+# Proof key -> {"root": root row, "leaf": leaf row, "leaf_hashes": [hex, ...]} or None
+LoadBatch = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+# Domain separation so a leaf can never be passed off as an inner node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(payload: Dict[str, Any]) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + canonical_json(payload)).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """Binary SHA-256 tree; an odd node at the end of a level is promoted unchanged."""
+
+    def __init__(self, leaves: List[bytes]) -> None:
+        if not leaves:
+            raise ValueError("Merkle tree needs at least one leaf")
+        self.levels: List[List[bytes]] = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[Dict[str, str]]:
+        """Sibling hashes from leaf to root; ``side`` is where the sibling sits."""
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append({"side": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf: bytes, proof: List[Dict[str, str]], root: bytes) -> bool:
+    node = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = _node_hash(sibling, node) if step["side"] == "left" else _node_hash(node, sibling)
+    return node == root
+
+
+@dataclass
+class MerkleBatch:
+    batch_id: int
+    tree: MerkleTree
+    payloads: List[Dict[str, Any]]
+    keys: List[str]
+    window_start: str
+    window_end: str
+    topic_id: Optional[str] = None
+    sequence_number: Optional[int] = None
+    index: Dict[str, int] = field(default_factory=dict)
+
+
+class MerkleNotary:
+    """
+    Collects HCS payloads for ``window_s`` seconds and notarizes only the window's Merkle root.
+
+    ``add`` returns once the root carrying the payload has been submitted and,
+    with ``store_batch`` set, the root and its leaves have been stored, with the
+    root's HCS sequence number. Each topic passed to ``add`` has its own window
+    and root, submitted to that topic, so sharded positions stay on their shard.
+    ``proof(key)`` shows a position is included under a root on its topic: from
+    the last ``max_batches`` windows kept in memory, or otherwise rebuilt from the
+    leaf hashes ``load_batch`` reads back.
+    """
+
+    def __init__(
+        self,
+        submit_root: SubmitRoot,
+        window_s: float = 1.0,
+        max_leaves: int = 4096,
+        max_batches: int = 3600,
+        store_batch: Optional[StoreBatch] = None,
+        load_batch: Optional[LoadBatch] = None,
+    ) -> None:
+        self.submit_root = submit_root
+        self.store_batch = store_batch
+        self.load_batch = load_batch
+        self.window_s = window_s
+        self.max_leaves = max(1, max_leaves)
+        self._pending: Dict[Optional[str], List[Tuple[str, Dict[str, Any], asyncio.Future]]] = {}
+        self._window_started: Dict[Optional[str], str] = {}
+        self._batches: Deque[MerkleBatch] = deque(maxlen=max(1, max_batches))
+        self._index: Dict[str, MerkleBatch] = {}
+        self._next_batch_id = 1
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.roots_submitted = 0
+        self.leaves_notarized = 0
+        self.failed_roots = 0
+        self.failed_stores = 0
+        self.proofs_from_storage = 0
+
+    async def add(self, key: str, payload: Dict[str, Any], topic_id: Optional[str] = None) -> Optional[int]:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="merkle-notary")
+        pending = self._pending.setdefault(topic_id, [])
+        if not pending:
+            self._window_started[topic_id] = datetime.now(timezone.utc).isoformat()
+        future = asyncio.get_running_loop().create_future()
+        pending.append((key, payload, future))
+        if len(pending) >= self.max_leaves:
+            self._full.set()
+        return await future
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._pending:
+            await self.commit_all()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.window_s)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            if self._pending:
+                await self.commit_all()
+
+    async def commit_all(self) -> List[MerkleBatch]:
+        """Close every topic's current window; the topics' roots are submitted concurrently."""
+        batches = await asyncio.gather(*(self.commit(topic_id) for topic_id in list(self._pending)))
+        return [batch for batch in batches if batch is not None]
+
+    async def commit(self, topic_id: Optional[str] = None) -> Optional[MerkleBatch]:
+        """Close ``topic_id``'s current window and submit its root to that topic."""
+        pending = self._pending.get(topic_id) or []
+        entries, rest = pending[:self.max_leaves], pending[self.max_leaves:]
+        if rest:
+            self._pending[topic_id] = rest
+        else:
+            self._pending.pop(topic_id, None)
+        if not entries:
+            return None
+        started = time.perf_counter()
+        batch = MerkleBatch(
+            batch_id=self._next_batch_id,
+            tree=MerkleTree([leaf_hash(payload) for _, payload, _ in entries]),
+            payloads=[payload for _, payload, _ in entries],
+            keys=[key for key, _, _ in entries],
+            window_start=self._window_started.pop(topic_id, None) or datetime.now(timezone.utc).isoformat(),
+            window_end=datetime.now(timezone.utc).isoformat(),
+            topic_id=topic_id,
+        )
+        self._next_batch_id += 1
+        if rest:
+            self._window_started[topic_id] = datetime.now(timezone.utc).isoformat()
+
+        try:
+            batch.sequence_number = await self.submit_root({
+                "type": "mlat_merkle_root",
+                "batch_id": batch.batch_id,
+                "root": batch.tree.root.hex(),
+                "leaf_count": len(entries),
+                "hash": "sha256",
+                "window_start": batch.window_start,
+                "window_end": batch.window_end,
+            }, topic_id)
+        except Exception as exc:
+            self.failed_roots += 1
+            for _, _, future in entries:
+                if not future.done():
+                    future.set_exception(exc)
+            return None
+
+        self._remember(batch)
+        await self._store(batch)
+        self.roots_submitted += 1
+        self.leaves_notarized += len(entries)
+        for _, _, future in entries:
+            if not future.done():
+                future.set_result(batch.sequence_number)
+        logger.debug(
+            "Notarized %d positions under one Merkle root in %.1fms",
+            len(entries), (time.perf_counter() - started) * 1000,
+        )
+        return batch
+
+    def _remember(self, batch: MerkleBatch) -> None:
+        if len(self._batches) == self._batches.maxlen:
+            evicted = self._batches[0]
+            for key in evicted.keys:
+                if self._index.get(key) is evicted:
+                    del self._index[key]
+        self._batches.append(batch)
+        for idx, key in enumerate(batch.keys):
+            batch.index[key] = idx
+            self._index[key] = batch
+
+    async def _store(self, batch: MerkleBatch) -> None:
+        if self.store_batch is None:
+            return
+        root = batch.tree.root.hex()
+        try:
+            await self.store_batch(
+                {
+                    "root": root,
+                    "batch_id": batch.batch_id,
+                    "leaf_count": len(batch.keys),
+                    "hedera_sequence_number": batch.sequence_number,
+                    "hedera_topic_id": batch.topic_id,
+                    "window_start": batch.window_start,
+                    "window_end": batch.window_end,
+                },
+                [
+                    {
+                        "root": root,
+                        "leaf_index": idx,
+                        "proof_key": key,
+                        "leaf_hash": batch.tree.levels[0][idx].hex(),
+                        "payload": payload,
+                    }
+                    for idx, (key, payload) in enumerate(zip(batch.keys, batch.payloads))
+                ],
+            )
+        except Exception as exc:
+            # The root is on HCS regardless; only proofs outliving the in-memory window are lost
+            self.failed_stores += 1
+            logger.warning("Failed to store Merkle window %s: %s", root, exc)
+
+    async def proof(self, key: str) -> Optional[Dict[str, Any]]:
+        batch = self._index.get(key)
+        if batch is not None:
+            idx = batch.index[key]
+            return _proof(
+                batch.tree, idx, batch.payloads[idx], batch.batch_id, batch.topic_id,
+                batch.sequence_number, batch.window_start, batch.window_end,
+            )
+        if self.load_batch is None:
+            return None
+        stored = await self.load_batch(key)
+        if stored is None:
+            return None
+        root, leaf = stored["root"], stored["leaf"]
+        tree = MerkleTree([bytes.fromhex(leaf_hash) for leaf_hash in stored["leaf_hashes"]])
+        if tree.root.hex() != root["root"]:
+            logger.warning("Stored leaves of Merkle window %s do not rebuild its root", root["root"])
+            return None
+        self.proofs_from_storage += 1
+        return _proof(
+            tree, leaf["leaf_index"], leaf["payload"], root.get("batch_id"), root.get("hedera_topic_id"),
+            root.get("hedera_sequence_number"), root.get("window_start"), root.get("window_end"),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_s": self.window_s,
+            "pending_leaves": sum(len(pending) for pending in self._pending.values()),
+            "open_windows": len(self._pending),
+            "roots_submitted": self.roots_submitted,
+            "leaves_notarized": self.leaves_notarized,
+            "failed_roots": self.failed_roots,
+            "batches_retained": len(self._batches),
+            "failed_stores": self.failed_stores,
+            "proofs_from_storage": self.proofs_from_storage,
+        }
+
+
+def _proof(
+    tree: MerkleTree,
+    idx: int,
+    payload: Dict[str, Any],
+    batch_id: Optional[int],
+    topic_id: Optional[str],
+    sequence_number: Optional[int],
+    window_start: Optional[str],
+    window_end: Optional[str],
+) -> Dict[str, Any]:
+    return {
+        "leaf": payload,
+        "leafHash": tree.levels[0][idx].hex(),
+        "leafIndex": idx,
+        "leafCount": len(tree.levels[0]),
+        "proof": tree.proof(idx),
+        "root": tree.root.hex(),
+        "batchId": batch_id,
+        "hederaTopicId": topic_id,
+        "hederaSequenceNumber": sequence_number,
+        "windowStart": window_start,
+        "windowEnd": window_end,
+    }
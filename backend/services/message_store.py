@@ -0,0 +1,117 @@
+"""In-memory per-aircraft window of recent Mode-S observations."""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from models import ModeSMessage
+
+
+class _IcaoWindow:
+    """Observations for one aircraft, kept sorted by ``timestamp_ns``."""
+
+    __slots__ = ("timestamps", "observations", "last_seen")
+
+    def __init__(self) -> None:
+        self.timestamps: Deque[int] = deque()
+        self.observations: Deque[Dict[str, Any]] = deque()
+        self.last_seen = 0.0
+
+    def add(self, timestamp_ns: int, observation: Dict[str, Any]) -> None:
+        if not self.timestamps or timestamp_ns >= self.timestamps[-1]:
+            # Sensors mostly deliver in order, so this is the common path
+            self.timestamps.append(timestamp_ns)
+            self.observations.append(observation)
+            return
+        idx = bisect_right(self.timestamps, timestamp_ns)
+        self.timestamps.insert(idx, timestamp_ns)
+        self.observations.insert(idx, observation)
+
+    def trim(self, max_messages: int, retention_ns: int) -> None:
+        cutoff = self.timestamps[-1] - retention_ns
+        while self.timestamps and (len(self.timestamps) > max_messages or self.timestamps[0] < cutoff):
+            self.timestamps.popleft()
+            self.observations.popleft()
+
+
+class MessageWindowStore:
+    """
+    Ring buffer of recent observations per ICAO, indexed by sensor timestamp.
+
+    Each aircraft keeps at most ``max_messages_per_icao`` observations spanning
+    ``retention_ms`` of sensor time. Aircraft that receive nothing for
+    ``idle_ttl_s`` seconds are dropped entirely.
+    """
+
+    def __init__(
+        self,
+        max_messages_per_icao: int = 512,
+        retention_ms: int = 30_000,
+        idle_ttl_s: float = 120.0,
+    ) -> None:
+        self.max_messages_per_icao = max(1, max_messages_per_icao)
+        self.retention_ns = retention_ms * 1_000_000
+        self.idle_ttl_s = idle_ttl_s
+        self._windows: Dict[str, _IcaoWindow] = {}
+        self._next_sweep = 0.0
+        self._evicted = 0
+
+    @staticmethod
+    def _key(icao_address: str) -> str:
+        return icao_address.upper()
+
+    def add_messages(self, messages: Iterable[ModeSMessage], now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        touched: Dict[str, _IcaoWindow] = {}
+        count = 0
+        for message in messages:
+            key = self._key(message.icaoAddress)
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = _IcaoWindow()
+            window.add(message.timestampNs, {
+                "sensor_id": message.sensorId,
+                "latitude": message.sensorLocation.latitude,
+                "longitude": message.sensorLocation.longitude,
+                "timestamp_ns": message.timestampNs,
+                "altitude_m": message.sensorLocation.altitudeMeters,
+            })
+            window.last_seen = now
+            touched[key] = window
+            count += 1
+
+        for window in touched.values():
+            window.trim(self.max_messages_per_icao, self.retention_ns)
+
+        if now >= self._next_sweep:
+            self.evict_idle(now)
+        return count
+
+    def recent_observations(self, icao_address: str, time_window_ms: int) -> List[Dict[str, Any]]:
+        """Observations within ``time_window_ms`` of the newest one for this aircraft."""
+        window = self._windows.get(self._key(icao_address))
+        if window is None or not window.timestamps:
+            return []
+        cutoff = window.timestamps[-1] - time_window_ms * 1_000_000
+        start = bisect_left(window.timestamps, cutoff)
+        return list(islice(window.observations, start, None))
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        expired = [key for key, window in self._windows.items() if now - window.last_seen > self.idle_ttl_s]
+        for key in expired:
+            del self._windows[key]
+        self._evicted += len(expired)
+        self._next_sweep = now + max(1.0, self.idle_ttl_s / 4)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "aircraft": len(self._windows),
+            "messages": sum(len(window.timestamps) for window in self._windows.values()),
+            "evicted_aircraft": self._evicted,
+        }
@@ -0,0 +1,148 @@
+"""Fixed-bucket latency histograms and outcome counters with Prometheus text output."""
+
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; the +Inf bucket is implicit
+DEFAULT_BUCKETS_S: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Counts observations per fixed bucket; no per-sample storage."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_S) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self) -> List[int]:
+        total, out = 0, []
+        for count in self.counts:
+            total += count
+            out.append(total)
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (the max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for idx, total in enumerate(self.cumulative()):
+            if total >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else self.max
+        return self.max
+
+
+class _StageTimer:
+    """Context manager that records one stage run; exceptions are counted by type name."""
+
+    __slots__ = ("metrics", "stage", "outcome", "_started")
+
+    def __init__(self, metrics: "StageMetrics", stage: str) -> None:
+        self.metrics = metrics
+        self.stage = stage
+        self.outcome = "success"
+        self._started = 0.0
+
+    def fail(self, reason: str) -> None:
+        self.outcome = reason
+
+    def __enter__(self) -> "_StageTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self._started
+        outcome = exc_type.__name__ if exc_type is not None else self.outcome
+        self.metrics.observe(self.stage, elapsed, outcome)
+        return False
+
+
+class StageMetrics:
+    """
+    Per-stage latency histograms and success/failure counters.
+
+    Usage::
+
+        with metrics.time("solve") as timer:
+            result = await solve()
+            if result is None:
+                timer.fail("no_solution")
+    """
+
+    def __init__(self, namespace: str, buckets: Sequence[float] = DEFAULT_BUCKETS_S) -> None:
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[str, Histogram] = {}
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+
+    def time(self, stage: str) -> _StageTimer:
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float, outcome: str = "success") -> None:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        self.count(stage, outcome)
+
+    def count(self, stage: str, outcome: str, amount: int = 1) -> None:
+        """Count an outcome that was not timed, e.g. a solve rejected before it started."""
+        outcomes = self._outcomes.setdefault(stage, {})
+        outcomes[outcome] = outcomes.get(outcome, 0) + amount
+
+    def stats(self) -> Dict[str, Any]:
+        stages: Dict[str, Any] = {}
+        for stage in sorted(set(self._histograms) | set(self._outcomes)):
+            histogram: Optional[Histogram] = self._histograms.get(stage)
+            entry: Dict[str, Any] = {"outcomes": dict(self._outcomes.get(stage, {}))}
+            if histogram is not None:
+                entry.update({
+                    "count": histogram.count,
+                    "avg_ms": round(histogram.sum / histogram.count * 1000, 3),
+                    "p50_ms": round(histogram.quantile(0.5) * 1000, 3),
+                    "p95_ms": round(histogram.quantile(0.95) * 1000, 3),
+                    "p99_ms": round(histogram.quantile(0.99) * 1000, 3),
+                    "max_ms": round(histogram.max * 1000, 3),
+                })
+            stages[stage] = entry
+        return stages
+
+    def render_prometheus(self) -> str:
+        latency = f"{self.namespace}_stage_latency_seconds"
+        outcomes = f"{self.namespace}_stage_outcomes_total"
+        lines = [
+            f"# HELP {latency} Latency of {self.namespace} pipeline stages.",
+            f"# TYPE {latency} histogram",
+        ]
+        for stage, histogram in sorted(self._histograms.items()):
+            bounds = [_format_float(bound) for bound in histogram.buckets] + ["+Inf"]
+            for bound, total in zip(bounds, histogram.cumulative()):
+                lines.append(f'{latency}_bucket{{stage="{stage}",le="{bound}"}} {total}')
+            lines.append(f'{latency}_sum{{stage="{stage}"}} {_format_float(histogram.sum)}')
+            lines.append(f'{latency}_count{{stage="{stage}"}} {histogram.count}')
+        lines += [
+            f"# HELP {outcomes} Stage runs by outcome (success or failure reason).",
+            f"# TYPE {outcomes} counter",
+        ]
+        for stage, counts in sorted(self._outcomes.items()):
+            for outcome, total in sorted(counts.items()):
+                lines.append(f'{outcomes}{{stage="{stage}",outcome="{outcome}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
@@ -1,71 +1,202 @@
 from __future__ import annotations
 
 import asyncio
-import httpx
+import logging
 import os
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Dict, List
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
-from models import AircraftPosition, MLATProcessRequest, MLATProcessResponse, ModeSMessage
-from services.hedera_service import HederaService
+from api.intelligence import ThreatRequest, assess_track, get_groq
+from models import (
+    AircraftPosition,
+    MLATBatchProcessRequest,
+    MLATBatchProcessResponse,
+    MLATBatchResult,
+    MLATProcessRequest,
+    MLATProcessResponse,
+    ModeSMessage,
+)
+from services import hcs_codec
+from services.ai_dispatcher import AIAnalysisDispatcher
+from services.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from services.executors import GROQ, SUPABASE, executor_stats, get_executor
+from services.ftt_minter import FlightTrackMinter, TrackSession
+from services.hcs_submitter import HCSSubmitter
+from services.hedera_client import get_hedera_provider, get_hedera_service
+from services.load_governor import LoadGovernor
+from services.merkle_notary import MerkleNotary
+from services.message_store import MessageWindowStore
+from services.metrics import StageMetrics
 from services.mlat_solver import MLATSolver
-from services.supabase_service import SupabaseService
+from services.notarization_policy import NotarizationPolicy
+from services.solve_scheduler import SolveScheduler
+from services.track_store import TrackStore
+from services.supabase_service import get_supabase_service, supabase_pool_stats
+from services.write_behind import WriteBehindQueue
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_spool_path() -> Path:
+    default = Path(__file__).resolve().parents[1] / "data" / "mlat_write_behind.spool"
+    return Path(os.getenv("MLAT_SPOOL_PATH", str(default)))
 
 
 class MLATPipelineService:
     """Coordinates ingestion, MLAT solving, and persistence."""
 
     def __init__(self) -> None:
-        self.supabase = SupabaseService()
+        # Shared pooled client, the same one the API routes use
+        self.supabase = get_supabase_service()
         self.solver = MLATSolver()
-        self.hedera = HederaService()
+        # Shared with the API routes: one client, one in-flight limit against the network
+        self.hedera = get_hedera_service()
         self.min_sensors = int(os.getenv("MLAT_MIN_SENSORS", "3"))
         self.confidence_threshold = float(os.getenv("MLAT_CONFIDENCE_THRESHOLD", "80"))
-        self._local_messages: List[Dict] = []
-
-    async def _trigger_ai_analysis(self, icao: str, position: AircraftPosition, recent_track: List[Dict]) -> None:
-        """Fire-and-forget Groq analysis. Never blocks the MLAT pipeline."""
-        try:
-            # Prepare track data for AI analysis
-            track_data = [
-                {
-                    "lat": p["latitude"],
-                    "lon": p["longitude"],
-                    "alt_ft": p.get("altitude_ft"),
-                    "confidence": p.get("confidence_score", 0),
-                    "timestamp_iso": p.get("calculated_at", datetime.now(timezone.utc).isoformat())
-                }
-                for p in recent_track[-8:]  # Last 8 positions
-            ]
+        # Positions packed into one HCS message when logging a batch
+        self.hcs_batch_size = max(1, int(os.getenv("MLAT_HCS_BATCH_SIZE", "8")))
+        # ... and never more than fits one HCS transaction once encoded
+        self.hcs_message_bytes = int(os.getenv("MLAT_HCS_MESSAGE_BYTES", str(hcs_codec.HCS_CHUNK_BYTES)))
+        # HCS messages are pipelined under the Hedera client's adaptive in-flight limit
+        self.hcs_submitter = HCSSubmitter(
+            self.hedera,
+            limiter=self.hedera.limiter,
+            receipt_timeout_s=float(os.getenv("MLAT_HCS_RECEIPT_TIMEOUT_S", "30")),
+            max_attempts=self.hedera.max_attempts,
+        )
+        self._receipt_tasks: set = set()
+        # scipy solves are CPU-bound; keep them off the event loop on a bounded pool
+        self.solver_pool = BoundedExecutor(
+            "mlat-solver",
+            max_workers=int(os.getenv("MLAT_SOLVER_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            max_queue=int(os.getenv("MLAT_SOLVER_MAX_QUEUE", "32")),
+        )
+        # Orders solves by staleness, map viewers and paid subscriptions when slots run out
+        self.scheduler = SolveScheduler(
+            slots=self.solver_pool.max_workers,
+            max_pending=int(os.getenv("MLAT_SCHEDULER_MAX_PENDING", "256")),
+            staleness_cap_s=float(os.getenv("MLAT_SCHEDULER_STALENESS_CAP_S", "30")),
+            viewer_weight=float(os.getenv("MLAT_SCHEDULER_VIEWER_WEIGHT", "5")),
+            subscriber_weight=float(os.getenv("MLAT_SCHEDULER_SUBSCRIBER_WEIGHT", "20")),
+            aging_per_s=float(os.getenv("MLAT_SCHEDULER_AGING_PER_S", "2")),
+        )
+        self.subscription_refresh_s = float(os.getenv("MLAT_SUBSCRIPTION_REFRESH_S", "60"))
+        self._subscribed_sensors: Dict[str, int] = {}
+        self._subscriptions_refreshed_at = float("-inf")
+        # Concurrent /process calls for one ICAO share a solve; re-solves are rate limited
+        self.min_resolve_interval_s = float(os.getenv("MLAT_MIN_RESOLVE_INTERVAL_MS", "500")) / 1000
+        self._inflight_solves: Dict[str, asyncio.Future] = {}
+        self._last_solutions: Dict[str, Tuple[float, FrozenSet[str], AircraftPosition]] = {}
+        self._coalesced = 0
+        self._reused = 0
+        # Recent observations are served from memory; Supabase is the write-through copy
+        self.message_store = MessageWindowStore(
+            max_messages_per_icao=int(os.getenv("MLAT_STORE_MAX_MESSAGES", "512")),
+            retention_ms=int(os.getenv("MLAT_STORE_RETENTION_MS", "30000")),
+            idle_ttl_s=float(os.getenv("MLAT_STORE_IDLE_TTL_S", "120")),
+        )
+        # Solved positions per aircraft, read by the AI trigger and track endpoint
+        self.track_store = TrackStore(
+            max_points_per_icao=int(os.getenv("MLAT_TRACK_MAX_POINTS", "32")),
+            idle_ttl_s=float(os.getenv("MLAT_TRACK_IDLE_TTL_S", "300")),
+        )
+        # With a window set, positions are notarized as one Merkle root per window; off by
+        # default, so out of the box the notarization policy below picks what is logged
+        self.merkle_notary: Optional[MerkleNotary] = None
+        merkle_window_ms = float(os.getenv("MLAT_MERKLE_WINDOW_MS", "0"))
+        if merkle_window_ms > 0:
+            self.merkle_notary = MerkleNotary(
+                self._log_hcs,
+                window_s=merkle_window_ms / 1000,
+                max_leaves=int(os.getenv("MLAT_MERKLE_MAX_LEAVES", "4096")),
+                max_batches=int(os.getenv("MLAT_MERKLE_RETAINED_WINDOWS", "3600")),
+                store_batch=self._store_merkle_window,
+                load_batch=self._load_merkle_window,
+            )
+        # Fixes that barely moved since the last notarized one skip HCS, bar a heartbeat;
+        # not applied with a Merkle window, where every persisted position is a leaf
+        self.notarization_policy = NotarizationPolicy(
+            min_distance_m=float(os.getenv("MLAT_NOTARIZE_MIN_DISTANCE_M", "50")),
+            min_confidence_delta=float(os.getenv("MLAT_NOTARIZE_MIN_CONFIDENCE_DELTA", "5")),
+            heartbeat_s=float(os.getenv("MLAT_NOTARIZE_HEARTBEAT_S", "60")),
+        )
+        # Sheds AI, then minting, then defers HCS logging as load rises
+        self.governor = LoadGovernor(
+            queue_high=int(os.getenv("MLAT_SHED_QUEUE_HIGH", "24")),
+            latency_slo_ms=float(os.getenv("MLAT_SHED_LATENCY_SLO_MS", "1500")),
+            recover_ratio=float(os.getenv("MLAT_SHED_RECOVER_RATIO", "0.5")),
+            step_s=float(os.getenv("MLAT_SHED_STEP_S", "2")),
+            cooldown_s=float(os.getenv("MLAT_SHED_COOLDOWN_S", "10")),
+        )
+        # Extra queue depth reporters, e.g. the background runtime's stage queues
+        self.queue_depth_sources: List[Callable[[], int]] = []
+        self._inflight = 0
+        self._deferred_hcs: Deque[Tuple[AircraftPosition, Dict[str, Any]]] = deque(
+            maxlen=int(os.getenv("MLAT_DEFERRED_HCS_MAX", "10000"))
+        )
+        self._deferred_drained = 0
+        self._hcs_unconfirmed = 0
+        self._drain_task: Optional[asyncio.Task] = None
+        # Groq analysis runs in-process on a few workers, latest track per ICAO only
+        self.ai_dispatcher = AIAnalysisDispatcher(
+            self._analyse_track,
+            workers=int(os.getenv("MLAT_AI_WORKERS", "2")),
+            max_pending=int(os.getenv("MLAT_AI_MAX_PENDING", "256")),
+            cooldown_s=float(os.getenv("MLAT_AI_COOLDOWN_S", "30")),
+        )
+        # Latency histograms and outcome counters per remote call / pipeline stage
+        self.metrics = StageMetrics("mlat")
+        # Flight Track Tokens are minted once per track session, several sessions per transaction
+        self.ftt_minter = FlightTrackMinter(
+            self._mint_flight_track_tokens,
+            on_minted=self._record_minted_sessions,
+            should_mint=lambda: self.governor.allows_mint,
+            session_gap_s=float(os.getenv("MLAT_FTT_SESSION_GAP_S", "300")),
+            batch_size=int(os.getenv("MLAT_FTT_BATCH_SIZE", "20")),
+            flush_interval_s=float(os.getenv("MLAT_FTT_FLUSH_INTERVAL_S", "10")),
+        )
+        # Positions and their HCS payloads are written behind the request and spooled on failure
+        self.write_behind: Optional[WriteBehindQueue] = None
+        if os.getenv("MLAT_WRITE_BEHIND", "true").lower() in ("1", "true", "yes"):
+            self.write_behind = WriteBehindQueue(
+                self._flush_write_behind,
+                spool_path=write_behind_spool_path(),
+                batch_size=int(os.getenv("MLAT_WRITE_BEHIND_BATCH_SIZE", "50")),
+                flush_interval_s=float(os.getenv("MLAT_WRITE_BEHIND_INTERVAL_MS", "250")) / 1000,
+                flush_timeout_s=float(os.getenv("MLAT_WRITE_BEHIND_TIMEOUT_S", "10")),
+                max_queue=int(os.getenv("MLAT_WRITE_BEHIND_MAX_QUEUE", "10000")),
+                replay_interval_s=float(os.getenv("MLAT_SPOOL_REPLAY_INTERVAL_S", "5")),
+                # Positions upsert on (icao_address, calculated_at) and records note a started HCS
+                # submit (hcs_sent), so replaying a batch that did land is harmless
+                idempotent=True,
+            )
 
-            payload = {
-                "icao": icao,
-                "has_adsb": False,  # Default to False since ADSB status not tracked
-                "sensor_count": position.sensorCount or 0,
-                "track": track_data,
-            }
+    @property
+    def supabase_pool(self) -> BoundedExecutor:
+        """Supabase calls get their own pool so slow Hedera receipts cannot starve them."""
+        return get_executor(SUPABASE)
 
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(
-                    "http://localhost:8000/api/intelligence/analyse-track",
-                    json=payload, timeout=5.0
-                )
-                result = resp.json()
-
-                # Store AI assessment in Supabase alongside the position
-                if self.supabase.is_configured:
-                    await asyncio.to_thread(
-                        self.supabase.update_aircraft_position_ai,
-                        icao,
-                        result.get("threat_level", "unknown"),
-                        result.get("summary", ""),
-                        result.get("tags", [])
-                    )
+    async def start(self) -> None:
+        """Start background persistence, replaying anything spooled by a previous run."""
+        if self.write_behind is not None:
+            self.write_behind.start()
 
-        except Exception as e:
-            # Never crash the MLAT pipeline for AI failures
-            import logging
-            logging.warning(f"AI analysis failed for {icao}: {e}")
+    async def stop(self) -> None:
+        """Stop AI workers and flush pending writes; anything that cannot be written is left in the spool."""
+        await self.ai_dispatcher.stop()
+        await self.ftt_minter.stop()
+        if self.write_behind is not None:
+            await self.write_behind.stop()
+        if self._receipt_tasks:
+            await asyncio.gather(*list(self._receipt_tasks), return_exceptions=True)
+        # After the write-behind flush, which may still be adding leaves to the open window
+        if self.merkle_notary is not None:
+            await self.merkle_notary.stop()
+        await self.hcs_submitter.drain()
 
     # ------------------------------------------------------------------
     # Ingestion
@@ -74,128 +205,702 @@ class MLATPipelineService:
         if not messages:
             return 0
 
+        count = self.message_store.add_messages(messages)
         if self.supabase.is_configured:
-            count = await asyncio.to_thread(self.supabase.batch_store_mode_s_messages, messages)
-        else:
-            self._local_messages.extend([msg.model_dump() for msg in messages])
-            count = len(messages)
+            with self.metrics.time("supabase_ingest"):
+                count = await self.supabase_pool.run(self.supabase.batch_store_mode_s_messages, messages)
         return count
 
     # ------------------------------------------------------------------
     # Processing
     # ------------------------------------------------------------------
     async def process_mlat(self, request: MLATProcessRequest) -> MLATProcessResponse:
+        self._refresh_load_mode()
+        await self._refresh_subscription_interest()
+        self._inflight += 1
+        started = time.perf_counter()
+        try:
+            with self.metrics.time("process"):
+                return await self._process_mlat(request)
+        finally:
+            self._inflight -= 1
+            self.governor.observe_latency((time.perf_counter() - started) * 1000)
+
+    async def _process_mlat(self, request: MLATProcessRequest) -> MLATProcessResponse:
         ingested = 0
         if request.messages:
             ingested = await self.ingest_messages(request.messages)
 
-        observations = await self._get_recent_observations(request.icaoAddress, request.timeWindowMs)
-        if len(observations) < self.min_sensors:
+        # Single flight: callers arriving while this ICAO is being solved share that result
+        key = request.icaoAddress.upper()
+        shared = self._inflight_solves.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self._locate(request.icaoAddress, request.timeWindowMs))
+            self._inflight_solves[key] = shared
+            shared.add_done_callback(lambda _: self._inflight_solves.pop(key, None))
+        else:
+            self._coalesced += 1
+        response = await asyncio.shield(shared)
+        return response.model_copy(update={"storedMessageCount": ingested})
+
+    async def _locate(self, icao_address: str, time_window_ms: int) -> MLATProcessResponse:
+        observations = await self._get_recent_observations(icao_address, time_window_ms)
+        reused = self._reusable_position(icao_address, observations)
+        if reused is not None:
             return MLATProcessResponse(
-                success=False,
-                message=f"Need at least {self.min_sensors} unique sensors, found {len(observations)}",
-                storedMessageCount=ingested,
+                success=True,
+                message="MLAT solution reused (sensor set unchanged)",
+                position=reused,
+                hederaSequenceNumber=reused.hederaSequenceNumber,
             )
 
-        solution = self.solver.solve_position(observations)
-        if not solution:
-            return MLATProcessResponse(
-                success=False,
-                message="Unable to solve MLAT for provided observations",
-                storedMessageCount=ingested,
+        position, failure = await self._solve(icao_address, observations)
+        if position is None:
+            return MLATProcessResponse(success=False, message=failure)
+
+        await self._persist_positions([(position, observations)])
+        await self._schedule_ai_analysis(position)
+
+        return MLATProcessResponse(
+            success=True,
+            message=self._success_message(position),
+            position=position,
+            hederaSequenceNumber=position.hederaSequenceNumber,
+        )
+
+    async def process_mlat_batch(self, request: MLATBatchProcessRequest) -> MLATBatchProcessResponse:
+        """Solve many aircraft with one observation fetch, one insert and packed HCS logs."""
+        self._refresh_load_mode()
+        await self._refresh_subscription_interest()
+        self._inflight += 1
+        started = time.perf_counter()
+        try:
+            with self.metrics.time("process_batch"):
+                return await self._process_mlat_batch(request)
+        finally:
+            self._inflight -= 1
+            self.governor.observe_latency((time.perf_counter() - started) * 1000)
+
+    async def _process_mlat_batch(self, request: MLATBatchProcessRequest) -> MLATBatchProcessResponse:
+        ingested = 0
+        if request.messages:
+            ingested = await self.ingest_messages(request.messages)
+
+        icao_addresses = list(dict.fromkeys(
+            request.icaoAddresses or [msg.icaoAddress for msg in request.messages or []]
+        ))
+        if not icao_addresses:
+            return MLATBatchProcessResponse(results=[], storedMessageCount=ingested)
+
+        observations_by_icao = await self._get_recent_observations_bulk(icao_addresses, request.timeWindowMs)
+
+        results: Dict[str, MLATBatchResult] = {}
+        for icao in icao_addresses:
+            reused = self._reusable_position(icao, observations_by_icao.get(icao, []))
+            if reused is not None:
+                results[icao] = MLATBatchResult(
+                    icaoAddress=reused.icaoAddress,
+                    success=True,
+                    message="MLAT solution reused (sensor set unchanged)",
+                    position=reused,
+                    hederaSequenceNumber=reused.hederaSequenceNumber,
+                )
+
+        to_solve = [icao for icao in icao_addresses if icao not in results]
+        solved = await asyncio.gather(*(
+            self._solve(icao, observations_by_icao.get(icao, [])) for icao in to_solve
+        ))
+
+        positions: List[Tuple[str, AircraftPosition, List[Dict]]] = []
+        for icao, (position, failure) in zip(to_solve, solved):
+            if position is None:
+                results[icao] = MLATBatchResult(icaoAddress=icao.upper(), success=False, message=failure)
+            else:
+                positions.append((icao, position, observations_by_icao[icao]))
+
+        await self._persist_positions([(position, observations) for _, position, observations in positions])
+
+        for icao, position, _ in positions:
+            await self._schedule_ai_analysis(position)
+            results[icao] = MLATBatchResult(
+                icaoAddress=position.icaoAddress,
+                success=True,
+                message=self._success_message(position),
+                position=position,
+                hederaSequenceNumber=position.hederaSequenceNumber,
             )
 
-        calculated_at = datetime.now(timezone.utc).isoformat()
+        return MLATBatchProcessResponse(
+            results=[results[icao] for icao in icao_addresses],
+            storedMessageCount=ingested,
+            solvedCount=len(positions),
+        )
+
+    # ------------------------------------------------------------------
+    # Stages (the background runtime runs these on separate worker pools)
+    # ------------------------------------------------------------------
+    def correlate(self, icao_addresses: List[str], time_window_ms: int) -> List[Tuple[str, List[Dict]]]:
+        """Aircraft with enough sensors in the in-memory window that are not solved or being solved."""
+        ready = []
+        for icao in dict.fromkeys(icao.upper() for icao in icao_addresses):
+            if icao in self._inflight_solves:
+                self._coalesced += 1
+                continue
+            observations = self.message_store.recent_observations(icao, time_window_ms)
+            if not self._has_enough_sensors(observations):
+                continue
+            if self._reusable_position(icao, observations) is not None:
+                continue  # solved moments ago from the same sensors
+            ready.append((icao, observations))
+        return ready
+
+    async def solve_batch(self, items: List[Tuple[str, List[Dict]]]) -> List[Tuple[AircraftPosition, List[Dict]]]:
+        """
+        Solve correlated aircraft under the same single flight as ``process_mlat``.
+
+        An aircraft a request is already solving is left to that request, which
+        also persists it; requests arriving meanwhile share this solve instead.
+        """
+        self._refresh_load_mode()
+        await self._refresh_subscription_interest()
+        self._inflight += 1
+        started = time.perf_counter()
+        try:
+            with self.metrics.time("solve_batch"):
+                solved = await asyncio.gather(*(self._solve_once(icao, observations) for icao, observations in items))
+        finally:
+            self._inflight -= 1
+            self.governor.observe_latency((time.perf_counter() - started) * 1000)
+        return [
+            (position, observations)
+            for (_, observations), position in zip(items, solved)
+            if position is not None
+        ]
+
+    async def _solve_once(self, icao_address: str, observations: List[Dict]) -> Optional[AircraftPosition]:
+        key = icao_address.upper()
+        if key in self._inflight_solves:
+            self._coalesced += 1
+            return None
+
+        async def _solve_response() -> MLATProcessResponse:
+            position, failure = await self._solve(icao_address, observations)
+            if position is None:
+                return MLATProcessResponse(success=False, message=failure)
+            return MLATProcessResponse(success=True, message=self._success_message(position), position=position)
+
+        shared = asyncio.ensure_future(_solve_response())
+        self._inflight_solves[key] = shared
+        shared.add_done_callback(lambda _: self._inflight_solves.pop(key, None))
+        response = await asyncio.shield(shared)
+        return response.position if response.success else None
+
+    async def store_positions(self, items: List[Tuple[AircraftPosition, List[Dict]]]) -> None:
+        """Store solved positions; with write-behind on, HCS logging happens behind the queue too."""
+        if not items:
+            return
+        if self.write_behind is not None:
+            await self._persist_positions(items)
+        elif self.supabase.is_configured:
+            with self.metrics.time("supabase_insert"):
+                await self.supabase_pool.run(
+                    self.supabase.batch_store_aircraft_positions, [position for position, _ in items]
+                )
+
+    async def notarize_stored(self, items: List[Tuple[AircraftPosition, List[Dict]]]) -> None:
+        """Log stored positions to HCS and record the sequence numbers on their rows."""
+        if not items or self.write_behind is not None or not self.hedera.client:
+            return
+        self._refresh_load_mode()
+        started = time.perf_counter()
+        await self._notarize_positions(items)
+        self.governor.observe_latency((time.perf_counter() - started) * 1000)
+        await self._record_sequences(items)
+
+    async def schedule_analysis(self, positions: List[AircraftPosition]) -> None:
+        for position in positions:
+            await self._schedule_ai_analysis(position)
+
+    # ------------------------------------------------------------------
+    # Pipeline steps
+    # ------------------------------------------------------------------
+    async def _solve(self, icao_address: str, observations: List[Dict]) -> Tuple[Optional[AircraftPosition], str]:
+        """Solve one aircraft; returns the position or ``None`` with a failure message."""
+        if len(observations) < self.min_sensors:
+            self.metrics.count("solve", "insufficient_sensors")
+            return None, f"Need at least {self.min_sensors} unique sensors, found {len(observations)}"
+
+        subscribers = sum(
+            self._subscribed_sensors.get(str(sensor_id), 0)
+            for sensor_id in {obs["sensor_id"] for obs in observations}
+        )
+        with self.metrics.time("solve") as timer:
+            try:
+                solution = await self.scheduler.run(
+                    icao_address,
+                    lambda: self.solver_pool.run(self.solver.solve_position, observations),
+                    subscribers=subscribers,
+                )
+            except ExecutorSaturatedError:
+                timer.fail("saturated")
+                return None, "MLAT solver is saturated, retry shortly"
+            if not solution:
+                timer.fail("no_solution")
+                return None, "Unable to solve MLAT for provided observations"
+        self.scheduler.mark_solved(icao_address)
+
         position = AircraftPosition(
-            icaoAddress=request.icaoAddress.upper(),
+            icaoAddress=icao_address.upper(),
             latitude=solution["latitude"],
             longitude=solution["longitude"],
             altitudeFt=None,
             confidenceScore=solution["confidence_score"],
             sensorCount=solution["sensor_count"],
             calculationMethod="TDOA",
-            calculatedAt=calculated_at,
+            calculatedAt=datetime.now(timezone.utc).isoformat(),
         )
-
-        hedera_sequence = None
-        token_id = None
-        
+        self._remember_solution(position, observations)
+        self.track_store.add(position)
         if self.hedera.client:
-            # Enhanced Hedera log payload with sensor IDs and metadata
-            sensor_ids = [obs["sensor_id"] for obs in observations]
-            log_payload = {
-                "type": "mlat_position",
-                "icao": position.icaoAddress,
-                "latitude": position.latitude,
-                "longitude": position.longitude,
-                "altitude_ft": position.altitudeFt,
-                "confidence": position.confidenceScore,
-                "sensor_count": position.sensorCount,
-                "sensor_ids": sensor_ids,
-                "calculation_method": position.calculationMethod,
-                "timestamp": calculated_at,
+            # Positions after the session's mint carry its token; earlier rows are back-filled
+            position.flightTrackTokenId = self.ftt_minter.observe(position).token_id
+        return position, ""
+
+    @staticmethod
+    def _sensor_set(observations: List[Dict]) -> FrozenSet[str]:
+        return frozenset(str(obs["sensor_id"]) for obs in observations)
+
+    def _reusable_position(self, icao_address: str, observations: List[Dict]) -> Optional[AircraftPosition]:
+        """Last position if it is younger than the re-solve interval and the sensor set is unchanged."""
+        last = self._last_solutions.get(icao_address.upper())
+        if last is None:
+            return None
+        solved_at, sensors, position = last
+        if time.monotonic() - solved_at >= self.min_resolve_interval_s or sensors != self._sensor_set(observations):
+            return None
+        self._reused += 1
+        return position
+
+    def _remember_solution(self, position: AircraftPosition, observations: List[Dict]) -> None:
+        if self.min_resolve_interval_s <= 0:
+            return
+        now = time.monotonic()
+        self._last_solutions[position.icaoAddress] = (now, self._sensor_set(observations), position)
+        if len(self._last_solutions) > 4096:
+            self._last_solutions = {
+                icao: entry for icao, entry in self._last_solutions.items()
+                if now - entry[0] < self.min_resolve_interval_s
             }
-            hedera_sequence = await self.hedera.log_evaluation(log_payload)
-            position.hederaSequenceNumber = hedera_sequence
-            
-            # Mint Flight Track Token for high-confidence positions
-            if position.confidenceScore >= 90 and position.sensorCount >= 4:
-                try:
-                    token_id = await self.hedera.mint_skill_token(
-                        user_id=os.getenv("HEDERA_OPERATOR_ID", "0.0.0"),
-                        skill_worth=int(position.confidenceScore)
+
+    def _hcs_payload(self, position: AircraftPosition, observations: List[Dict]) -> Dict[str, Any]:
+        """Hedera log payload with sensor IDs and solution metadata."""
+        return {
+            "type": "mlat_position",
+            "icao": position.icaoAddress,
+            "latitude": position.latitude,
+            "longitude": position.longitude,
+            "altitude_ft": position.altitudeFt,
+            "confidence": position.confidenceScore,
+            "sensor_count": position.sensorCount,
+            "sensor_ids": [obs["sensor_id"] for obs in observations],
+            "calculation_method": position.calculationMethod,
+            "timestamp": position.calculatedAt,
+        }
+
+    async def _persist_positions(self, items: List[Tuple[AircraftPosition, List[Dict]]]) -> None:
+        """Hand positions to the write-behind queue, or log and store them inline when it is disabled."""
+        if not items:
+            return
+        if self.write_behind is not None:
+            for position, observations in items:
+                notarize = bool(self.hedera.client) and self._should_notarize(position)
+                self.write_behind.enqueue({
+                    "position": position.model_dump(mode="json"),
+                    "hcs": self._hcs_payload(position, observations) if notarize else None,
+                })
+            return
+
+        await self._notarize_positions(items)
+        if not self.supabase.is_configured:
+            return
+        with self.metrics.time("supabase_insert"):
+            if len(items) == 1:
+                await self.supabase_pool.run(self.supabase.store_aircraft_position, items[0][0])
+            else:
+                await self.supabase_pool.run(self.supabase.batch_store_aircraft_positions, [position for position, _ in items])
+
+    async def _flush_write_behind(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Write one write-behind batch: submit HCS logs, insert the rows, then collect receipts.
+
+        Receipts are applied to the stored rows in the background. If the insert
+        fails, the batch waits for its receipts first so the sequence numbers are
+        spooled with the records and a replay does not log twice.
+
+        Each record is marked ``hcs_sent`` before its payload is handed to HCS. A
+        flush cut short by its timeout may already have posted the message without
+        learning its sequence number, so a replay stores such a row without logging
+        it again and counts it under ``hcs_unconfirmed``.
+        """
+        positions = [AircraftPosition(**record["position"]) for record in records]
+        unlogged: List[Tuple[AircraftPosition, Dict[str, Any]]] = []
+        receipts: List[asyncio.Future] = []
+        try:
+            if self.hedera.client:
+                pending = [
+                    (position, record)
+                    for position, record in zip(positions, records)
+                    if record.get("hcs") and position.hederaSequenceNumber is None
+                ]
+                unconfirmed = sum(1 for _, record in pending if record.get("hcs_sent"))
+                if unconfirmed:
+                    self._hcs_unconfirmed += unconfirmed
+                    logger.warning("Not re-logging %d positions whose earlier HCS submit never confirmed", unconfirmed)
+                pending = [(position, record) for position, record in pending if not record.get("hcs_sent")]
+                unlogged = [(position, record["hcs"]) for position, record in pending]
+                if unlogged and not self.governor.allows_hcs:
+                    # Queued for the deferred drain once the rows have ids
+                    self.governor.record_shed("hcs_deferred", len(unlogged))
+                elif unlogged:
+                    for _, record in pending:
+                        record["hcs_sent"] = True
+                    receipts = await self._submit_payloads(unlogged)
+
+            if self.supabase.is_configured:
+                with self.metrics.time("supabase_insert"):
+                    await self.supabase_pool.run(self.supabase.batch_store_aircraft_positions, positions)
+        except BaseException:
+            if receipts:
+                await self._await_receipts(unlogged, receipts)
+            raise
+        finally:
+            for record, position in zip(records, positions):
+                record["position"] = position.model_dump(mode="json")
+
+        if receipts:
+            task = asyncio.create_task(self._apply_receipts(unlogged, receipts))
+            self._receipt_tasks.add(task)
+            task.add_done_callback(self._receipt_tasks.discard)
+        elif unlogged:
+            self._defer_hcs(unlogged)
+
+    def _defer_hcs(self, items: List[Tuple[AircraftPosition, Dict[str, Any]]]) -> None:
+        for item in items:
+            if len(self._deferred_hcs) == self._deferred_hcs.maxlen:
+                self.governor.record_shed("hcs_dropped")
+            self._deferred_hcs.append(item)
+
+    async def _apply_receipts(
+        self, items: List[Tuple[AircraftPosition, Dict[str, Any]]], receipts: List[asyncio.Future]
+    ) -> None:
+        """Map receipt sequence numbers back to stored rows; failed messages go to the deferred drain."""
+        failed, _ = await self._await_receipts(items, receipts)
+        await self._record_sequences([item for item in items if not any(item is miss for miss in failed)])
+        if failed:
+            self._defer_hcs(failed)
+
+    async def _record_sequences(self, items: List[Tuple[AircraftPosition, Any]]) -> None:
+        """Write HCS topic and sequence numbers onto already stored rows, one update per message."""
+        if not self.supabase.is_configured:
+            return
+        by_message: Dict[Tuple[Optional[str], int], List[str]] = {}
+        for position, _ in items:
+            if position.id and position.hederaSequenceNumber is not None:
+                by_message.setdefault((position.hederaTopicId, position.hederaSequenceNumber), []).append(position.id)
+        for (topic_id, sequence), position_ids in by_message.items():
+            try:
+                with self.metrics.time("supabase_update"):
+                    await self.supabase_pool.run(
+                        self.supabase.update_position_sequence, position_ids, sequence, topic_id
                     )
-                    position.flightTrackTokenId = token_id
-                except Exception as e:
-                    import logging
-                    logging.warning(f"Failed to mint Flight Track Token: {e}")
+            except Exception as e:
+                logger.warning(f"Failed to record HCS sequence {sequence}: {e}")
+
+    async def _notarize_positions(self, items: List[Tuple[AircraftPosition, List[Dict]]]) -> None:
+        """Log positions to HCS, deferring the logs while the governor sheds HCS work."""
+        if not items or not self.hedera.client:
+            return
+        items = [item for item in items if self._should_notarize(item[0])]
+        if not items:
+            return
+
+        if not self.governor.allows_hcs:
+            self._defer_hcs([(position, self._hcs_payload(position, observations)) for position, observations in items])
+            self.governor.record_shed("hcs_deferred", len(items))
+        elif len(items) == 1 and self.merkle_notary is None:
+            position, observations = items[0]
+            position.hederaTopicId = self._topic_for(position)
+            position.hederaSequenceNumber = await self._log_hcs(
+                self._hcs_payload(position, observations), position.hederaTopicId
+            )
+        else:
+            await self._log_positions_bulk(items)
+
+    def _should_notarize(self, position: AircraftPosition) -> bool:
+        # A Merkle leaf costs no HCS message, and proofs must cover every stored position
+        return self.merkle_notary is not None or self.notarization_policy.should_notarize(position)
+
+    async def _log_positions_bulk(self, positions: List[Tuple[AircraftPosition, List[Dict]]]) -> None:
+        """Pack positions into shared HCS messages and submit the messages concurrently."""
+        await self._log_payloads([
+            (position, self._hcs_payload(position, observations)) for position, observations in positions
+        ])
+
+    async def _log_payloads(self, items: List[Tuple[AircraftPosition, Dict[str, Any]]]) -> None:
+        """Submit packed HCS messages; messages that succeed keep their sequence even if another fails."""
+        receipts = await self._submit_payloads(items)
+        _, error = await self._await_receipts(items, receipts)
+        if error is not None:
+            raise error
+
+    def _topic_for(self, position: AircraftPosition) -> Optional[str]:
+        """HCS topic a position is logged to, or whose Merkle window it joins."""
+        return self.hedera.topics.topic_for(position.icaoAddress, position.longitude)
+
+    async def _submit_payloads(
+        self, items: List[Tuple[AircraftPosition, Dict[str, Any]]], deferred: bool = False
+    ) -> List[asyncio.Future]:
+        """Hand payloads to HCS without waiting for consensus; returns one sequence future per item."""
+        for position, _ in items:
+            position.hederaTopicId = self._topic_for(position)
+        if self.merkle_notary is not None:
+            return [
+                asyncio.ensure_future(
+                    self.merkle_notary.add(self._proof_key(payload), payload, position.hederaTopicId)
+                )
+                for position, payload in items
+            ]
+
+        # Pack per topic; the topics' submission lanes run in parallel
+        by_topic: Dict[Optional[str], List[int]] = {}
+        for idx, (position, _) in enumerate(items):
+            by_topic.setdefault(position.hederaTopicId, []).append(idx)
+        groups: List[List[int]] = []
+        for indexes in by_topic.values():
+            groups.extend(
+                [indexes[i] for i in group]
+                for group in hcs_codec.split_positions(
+                    [items[idx][1] for idx in indexes],
+                    max_bytes=self.hcs_message_bytes,
+                    max_positions=self.hcs_batch_size,
+                )
+            )
+        messages = []
+        for group in groups:
+            message: Dict[str, Any] = {"type": "mlat_position_batch", "positions": [items[idx][1] for idx in group]}
+            if deferred:
+                message["deferred"] = True
+            messages.append(message)
+        submitted = await asyncio.gather(
+            *(
+                self._submit_hcs(message, items[group[0]][0].hederaTopicId)
+                for group, message in zip(groups, messages)
+            ),
+            return_exceptions=True,
+        )
+        receipts: List[asyncio.Future] = [None] * len(items)  # type: ignore[list-item]
+        for group, receipt in zip(groups, submitted):
+            if isinstance(receipt, BaseException):
+                error, receipt = receipt, asyncio.get_running_loop().create_future()
+                receipt.set_exception(error)
+            for idx in group:
+                receipts[idx] = receipt
+        return receipts
+
+    @staticmethod
+    async def _await_receipts(
+        items: List[Tuple[AircraftPosition, Dict[str, Any]]], receipts: List[asyncio.Future]
+    ) -> Tuple[List[Tuple[AircraftPosition, Dict[str, Any]]], Optional[BaseException]]:
+        """Copy sequence numbers onto positions; returns the items that failed and the first error."""
+        sequences = await asyncio.gather(*receipts, return_exceptions=True)
+        failed = []
+        error: Optional[BaseException] = None
+        for item, sequence in zip(items, sequences):
+            if isinstance(sequence, BaseException):
+                failed.append(item)
+                error = error or sequence
+            else:
+                item[0].hederaSequenceNumber = sequence
+        return failed, error
+
+    @staticmethod
+    def _proof_key(payload: Dict[str, Any]) -> str:
+        return f"{str(payload['icao']).upper()}|{payload['timestamp']}"
+
+    async def position_proof(self, icao_address: str, calculated_at: str) -> Optional[Dict[str, Any]]:
+        """Merkle inclusion proof for a notarized position, from memory or the stored window."""
+        if self.merkle_notary is None:
+            return None
+        return await self.merkle_notary.proof(self._proof_key({"icao": icao_address, "timestamp": calculated_at}))
+
+    async def _store_merkle_window(self, root: Dict[str, Any], leaves: List[Dict[str, Any]]) -> None:
+        if not self.supabase.is_configured:
+            return
+        with self.metrics.time("supabase_insert"):
+            await self.supabase_pool.run(self.supabase.store_merkle_window, root, leaves)
+
+    async def _load_merkle_window(self, proof_key: str) -> Optional[Dict[str, Any]]:
+        if not self.supabase.is_configured:
+            return None
+        return await self.supabase_pool.run(self.supabase.fetch_merkle_window, proof_key)
+
+    async def _submit_hcs(self, payload: Dict[str, Any], topic_id: Optional[str] = None) -> asyncio.Future:
+        """Submit one HCS message through the in-flight window; the future resolves on receipt."""
+        started = time.perf_counter()
+
+        def _observe(outcome: str) -> None:
+            self.metrics.observe("hedera_receipt", time.perf_counter() - started, outcome)
+
+        try:
+            receipt = await self.hcs_submitter.submit(payload, topic_id)
+        except Exception as exc:
+            _observe(type(exc).__name__)
+            raise
+        receipt.add_done_callback(
+            lambda done: _observe("cancelled" if done.cancelled() else type(done.exception()).__name__ if done.exception() else "success")
+        )
+        return receipt
+
+    async def _log_hcs(self, payload: Dict[str, Any], topic_id: Optional[str] = None) -> Optional[int]:
+        """Submit one HCS message and wait for its receipt."""
+        return await (await self._submit_hcs(payload, topic_id))
+
+    async def _mint_flight_track_tokens(self, amount: int) -> str:
+        """Mint ``amount`` Flight Track Token units for a batch of track sessions."""
+        with self.metrics.time("hedera_mint"):
+            return await self.hedera.mint_skill_token(
+                user_id=os.getenv("HEDERA_OPERATOR_ID", "0.0.0"),
+                skill_worth=amount,
+            )
+
+    async def _record_minted_sessions(self, sessions: List[TrackSession]) -> None:
+        """Back-fill the token on positions stored before their session was minted."""
+        for session in sessions:
+            for position in self.track_store.recent(session.icao):
+                if position.flightTrackTokenId is None:
+                    position.flightTrackTokenId = session.token_id
+        if not self.supabase.is_configured:
+            return
+        for session in sessions:
+            if session.started_at is None:
+                continue
+            with self.metrics.time("supabase_update"):
+                await self.supabase_pool.run(
+                    self.supabase.update_track_token, session.icao, session.started_at, session.token_id
+                )
+
+    async def _schedule_ai_analysis(self, position: AircraftPosition) -> None:
+        """Hand the position to the AI dispatcher; never blocks the MLAT pipeline."""
+        if not self.governor.allows_ai:
+            self.governor.record_shed("ai")
+            return
+        self.ai_dispatcher.submit(position.icaoAddress, position)
+
+    async def _analyse_track(self, icao: str, position: AircraftPosition) -> None:
+        """Run the Groq threat assessment for the latest position and store it with the track."""
+        recent_track = await self.recent_track(icao, limit=8) or [position]
+        track = [
+            {
+                "lat": p.latitude,
+                "lon": p.longitude,
+                "alt_ft": p.altitudeFt,
+                "confidence": p.confidenceScore / 100,
+                "timestamp_iso": p.calculatedAt or datetime.now(timezone.utc).isoformat(),
+            }
+            for p in recent_track
+        ]
+        request = ThreatRequest(
+            icao=icao,
+            has_adsb=False,  # ADS-B status is not tracked by the MLAT pipeline
+            sensor_count=position.sensorCount or 0,
+            track=track,
+        )
+
+        with self.metrics.time("ai_analysis"):
+            result = await get_executor(GROQ).run(assess_track, request, get_groq())
 
         if self.supabase.is_configured:
-            await asyncio.to_thread(self.supabase.store_aircraft_position, position)
+            with self.metrics.time("supabase_ai_update"):
+                await self.supabase_pool.run(
+                    self.supabase.update_aircraft_position_ai,
+                    icao,
+                    result.threat_level,
+                    result.summary,
+                    result.tags,
+                )
+
+    # ------------------------------------------------------------------
+    # Scheduling interest
+    # ------------------------------------------------------------------
+    def set_viewer_interest(self, viewers: Dict[str, int]) -> None:
+        self.scheduler.set_viewers(viewers)
+
+    def set_subscribed_sensors(self, counts: Dict[str, int]) -> None:
+        self._subscribed_sensors = dict(counts)
+
+    async def _refresh_subscription_interest(self) -> None:
+        if not self.supabase.is_configured:
+            return
+        now = time.monotonic()
+        if now - self._subscriptions_refreshed_at < self.subscription_refresh_s:
+            return
+        self._subscriptions_refreshed_at = now
+        try:
+            counts = await self.supabase_pool.run(self.supabase.fetch_subscribed_sensor_counts)
+        except Exception as e:
+            logger.warning(f"Failed to refresh subscription interest: {e}")
+            return
+        self.set_subscribed_sensors(counts)
+
+    # ------------------------------------------------------------------
+    # Load shedding
+    # ------------------------------------------------------------------
+    def _refresh_load_mode(self) -> None:
+        depth = self.solver_pool.queued + self._inflight + sum(source() for source in self.queue_depth_sources)
+        self.governor.update(depth)
+        if self.governor.allows_hcs and self._deferred_hcs and (self._drain_task is None or self._drain_task.done()):
+            self._drain_task = asyncio.create_task(self._drain_deferred_hcs())
 
-        # Trigger AI analysis in background (fire-and-forget)
-        recent_track = await self._get_recent_track_for_ai(position.icaoAddress)
-        asyncio.create_task(self._trigger_ai_analysis(position.icaoAddress, position, recent_track))
+    async def _drain_deferred_hcs(self) -> None:
+        """Submit spooled HCS logs in order once the governor allows HCS again."""
+        while self._deferred_hcs and self.governor.allows_hcs:
+            chunk = [self._deferred_hcs.popleft() for _ in range(min(self.hcs_batch_size, len(self._deferred_hcs)))]
+            failed, error = await self._await_receipts(chunk, await self._submit_payloads(chunk, deferred=True))
+            logged = [item for item in chunk if not any(item is miss for miss in failed)]
+            self._deferred_drained += len(logged)
+            await self._record_sequences(logged)
+            if error is not None:
+                self._deferred_hcs.extendleft(reversed(failed))
+                logger.warning(f"Deferred HCS drain failed, will retry: {error}")
+                return
 
+    def _success_message(self, position: AircraftPosition) -> str:
         message = "MLAT solution computed"
         if position.confidenceScore < self.confidence_threshold:
             message += f" (confidence below threshold {self.confidence_threshold}%)"
-
-        return MLATProcessResponse(
-            success=True,
-            message=message,
-            position=position,
-            storedMessageCount=ingested,
-            hederaSequenceNumber=hedera_sequence,
-        )
+        return message
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
-    async def _get_recent_observations(self, icao_address: str, time_window_ms: int) -> List[Dict]:
-        if self.supabase.is_configured:
-            rows = await asyncio.to_thread(self.supabase.fetch_recent_messages, icao_address, time_window_ms)
-            return [
-                {
-                    "sensor_id": row.get("sensor_id"),
-                    "latitude": row.get("sensor_lat"),
-                    "longitude": row.get("sensor_lon"),
-                    "timestamp_ns": row.get("timestamp_ns"),
-                    "altitude_m": row.get("sensor_alt_m"),
-                }
-                for row in rows
-                if row.get("sensor_lat") is not None and row.get("sensor_lon") is not None
-            ]
-
-        # Local fallback storage
-        filtered = [
-            row
-            for row in self._local_messages
-            if row["icaoAddress"].lower() == icao_address.lower()
-        ]
-        if not filtered:
-            return []
+    @staticmethod
+    def _position_from_row(row: Dict[str, Any]) -> AircraftPosition:
+        return AircraftPosition(
+            id=str(row["id"]) if row.get("id") is not None else None,
+            icaoAddress=row.get("icao_address") or "",
+            latitude=row["latitude"],
+            longitude=row["longitude"],
+            altitudeFt=row.get("altitude_ft"),
+            confidenceScore=row.get("confidence_score") or 0,
+            sensorCount=row.get("sensor_count") or 0,
+            calculationMethod=row.get("calculation_method") or "TDOA",
+            hederaSequenceNumber=row.get("hedera_sequence_number"),
+            flightTrackTokenId=row.get("flight_track_token_id"),
+            calculatedAt=row.get("calculated_at"),
+        )
 
+    @staticmethod
+    def _observations_from_rows(rows: Iterable[Dict]) -> List[Dict]:
         return [
             {
                 "sensor_id": row.get("sensor_id"),
@@ -204,35 +909,102 @@ class MLATPipelineService:
                 "timestamp_ns": row.get("timestamp_ns"),
                 "altitude_m": row.get("sensor_alt_m"),
             }
-            for row in filtered[-50:]  # Last 50 messages
+            for row in rows
+            if row.get("sensor_lat") is not None and row.get("sensor_lon") is not None
         ]
 
-    async def _get_recent_track_for_ai(self, icao_address: str) -> List[Dict]:
-        """Get recent aircraft positions for AI analysis."""
-        if self.supabase.is_configured:
-            try:
-                rows = await asyncio.to_thread(
-                    self.supabase.fetch_recent_positions, 
-                    icao_address, 
-                    limit=8  # Last 8 positions for AI
+    def _has_enough_sensors(self, observations: List[Dict]) -> bool:
+        return len({obs["sensor_id"] for obs in observations}) >= self.min_sensors
+
+    async def _get_recent_observations(self, icao_address: str, time_window_ms: int) -> List[Dict]:
+        observations = self.message_store.recent_observations(icao_address, time_window_ms)
+        if self._has_enough_sensors(observations) or not self.supabase.is_configured:
+            return observations
+
+        # Not enough locally, e.g. messages ingested by another worker
+        with self.metrics.time("supabase_fetch"):
+            rows = await self.supabase_pool.run(self.supabase.fetch_recent_messages, icao_address, time_window_ms)
+        return self._observations_from_rows(rows)
+
+    async def _get_recent_observations_bulk(self, icao_addresses: List[str], time_window_ms: int) -> Dict[str, List[Dict]]:
+        observations = {
+            icao: self.message_store.recent_observations(icao, time_window_ms)
+            for icao in icao_addresses
+        }
+        missing = [icao for icao, rows in observations.items() if not self._has_enough_sensors(rows)]
+        if missing and self.supabase.is_configured:
+            with self.metrics.time("supabase_fetch"):
+                grouped = await self.supabase_pool.run(
+                    self.supabase.fetch_recent_messages_bulk, missing, time_window_ms
                 )
-                return [
-                    {
-                        "latitude": row.get("latitude"),
-                        "longitude": row.get("longitude"),
-                        "altitude_ft": row.get("altitude_ft"),
-                        "confidence_score": row.get("confidence_score"),
-                        "calculated_at": row.get("calculated_at"),
-                    }
-                    for row in rows
-                    if row.get("latitude") is not None and row.get("longitude") is not None
-                ]
-            except Exception:
-                return []
-        return []
+            for icao in missing:
+                observations[icao] = self._observations_from_rows(grouped.get(icao, []))
+        return observations
 
-    def health(self) -> Dict[str, bool]:
+    async def recent_track(self, icao_address: str, limit: int = 8) -> List[AircraftPosition]:
+        """Latest positions for an aircraft, oldest first; Supabase only for aircraft solved elsewhere."""
+        track = self.track_store.recent(icao_address, limit)
+        if track or not self.supabase.is_configured:
+            return track
+        try:
+            with self.metrics.time("track_fetch"):
+                rows = await self.supabase_pool.run(self.supabase.fetch_recent_positions, icao_address.upper(), limit=limit)
+        except Exception:
+            return []
+        return [
+            self._position_from_row(row)
+            for row in reversed(rows)  # newest first from Supabase
+            if row.get("latitude") is not None and row.get("longitude") is not None
+        ]
+
+    def health(self) -> Dict[str, Any]:
         return {
             "supabase": self.supabase.is_configured,
+            "supabase_pool": supabase_pool_stats(),
             "hedera": self.hedera.client is not None,
+            "solver_pool": self.solver_pool.stats(),
+            "executors": executor_stats(),
+            "message_store": self.message_store.stats(),
+            "track_store": self.track_store.stats(),
+            "scheduler": self.scheduler.stats(),
+            "coalescing": {
+                "in_flight": len(self._inflight_solves),
+                "coalesced_requests": self._coalesced,
+                "reused_solutions": self._reused,
+                "min_resolve_interval_ms": self.min_resolve_interval_s * 1000,
+            },
+            "notarization": self.notarization_policy.stats(),
+            "merkle": self.merkle_notary.stats() if self.merkle_notary is not None else None,
+            "hcs_submitter": self.hcs_submitter.stats(),
+            "hedera_client": get_hedera_provider().health(),
+            "hedera_limiter": self.hedera.limiter.stats(),
+            "hedera_simulator": self.hedera.simulator.stats() if self.hedera.simulator is not None else None,
+            "load_governor": {
+                **self.governor.stats(),
+                "deferred_hcs_pending": len(self._deferred_hcs),
+                "deferred_hcs_drained": self._deferred_drained,
+            },
+            "write_behind": (
+                {**self.write_behind.stats(), "hcs_unconfirmed": self._hcs_unconfirmed}
+                if self.write_behind is not None else None
+            ),
+            "ai_dispatcher": self.ai_dispatcher.stats(),
+            "ftt_minter": self.ftt_minter.stats(),
+            "stages": self.metrics.stats(),
         }
+
+
+_pipeline: Optional[MLATPipelineService] = None
+
+
+def get_pipeline_service() -> MLATPipelineService:
+    """Process-wide pipeline shared by the API routes and the background runtime."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = MLATPipelineService()
+    return _pipeline
+
+
+async def stop_pipeline_service() -> None:
+    if _pipeline is not None:
+        await _pipeline.stop()
@@ -0,0 +1,84 @@
+"""Decides which solved positions are worth an HCS notarization."""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from models import AircraftPosition
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance; plenty accurate for a movement threshold."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class NotarizationPolicy:
+    """
+    Skips HCS logs for fixes that barely differ from the aircraft's last notarized fix.
+
+    A position is notarized when it is the aircraft's first, when it moved at least
+    ``min_distance_m`` or its confidence changed by at least ``min_confidence_delta``
+    points since the last notarized fix, or when ``heartbeat_s`` seconds have passed
+    since then. Everything else is counted as avoided.
+    """
+
+    def __init__(
+        self,
+        min_distance_m: float = 50.0,
+        min_confidence_delta: float = 5.0,
+        heartbeat_s: float = 60.0,
+    ) -> None:
+        self.min_distance_m = min_distance_m
+        self.min_confidence_delta = min_confidence_delta
+        self.heartbeat_s = heartbeat_s
+        self._last: Dict[str, Tuple[float, float, float, float]] = {}
+        self.notarized: Dict[str, int] = {"first": 0, "moved": 0, "confidence": 0, "heartbeat": 0}
+        self.avoided = 0
+
+    def should_notarize(self, position: AircraftPosition, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        icao = position.icaoAddress.upper()
+        last = self._last.get(icao)
+
+        if last is None:
+            reason = "first"
+        else:
+            latitude, longitude, confidence, notarized_at = last
+            if _distance_m(latitude, longitude, position.latitude, position.longitude) >= self.min_distance_m:
+                reason = "moved"
+            elif abs(position.confidenceScore - confidence) >= self.min_confidence_delta:
+                reason = "confidence"
+            elif now - notarized_at >= self.heartbeat_s:
+                reason = "heartbeat"
+            else:
+                self.avoided += 1
+                return False
+
+        self.notarized[reason] += 1
+        self._last[icao] = (position.latitude, position.longitude, position.confidenceScore, now)
+        if len(self._last) > 4096:
+            # Aircraft past their heartbeat would be notarized next time anyway
+            self._last = {
+                key: entry for key, entry in self._last.items() if now - entry[3] < self.heartbeat_s
+            }
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        submitted = sum(self.notarized.values())
+        total = submitted + self.avoided
+        return {
+            "notarized": dict(self.notarized),
+            "avoided": self.avoided,
+            "avoided_ratio": round(self.avoided / total, 3) if total else 0.0,
+            "min_distance_m": self.min_distance_m,
+            "min_confidence_delta": self.min_confidence_delta,
+            "heartbeat_s": self.heartbeat_s,
+        }
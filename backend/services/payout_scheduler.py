@@ -0,0 +1,512 @@
+"""Periodic escrow payouts to sensor operators: netted per operator, chunked per transaction."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Hedera caps a CryptoTransfer at 10 HBAR account amounts (and 10 per token); one is the escrow debit
+HEDERA_MAX_TRANSFERS_PER_TX = 10
+
+HBAR = "HBAR"
+
+STATUS_CONFIRMED = "confirmed"
+STATUS_FAILED = "failed"
+STATUS_UNRECONCILED = "unreconciled"
+
+
+@dataclass
+class Earning:
+    """What one subscription owes the operator of the sensor it was bought from."""
+
+    source_id: str
+    operator_account: str
+    amount: int
+    token_id: str = HBAR
+
+
+@dataclass
+class PayoutLine:
+    operator_account: str
+    amount: int
+    source_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class PayoutBatch:
+    """One transfer transaction: the escrow debit plus up to ``max_transfers - 1`` operator credits."""
+
+    batch_id: str
+    period: str
+    token_id: str
+    lines: List[PayoutLine]
+    status: Optional[str] = None
+    transaction_id: Optional[str] = None
+    error: Optional[str] = None
+    earnings: Dict[str, Earning] = field(default_factory=dict, repr=False)
+    # Frozen SDK transaction from ``prepare``, submitted once by ``submit``
+    prepared: Any = field(default=None, repr=False)
+
+    @property
+    def total(self) -> int:
+        return sum(line.amount for line in self.lines)
+
+    @property
+    def source_ids(self) -> List[str]:
+        return [source_id for line in self.lines for source_id in line.source_ids]
+
+    def distributions(self) -> List[Dict[str, Any]]:
+        return [{"account_id": line.operator_account, "amount": line.amount} for line in self.lines]
+
+
+PrepareBatch = Callable[[PayoutBatch], Awaitable[str]]
+SubmitBatch = Callable[[PayoutBatch], Awaitable[Dict[str, Any]]]
+BatchCallback = Callable[[PayoutBatch], Awaitable[None]]
+FetchEarnings = Callable[[], Awaitable[List[Earning]]]
+FetchPending = Callable[[], Awaitable[Dict[str, List[Earning]]]]
+LookupTransaction = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def net_earnings(earnings: List[Earning]) -> Dict[str, List[PayoutLine]]:
+    """One line per operator and token, summing every earning (refunds are negative)."""
+    lines: Dict[str, Dict[str, PayoutLine]] = {}
+    for earning in earnings:
+        per_token = lines.setdefault(earning.token_id, {})
+        line = per_token.get(earning.operator_account)
+        if line is None:
+            line = per_token[earning.operator_account] = PayoutLine(earning.operator_account, 0)
+        line.amount += earning.amount
+        line.source_ids.append(earning.source_id)
+    return {
+        token_id: sorted(per_token.values(), key=lambda line: line.operator_account)
+        for token_id, per_token in lines.items()
+    }
+
+
+def chunk_lines(lines: List[PayoutLine], max_transfers: int = HEDERA_MAX_TRANSFERS_PER_TX) -> List[List[PayoutLine]]:
+    per_transaction = max(1, max_transfers - 1)
+    return [lines[start:start + per_transaction] for start in range(0, len(lines), per_transaction)]
+
+
+def valid_start_of(transaction_id: str) -> Optional[float]:
+    """Valid-start time (epoch seconds) encoded in ``0.0.x@secs.nanos``, if it parses."""
+    try:
+        return float(transaction_id.split("@", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+class PayoutScheduler:
+    """
+    Pays operators from escrow once per period instead of once per purchase.
+
+    Earnings accrue in a ledger keyed by source (subscription) ID, from ``accrue``
+    or ``fetch_earnings``. Each period nets them to one amount per operator and
+    token, carries amounts below ``min_payout`` forward, and chunks the rest into
+    transfer transactions of at most ``max_transfers_per_tx`` account amounts,
+    submitted ``max_concurrency`` at a time. Thousands of small purchases become
+    one credit per operator and a handful of transactions.
+
+    A value transfer is never paid twice. ``prepare`` freezes each batch's transfer,
+    which fixes its transaction ID; ``on_pending`` persists that ID on the batch's
+    sources *before* ``submit`` sends it, exactly once and without retries. A
+    success goes to ``on_settled``. Any other outcome (error, timeout, failed
+    receipt) leaves the batch held under its transaction ID until ``lookup`` finds
+    it on the mirror node: ``SUCCESS`` settles it; a failed result, or no record
+    ``expiry_grace_s`` after the transaction's validity window closed (so it can
+    never reach consensus), hands it to ``on_released`` and back to the ledger.
+    ``fetch_pending`` reloads held batches from storage, so a restart resumes
+    reconciling them instead of paying their sources again.
+    """
+
+    def __init__(
+        self,
+        prepare: PrepareBatch,
+        submit: SubmitBatch,
+        fetch_earnings: Optional[FetchEarnings] = None,
+        on_pending: Optional[BatchCallback] = None,
+        on_settled: Optional[BatchCallback] = None,
+        on_released: Optional[BatchCallback] = None,
+        fetch_pending: Optional[FetchPending] = None,
+        lookup: Optional[LookupTransaction] = None,
+        period_s: float = 86400.0,
+        max_transfers_per_tx: int = HEDERA_MAX_TRANSFERS_PER_TX,
+        max_concurrency: int = 4,
+        min_payout: int = 1,
+        valid_duration_s: float = 120.0,
+        expiry_grace_s: float = 300.0,
+        settled_memory: int = 100000,
+    ) -> None:
+        self.prepare = prepare
+        self.submit = submit
+        self.fetch_earnings = fetch_earnings
+        self.on_pending = on_pending
+        self.on_settled = on_settled
+        self.on_released = on_released
+        self.fetch_pending = fetch_pending
+        self.lookup = lookup
+        self.period_s = period_s
+        self.max_transfers_per_tx = max(2, max_transfers_per_tx)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_payout = max(1, min_payout)
+        self.valid_duration_s = valid_duration_s
+        self.expiry_grace_s = expiry_grace_s
+        self._ledger: Dict[str, Earning] = {}
+        self._unreconciled: Dict[str, PayoutBatch] = {}
+        self._held: Set[str] = set()
+        # Sources paid recently, so a fetch racing the "paid" write cannot pay them again
+        self._settled: Set[str] = set()
+        self._settled_order: Deque[str] = deque()
+        self._settled_memory = settled_memory
+        self._batch_ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._recovered = False
+        self.periods = 0
+        self.batches_confirmed = 0
+        self.batches_failed = 0
+        self.batches_recovered = 0
+        self.earnings_settled = 0
+        self.amount_paid: Dict[str, int] = {}
+        self.last_period: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # Ledger
+    # ------------------------------------------------------------------
+    def accrue(self, earning: Earning) -> bool:
+        """Add an earning unless it is already accrued, being paid, or paid."""
+        source_id = earning.source_id
+        if source_id in self._settled or source_id in self._ledger or source_id in self._held:
+            return False
+        self._ledger[source_id] = earning
+        return True
+
+    def _hold(self, batch: PayoutBatch) -> None:
+        batch.status = STATUS_UNRECONCILED
+        self._unreconciled[batch.transaction_id] = batch
+        self._held.update(batch.earnings)
+
+    async def _release(self, batch: PayoutBatch, reason: str) -> None:
+        """Return a batch that was certainly not paid to the ledger, for the next period."""
+        batch.status = STATUS_FAILED
+        batch.error = reason
+        self.batches_failed += 1
+        if batch.transaction_id is not None:
+            self._unreconciled.pop(batch.transaction_id, None)
+            if self.on_released is not None:
+                try:
+                    await self.on_released(batch)
+                except Exception as exc:
+                    # Still marked pending in storage; keep it held rather than risk paying twice
+                    logger.warning("Failed to release payout %s: %s", batch.transaction_id, exc)
+                    self._hold(batch)
+                    return
+        for source_id, earning in batch.earnings.items():
+            self._held.discard(source_id)
+            self._ledger.setdefault(source_id, earning)
+        logger.warning("Payout %s of %d %s not paid: %s", batch.batch_id, batch.total, batch.token_id, reason)
+
+    async def _settle(self, batch: PayoutBatch) -> None:
+        batch.status = STATUS_CONFIRMED
+        if batch.transaction_id is not None:
+            self._unreconciled.pop(batch.transaction_id, None)
+        self.batches_confirmed += 1
+        self.earnings_settled += len(batch.source_ids)
+        self.amount_paid[batch.token_id] = self.amount_paid.get(batch.token_id, 0) + batch.total
+        for source_id in batch.source_ids:
+            self._held.discard(source_id)
+            self._settled.add(source_id)
+            self._settled_order.append(source_id)
+        while len(self._settled_order) > self._settled_memory:
+            self._settled.discard(self._settled_order.popleft())
+        if self.on_settled is not None:
+            try:
+                await self.on_settled(batch)
+            except Exception as exc:
+                logger.warning("Failed to record payout %s (%s): %s", batch.batch_id, batch.transaction_id, exc)
+
+    async def recover(self) -> int:
+        """Hold the batches storage still marks pending, so they are reconciled and not paid again."""
+        if self.fetch_pending is None:
+            self._recovered = True
+            return 0
+        pending = await self.fetch_pending()
+        self._recovered = True
+        for transaction_id, earnings in pending.items():
+            if transaction_id in self._unreconciled:
+                continue
+            for earning in earnings:
+                self._ledger.pop(earning.source_id, None)
+            for token_id, lines in net_earnings(earnings).items():
+                batch = PayoutBatch(f"recovered-{next(self._batch_ids)}", "", token_id, lines)
+                batch.transaction_id = transaction_id
+                batch.earnings = {earning.source_id: earning for earning in earnings if earning.token_id == token_id}
+                self._hold(batch)
+            self.batches_recovered += 1
+        return len(pending)
+
+    # ------------------------------------------------------------------
+    # Periods
+    # ------------------------------------------------------------------
+    async def run_period(self) -> Dict[str, Any]:
+        """Reconcile earlier batches, pull new earnings, then net, chunk and pay them."""
+        async with self._lock:
+            period = datetime.now(timezone.utc).isoformat()
+            if not self._recovered:
+                try:
+                    await self.recover()
+                except Exception as exc:
+                    # Without knowing what is pending, paying anything could pay it twice
+                    logger.warning("Failed to load pending payouts; skipping this period: %s", exc)
+                    return {"period": period, "error": f"pending payouts unavailable: {exc}"}
+            reconciled = await self._reconcile_held()
+
+            fetched = 0
+            if self.fetch_earnings is not None:
+                try:
+                    fetched = sum(1 for earning in await self.fetch_earnings() if self.accrue(earning))
+                except Exception as exc:
+                    logger.warning("Failed to fetch operator earnings: %s", exc)
+
+            batches: List[PayoutBatch] = []
+            for token_id, lines in net_earnings(list(self._ledger.values())).items():
+                payable = [line for line in lines if line.amount >= self.min_payout]
+                for chunk in chunk_lines(payable, self.max_transfers_per_tx):
+                    batch = PayoutBatch(f"payout-{next(self._batch_ids)}", period, token_id, chunk)
+                    batch.earnings = {source_id: self._ledger[source_id] for source_id in batch.source_ids}
+                    batches.append(batch)
+            for batch in batches:
+                for source_id in batch.earnings:
+                    del self._ledger[source_id]
+                    self._held.add(source_id)
+
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def _pay(batch: PayoutBatch) -> None:
+                async with semaphore:
+                    await self._pay(batch)
+
+            await asyncio.gather(*(_pay(batch) for batch in batches))
+            self.periods += 1
+            self.last_period = {
+                "period": period,
+                "fetched_earnings": fetched,
+                "paid_earnings": sum(len(batch.source_ids) for batch in batches if batch.status == STATUS_CONFIRMED),
+                "carried_earnings": len(self._ledger),
+                "operators": sum(len(batch.lines) for batch in batches),
+                "transactions": len(batches),
+                "confirmed": sum(1 for batch in batches if batch.status == STATUS_CONFIRMED),
+                "failed": sum(1 for batch in batches if batch.status == STATUS_FAILED),
+                "unreconciled": sum(1 for batch in batches if batch.status == STATUS_UNRECONCILED),
+                "reconciled_from_earlier": reconciled,
+            }
+            return self.last_period
+
+    async def _pay(self, batch: PayoutBatch) -> None:
+        # Nothing has been sent until submit runs, so failures before it are safe to release
+        try:
+            batch.transaction_id = await self.prepare(batch)
+        except Exception as exc:
+            await self._release(batch, f"Failed to prepare transfer: {exc}")
+            return
+        try:
+            if self.on_pending is not None:
+                await self.on_pending(batch)
+        except Exception as exc:
+            # Never sent; releasing also clears whatever part of the pending write landed
+            await self._release(batch, f"Failed to record pending payout: {exc}")
+            return
+
+        self._hold(batch)
+        try:
+            result = await self.submit(batch)
+        except Exception as exc:
+            result = {"success": False, "error": str(exc)}
+        if result.get("success"):
+            await self._settle(batch)
+            return
+        # Outcome unknown until the mirror node says otherwise: it may have reached consensus
+        batch.error = result.get("error")
+        await self._reconcile(batch)
+
+    async def _reconcile_held(self) -> int:
+        held = list(self._unreconciled.values())
+        for batch in held:
+            await self._reconcile(batch)
+        return sum(1 for batch in held if batch.status != STATUS_UNRECONCILED)
+
+    async def _reconcile(self, batch: PayoutBatch, now: Optional[float] = None) -> None:
+        if self.lookup is None or batch.transaction_id is None:
+            return
+        try:
+            record = await self.lookup(batch.transaction_id)
+        except Exception as exc:
+            logger.warning("Payout %s still unreconciled: %s", batch.transaction_id, exc)
+            return
+        if record is not None:
+            if record.get("result") == "SUCCESS":
+                await self._settle(batch)
+            else:
+                await self._release(batch, f"Transaction failed with status: {record.get('result')}")
+            return
+        valid_start = valid_start_of(batch.transaction_id)
+        now = time.time() if now is None else now
+        if valid_start is not None and now > valid_start + self.valid_duration_s + self.expiry_grace_s:
+            await self._release(batch, "Transaction expired without reaching consensus")
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="payout-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            # Pick up payouts a previous run left pending before the first period is due
+            async with self._lock:
+                await self.recover()
+                await self._reconcile_held()
+        except Exception as exc:
+            logger.warning("Failed to reconcile pending payouts at startup: %s", exc)
+        while True:
+            await asyncio.sleep(self.period_s)
+            started = time.perf_counter()
+            try:
+                summary = await self.run_period()
+            except Exception as exc:
+                logger.warning("Payout period failed: %s", exc)
+                continue
+            if "error" in summary:
+                continue
+            logger.info(
+                "Paid %d earnings to %d operators in %d transactions (%.1fs)",
+                summary["paid_earnings"], summary["operators"], summary["transactions"],
+                time.perf_counter() - started,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "period_s": self.period_s,
+            "periods": self.periods,
+            "ledger_earnings": len(self._ledger),
+            "unreconciled_batches": len(self._unreconciled),
+            "recovered_batches": self.batches_recovered,
+            "batches_confirmed": self.batches_confirmed,
+            "batches_failed": self.batches_failed,
+            "earnings_settled": self.earnings_settled,
+            "amount_paid": dict(self.amount_paid),
+            "last_period": self.last_period,
+        }
+
+
+def build_payout_scheduler() -> PayoutScheduler:
+    """Scheduler paying from the marketplace escrow, with earnings and pending payouts in Supabase subscriptions."""
+    from decimal import Decimal
+
+    from services.executors import SUPABASE, get_executor
+    from services.hedera_marketplace_service import get_marketplace_hedera_service
+    from services.supabase_service import get_service_role_supabase
+    from services.transaction_verifier import get_transaction_verifier
+
+    hedera = get_marketplace_hedera_service()
+    supabase = get_service_role_supabase()
+    pool = get_executor(SUPABASE)
+    # Share of each purchase owed to the sensor operator, in basis points; the rest stays in escrow
+    operator_share_bps = int(os.getenv("PAYOUT_OPERATOR_SHARE_BPS", "10000"))
+
+    def _earning(row: Dict[str, Any]) -> Earning:
+        return Earning(
+            source_id=str(row["id"]),
+            operator_account=row["operator_account"],
+            amount=int(Decimal(str(row["total_amount"])) * operator_share_bps / 10000),
+            token_id=row.get("token_id") or HBAR,
+        )
+
+    async def fetch_earnings() -> List[Earning]:
+        if not supabase.is_configured:
+            return []
+        rows = await pool.run(supabase.fetch_unpaid_earnings)
+        return [_earning(row) for row in rows if row.get("operator_account")]
+
+    async def fetch_pending() -> Dict[str, List[Earning]]:
+        if not supabase.is_configured:
+            return {}
+        pending: Dict[str, List[Earning]] = {}
+        for row in await pool.run(supabase.fetch_pending_payouts):
+            pending.setdefault(row["payout_transaction_id"], []).append(_earning(row))
+        return pending
+
+    async def prepare(batch: PayoutBatch) -> str:
+        batch.prepared, transaction_id = await hedera.prepare_distribution(
+            distributions=batch.distributions(),
+            token_id=batch.token_id,
+            memo=f"Operator payout {batch.period[:10]} {batch.batch_id}",
+        )
+        return transaction_id
+
+    async def submit(batch: PayoutBatch) -> Dict[str, Any]:
+        return await hedera.submit_distribution(batch.prepared, batch.transaction_id)
+
+    async def on_pending(batch: PayoutBatch) -> None:
+        if supabase.is_configured:
+            await pool.run(supabase.mark_earnings_pending, batch.source_ids, batch.transaction_id)
+
+    async def on_settled(batch: PayoutBatch) -> None:
+        if supabase.is_configured:
+            await pool.run(supabase.mark_earnings_paid, batch.source_ids, batch.transaction_id)
+
+    async def on_released(batch: PayoutBatch) -> None:
+        if supabase.is_configured:
+            await pool.run(supabase.release_pending_earnings, batch.source_ids, batch.transaction_id)
+
+    verifier = get_transaction_verifier()
+    return PayoutScheduler(
+        prepare,
+        submit,
+        fetch_earnings=fetch_earnings,
+        on_pending=on_pending,
+        on_settled=on_settled,
+        on_released=on_released,
+        fetch_pending=fetch_pending,
+        lookup=verifier.lookup,
+        period_s=float(os.getenv("PAYOUT_PERIOD_S", "86400")),
+        max_transfers_per_tx=int(os.getenv("PAYOUT_MAX_TRANSFERS_PER_TX", str(HEDERA_MAX_TRANSFERS_PER_TX))),
+        max_concurrency=int(os.getenv("PAYOUT_CONCURRENCY", "4")),
+        min_payout=int(os.getenv("PAYOUT_MIN_AMOUNT", "1")),
+        expiry_grace_s=float(os.getenv("PAYOUT_EXPIRY_GRACE_S", "300")),
+    )
+
+
+_scheduler: Optional[PayoutScheduler] = None
+
+
+def get_payout_scheduler() -> PayoutScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = build_payout_scheduler()
+    return _scheduler
+
+
+def payout_scheduler_stats() -> Optional[Dict[str, Any]]:
+    return _scheduler.stats() if _scheduler is not None else None
+
+
+async def stop_payout_scheduler() -> None:
+    if _scheduler is not None:
+        await _scheduler.stop()
@@ -0,0 +1,308 @@
+"""Long-running staged MLAT pipeline fed by the Neuron buyer stream."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models import AircraftPosition, ModeSMessage
+from services.mlat_pipeline import MLATPipelineService
+from services.neuron_buyer import NeuronBuyerService
+
+logger = logging.getLogger(__name__)
+
+StageHandler = Callable[[List[Any]], Awaitable[List[Any]]]
+StageSource = Callable[[int], Awaitable[List[Any]]]
+SolvedPosition = Tuple[AircraftPosition, List[Dict]]
+
+
+@dataclass
+class StageConfig:
+    """Worker count and micro-batching for one stage."""
+
+    concurrency: int = 1
+    batch_size: int = 1
+    linger_ms: int = 0
+    queue_size: int = 256
+
+    @classmethod
+    def from_env(cls, stage: str, default: "StageConfig") -> "StageConfig":
+        prefix = f"MLAT_RUNTIME_{stage.upper()}_"
+        return cls(
+            concurrency=max(1, int(os.getenv(prefix + "CONCURRENCY", default.concurrency))),
+            batch_size=max(1, int(os.getenv(prefix + "BATCH_SIZE", default.batch_size))),
+            linger_ms=max(0, int(os.getenv(prefix + "LINGER_MS", default.linger_ms))),
+            queue_size=max(1, int(os.getenv(prefix + "QUEUE_SIZE", default.queue_size))),
+        )
+
+
+DEFAULT_STAGE_CONFIG: Dict[str, StageConfig] = {
+    "ingest": StageConfig(concurrency=1, batch_size=200),
+    "correlate": StageConfig(concurrency=1, batch_size=64, queue_size=1024),
+    "solve": StageConfig(concurrency=4, batch_size=1),
+    "persist": StageConfig(concurrency=1, batch_size=50, linger_ms=100),
+    "notarize": StageConfig(concurrency=2, batch_size=8, linger_ms=200),
+    "ai": StageConfig(concurrency=1, batch_size=16, linger_ms=50),
+}
+
+
+class PipelineStage:
+    """
+    A pool of workers that pulls micro-batches, runs a handler and forwards the results.
+
+    Items come either from the stage's own bounded queue or, for the first stage,
+    from ``source``. Forwarding blocks when the downstream queue is full, so
+    backpressure propagates all the way to the source.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: StageHandler,
+        config: StageConfig,
+        source: Optional[StageSource] = None,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.config = config
+        self.source = source
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_size)
+        self.downstream: Optional[PipelineStage] = None
+        self._tasks: List[asyncio.Task] = []
+        self._started_at = 0.0
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"mlat-{self.name}-{idx}")
+            for idx in range(self.config.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self, timeout_s: float) -> bool:
+        """Wait until every queued item has been handled and forwarded; False on timeout."""
+        if self.source is not None:
+            return True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def take_queued(self) -> List[Any]:
+        """Remove and return whatever is still waiting in the queue."""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return items
+            self.queue.task_done()
+
+    async def _next_batch(self) -> List[Any]:
+        if self.source is not None:
+            return await self.source(self.config.batch_size)
+
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.config.linger_ms / 1000
+        while len(batch) < self.config.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            self.items_in += len(batch)
+            self.batches += 1
+            try:
+                outputs = await self.handler(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.errors += 1
+                logger.warning("MLAT runtime stage %s failed on a batch of %d: %s", self.name, len(batch), exc)
+                self._done(batch)
+                continue
+            self.items_out += len(outputs)
+            if self.downstream is not None:
+                for item in outputs:
+                    await self.downstream.queue.put(item)
+            # Only now is the batch off our hands, so drain() also waits for the forwarding
+            self._done(batch)
+
+    def _done(self, batch: List[Any]) -> None:
+        if self.source is None:
+            for _ in batch:
+                self.queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "queue_depth": self.queue.qsize() if self.source is None else None,
+            "queue_capacity": self.config.queue_size if self.source is None else None,
+            "concurrency": self.config.concurrency,
+            "batch_size": self.config.batch_size,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "errors": self.errors,
+            "avg_batch_size": round(self.items_in / self.batches, 2) if self.batches else 0.0,
+            "throughput_per_s": round(self.items_in / uptime, 2) if uptime > 0 else 0.0,
+        }
+
+
+class MLATPipelineRuntime:
+    """Drains Neuron message batches through ingest → correlate → solve → persist → notarize → AI."""
+
+    def __init__(
+        self,
+        pipeline: MLATPipelineService,
+        buyer: NeuronBuyerService,
+        stage_config: Optional[Dict[str, StageConfig]] = None,
+    ) -> None:
+        self.pipeline = pipeline
+        self.buyer = buyer
+        self.time_window_ms = int(os.getenv("MLAT_RUNTIME_WINDOW_MS", "2000"))
+        config = {
+            name: StageConfig.from_env(name, default)
+            for name, default in DEFAULT_STAGE_CONFIG.items()
+        }
+        config.update(stage_config or {})
+
+        self.stages: Dict[str, PipelineStage] = {
+            "ingest": PipelineStage("ingest", self._ingest, config["ingest"], source=self._read_buyer),
+            "correlate": PipelineStage("correlate", self._correlate, config["correlate"]),
+            "solve": PipelineStage("solve", self._solve, config["solve"]),
+            "persist": PipelineStage("persist", self._persist, config["persist"]),
+            "notarize": PipelineStage("notarize", self._notarize, config["notarize"]),
+            "ai": PipelineStage("ai", self._analyse, config["ai"]),
+        }
+        ordered = list(self.stages.values())
+        for upstream, downstream in zip(ordered, ordered[1:]):
+            upstream.downstream = downstream
+        # Per stage, how long stop() waits for queued positions to work through before giving up on them
+        self.drain_timeout_s = float(os.getenv("MLAT_RUNTIME_DRAIN_TIMEOUT_S", "10"))
+        self._running = False
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        await self.buyer.start()
+        self.pipeline.queue_depth_sources.append(self.queued_items)
+        for stage in self.stages.values():
+            stage.start()
+        self._running = True
+        logger.info("MLAT pipeline runtime started")
+
+    async def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        # Stop from the source inwards, letting each stage finish its queue first so
+        # solved positions reach persistence instead of being lost on every redeploy
+        for stage in self.stages.values():
+            if not await stage.drain(self.drain_timeout_s):
+                await self._abandon(stage)
+            await stage.stop()
+        self.pipeline.queue_depth_sources.remove(self.queued_items)
+        await self.buyer.stop()
+        logger.info("MLAT pipeline runtime stopped")
+
+    async def _abandon(self, stage: PipelineStage) -> None:
+        """Hand a stage that did not drain in time over to the write-behind spool, or log what is lost."""
+        await stage.stop()
+        items = stage.take_queued()
+        if not items:
+            return
+        if stage.name == "persist" and self.pipeline.write_behind is not None:
+            # Enqueueing only; the pipeline's stop() flushes them or spools them to disk
+            await self.pipeline.store_positions(items)
+            logger.warning("MLAT runtime handed %d queued positions to the write-behind queue on stop", len(items))
+            return
+        logger.warning("MLAT runtime stage %s dropped %d queued items on stop", stage.name, len(items))
+
+    def queued_items(self) -> int:
+        return sum(stage.queue.qsize() for stage in self.stages.values())
+
+    # ------------------------------------------------------------------
+    # Stage handlers
+    # ------------------------------------------------------------------
+    async def _read_buyer(self, batch_size: int) -> List[ModeSMessage]:
+        return await self.buyer.get_messages(batch_size=batch_size, timeout=1.0)
+
+    async def _ingest(self, messages: List[ModeSMessage]) -> List[str]:
+        await self.pipeline.ingest_messages(messages)
+        return list(dict.fromkeys(message.icaoAddress.upper() for message in messages))
+
+    async def _correlate(self, icao_addresses: List[str]) -> List[Tuple[str, List[Dict]]]:
+        return self.pipeline.correlate(icao_addresses, self.time_window_ms)
+
+    async def _solve(self, items: List[Tuple[str, List[Dict]]]) -> List[SolvedPosition]:
+        return await self.pipeline.solve_batch(items)
+
+    async def _persist(self, items: List[SolvedPosition]) -> List[SolvedPosition]:
+        await self.pipeline.store_positions(items)
+        return items
+
+    async def _notarize(self, items: List[SolvedPosition]) -> List[SolvedPosition]:
+        await self.pipeline.notarize_stored(items)
+        return items
+
+    async def _analyse(self, items: List[SolvedPosition]) -> List[SolvedPosition]:
+        await self.pipeline.schedule_analysis([position for position, _ in items])
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "buyer": self.buyer.health(),
+            "stages": {name: stage.stats() for name, stage in self.stages.items()},
+        }
+
+
+_runtime: Optional[MLATPipelineRuntime] = None
+
+
+def get_pipeline_runtime() -> Optional[MLATPipelineRuntime]:
+    return _runtime
+
+
+async def start_pipeline_runtime(pipeline: MLATPipelineService, buyer: NeuronBuyerService) -> MLATPipelineRuntime:
+    global _runtime
+    if _runtime is None:
+        _runtime = MLATPipelineRuntime(pipeline, buyer)
+    await _runtime.start()
+    return _runtime
+
+
+async def stop_pipeline_runtime() -> None:
+    global _runtime
+    if _runtime is not None:
+        await _runtime.stop()
+        _runtime = None
@@ -0,0 +1,182 @@
+"""Priority scheduling of MLAT solves by staleness and viewer/subscriber interest."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from services.bounded_executor import ExecutorSaturatedError
+
+T = TypeVar("T")
+
+PRIORITY_CLASSES = ("subscribed", "viewed", "background")
+
+
+class _Waiter:
+    __slots__ = ("icao", "priority_class", "enqueued_at", "future", "score")
+
+    def __init__(self, icao: str, priority_class: str, enqueued_at: float, future: asyncio.Future, score: float) -> None:
+        self.icao = icao
+        self.priority_class = priority_class
+        self.enqueued_at = enqueued_at
+        self.future = future
+        self.score = score
+
+
+class SolveScheduler:
+    """
+    Hands out a fixed number of solve slots, highest priority first.
+
+    A waiting solve's priority is
+
+        staleness_weight * seconds since the aircraft's last position (capped)
+        + viewer_weight * current map viewers
+        + subscriber_weight * paid subscriptions covering its sensors
+        + aging_per_s * seconds spent waiting
+
+    Every waiter ages at the same rate, so the heap key ``aging * enqueued_at - score``
+    never needs re-sorting, and a low-interest aircraft eventually outranks newer
+    high-interest arrivals instead of starving. When ``max_pending`` solves are
+    waiting, the lowest-priority one is rejected with ``ExecutorSaturatedError``.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        max_pending: int = 256,
+        staleness_weight: float = 1.0,
+        staleness_cap_s: float = 30.0,
+        viewer_weight: float = 5.0,
+        subscriber_weight: float = 20.0,
+        aging_per_s: float = 2.0,
+    ) -> None:
+        self.slots = max(1, slots)
+        self.max_pending = max(1, max_pending)
+        self.staleness_weight = staleness_weight
+        self.staleness_cap_s = staleness_cap_s
+        self.viewer_weight = viewer_weight
+        self.subscriber_weight = subscriber_weight
+        self.aging_per_s = aging_per_s
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._counter = itertools.count()
+        self._active = 0
+        self._viewers: Dict[str, int] = {}
+        self._last_solved: Dict[str, float] = {}
+        self._latency: Dict[str, Dict[str, float]] = {
+            name: {"count": 0, "total_ms": 0.0, "max_ms": 0.0} for name in PRIORITY_CLASSES
+        }
+        self._rejected: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+
+    # ------------------------------------------------------------------
+    # Interest signals
+    # ------------------------------------------------------------------
+    def set_viewers(self, viewers: Dict[str, int]) -> None:
+        """Replace current map viewer counts per ICAO."""
+        self._viewers = {icao.upper(): count for icao, count in viewers.items() if count > 0}
+
+    def mark_solved(self, icao: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._last_solved[icao.upper()] = now
+        if len(self._last_solved) > 4096:
+            # Entries past the cap score the same as unknown aircraft
+            self._last_solved = {
+                key: solved_at for key, solved_at in self._last_solved.items()
+                if now - solved_at < self.staleness_cap_s
+            }
+
+    def score(self, icao: str, subscribers: int = 0, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        icao = icao.upper()
+        last = self._last_solved.get(icao)
+        staleness = self.staleness_cap_s if last is None else min(now - last, self.staleness_cap_s)
+        return (
+            self.staleness_weight * staleness
+            + self.viewer_weight * self._viewers.get(icao, 0)
+            + self.subscriber_weight * subscribers
+        )
+
+    def _priority_class(self, icao: str, subscribers: int) -> str:
+        if subscribers > 0:
+            return "subscribed"
+        if self._viewers.get(icao.upper(), 0) > 0:
+            return "viewed"
+        return "background"
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    async def run(self, icao: str, job: Callable[[], Awaitable[T]], subscribers: int = 0) -> T:
+        """Wait for a slot in priority order, then await ``job()``."""
+        priority_class = self._priority_class(icao, subscribers)
+        enqueued_at = time.monotonic()
+
+        if self._active < self.slots and not self._heap:
+            self._active += 1
+        else:
+            score = self.score(icao, subscribers, enqueued_at)
+            waiter = _Waiter(icao, priority_class, enqueued_at, asyncio.get_running_loop().create_future(), score)
+            self._admit(waiter)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Slot was granted just as we were cancelled; pass it on
+                    self._release()
+                raise
+
+        self._record_wait(priority_class, (time.monotonic() - enqueued_at) * 1000)
+        try:
+            return await job()
+        finally:
+            self._release()
+
+    def _admit(self, waiter: _Waiter) -> None:
+        key = self.aging_per_s * waiter.enqueued_at - waiter.score
+        if len(self._heap) >= self.max_pending:
+            worst_idx = max(range(len(self._heap)), key=lambda idx: self._heap[idx][0])
+            worst_key, _, worst = self._heap[worst_idx]
+            if key >= worst_key:
+                self._rejected[waiter.priority_class] += 1
+                raise ExecutorSaturatedError("MLAT solve queue is full")
+            self._heap[worst_idx] = self._heap[-1]
+            self._heap.pop()
+            heapq.heapify(self._heap)
+            self._rejected[worst.priority_class] += 1
+            if not worst.future.done():
+                worst.future.set_exception(ExecutorSaturatedError("MLAT solve preempted by higher priority work"))
+        heapq.heappush(self._heap, (key, next(self._counter), waiter))
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._heap and self._active < self.slots:
+            _, _, waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue  # cancelled while waiting
+            self._active += 1
+            waiter.future.set_result(None)
+
+    def _record_wait(self, priority_class: str, wait_ms: float) -> None:
+        bucket = self._latency[priority_class]
+        bucket["count"] += 1
+        bucket["total_ms"] += wait_ms
+        bucket["max_ms"] = max(bucket["max_ms"], wait_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "active": self._active,
+            "pending": len(self._heap),
+            "viewed_aircraft": len(self._viewers),
+            "wait_latency": {
+                name: {
+                    "count": int(bucket["count"]),
+                    "avg_ms": round(bucket["total_ms"] / bucket["count"], 3) if bucket["count"] else 0.0,
+                    "max_ms": round(bucket["max_ms"], 3),
+                    "rejected": self._rejected[name],
+                }
+                for name, bucket in self._latency.items()
+            },
+        }
@@ -1,26 +1,94 @@
 import os
+import threading
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-from supabase import Client, create_client
+import httpx
+from supabase import Client, ClientOptions, create_client
 
 from models import AircraftPosition, ModeSMessage, SensorMetadata
 
+ROLE_ANON = "anon"
+ROLE_SERVICE = "service"
+
+_ROLE_KEYS = {ROLE_ANON: "SUPABASE_ANON_KEY", ROLE_SERVICE: "SUPABASE_SERVICE_ROLE_KEY"}
+
+_clients: Dict[str, Client] = {}
+_http_clients: Dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def _pool_limits() -> httpx.Limits:
+    # Keep-alive connections to Supabase REST shared by every request; SUPABASE_POOL_* size them
+    return httpx.Limits(
+        max_connections=int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "32")),
+        max_keepalive_connections=int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "16")),
+        keepalive_expiry=float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY_S", "60")),
+    )
+
+
+def get_supabase_client(role: str = ROLE_ANON) -> Optional[Client]:
+    """
+    Process-wide Supabase client for ``role`` (anon or service), or None if not configured.
+
+    Every client shares one pooled keep-alive HTTP connection pool per role instead of
+    opening connections per request. They never hold a user session (no persisted or
+    refreshed auth), so sharing them across requests is safe.
+    """
+    client = _clients.get(role)
+    if client is not None:
+        return client
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv(_ROLE_KEYS[role])
+    if not url or not key:
+        return None
+    with _clients_lock:
+        if role not in _clients:
+            http_client = httpx.Client(
+                limits=_pool_limits(),
+                timeout=float(os.getenv("SUPABASE_TIMEOUT_S", "30")),
+            )
+            options = ClientOptions(
+                httpx_client=http_client,
+                postgrest_client_timeout=float(os.getenv("SUPABASE_TIMEOUT_S", "30")),
+                auto_refresh_token=False,
+                persist_session=False,
+            )
+            _clients[role] = create_client(url, key, options=options)
+            _http_clients[role] = http_client
+        return _clients[role]
+
+
+def init_supabase_clients() -> Dict[str, bool]:
+    """Create the clients for every configured role up front (app startup)."""
+    return {role: get_supabase_client(role) is not None for role in _ROLE_KEYS}
+
+
+def close_supabase_clients() -> None:
+    with _clients_lock:
+        for http_client in _http_clients.values():
+            http_client.close()
+        _http_clients.clear()
+        _clients.clear()
+        _services.clear()
+
+
+def supabase_pool_stats() -> Dict[str, Any]:
+    limits = _pool_limits()
+    return {
+        "roles": sorted(_clients),
+        "max_connections": limits.max_connections,
+        "max_keepalive_connections": limits.max_keepalive_connections,
+        "keepalive_expiry_s": limits.keepalive_expiry,
+    }
+
 
 class SupabaseService:
     """Lightweight wrapper around Supabase REST APIs used for MLAT storage."""
 
     def __init__(self, use_service_role: bool = False) -> None:
-        url = os.getenv("SUPABASE_URL")
-        
-        if use_service_role:
-            key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        else:
-            key = os.getenv("SUPABASE_ANON_KEY")
-
-        if not url or not key:
-            self.client = None
-        else:
-            self.client = create_client(url, key)
+        # Shared pooled client for the role; constructing a service is cheap
+        self.client = get_supabase_client(ROLE_SERVICE if use_service_role else ROLE_ANON)
 
     def _ensure_client(self) -> Client:
         if not self.client:
@@ -81,11 +149,56 @@ class SupabaseService:
         cutoff = newest - (time_window_ms * 1_000_000)
         return [msg for msg in messages if msg["timestamp_ns"] >= cutoff]
 
+    def fetch_recent_messages_bulk(
+        self, icao_addresses: List[str], time_window_ms: int, per_icao_limit: int = 512
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch recent messages for many aircraft, grouped by ICAO and capped at ``per_icao_limit`` each.
+
+        One query asks for ``per_icao_limit`` rows per aircraft. When it comes back
+        full, a chatty aircraft may have used up rows the others needed, so the
+        aircraft that did not reach their cap are queried again on their own. At
+        least one aircraft reaches its cap per full response, so this ends after
+        one query in the usual case and at most one per aircraft.
+        """
+        client = self._ensure_client()
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        remaining = list(dict.fromkeys(icao_addresses))
+        while remaining:
+            limit = per_icao_limit * len(remaining)
+            response = (
+                client.table("mode_s_messages")
+                .select("*")
+                .in_("icao_address", remaining)
+                .order("timestamp_ns", desc=True)
+                .limit(limit)
+                .execute()
+            )
+            rows = response.data or []
+            page: Dict[str, List[Dict[str, Any]]] = {}
+            for msg in rows:
+                icao_rows = page.setdefault(msg["icao_address"], [])
+                if len(icao_rows) < per_icao_limit:
+                    icao_rows.append(msg)
+            if len(rows) < limit:
+                grouped.update(page)
+                break
+            # Full response: only aircraft at their cap are known to have all their newest rows
+            capped = {icao for icao, icao_rows in page.items() if len(icao_rows) >= per_icao_limit}
+            grouped.update({icao: page[icao] for icao in capped})
+            remaining = [icao for icao in remaining if icao not in capped]
+
+        window_ns = time_window_ms * 1_000_000
+        for icao, rows in grouped.items():
+            cutoff = rows[0]["timestamp_ns"] - window_ns
+            grouped[icao] = [msg for msg in rows if msg["timestamp_ns"] >= cutoff]
+        return grouped
+
     # ------------------------------------------------------------------
     # Aircraft positions
     # ------------------------------------------------------------------
-    def store_aircraft_position(self, position: AircraftPosition) -> Dict[str, Any]:
-        client = self._ensure_client()
+    @staticmethod
+    def _position_payload(position: AircraftPosition) -> Dict[str, Any]:
         payload = {
             "icao_address": position.icaoAddress,
             "latitude": position.latitude,
@@ -95,10 +208,62 @@ class SupabaseService:
             "sensor_count": position.sensorCount,
             "calculation_method": position.calculationMethod,
             "hedera_sequence_number": position.hederaSequenceNumber,
+            "hedera_topic_id": position.hederaTopicId,
             "flight_track_token_id": position.flightTrackTokenId,
         }
-        response = client.table("aircraft_positions").insert(payload).execute()
-        return response.data[0] if response.data else {}
+        if position.calculatedAt:
+            payload["calculated_at"] = position.calculatedAt
+        return payload
+
+    # A position is identified by its aircraft and solve time, so rewriting one is idempotent
+    _POSITION_KEY = "icao_address,calculated_at"
+
+    def store_aircraft_position(self, position: AircraftPosition) -> Dict[str, Any]:
+        client = self._ensure_client()
+        payload = self._position_payload(position)
+        response = client.table("aircraft_positions").upsert(payload, on_conflict=self._POSITION_KEY).execute()
+        row = response.data[0] if response.data else {}
+        if row.get("id") is not None:
+            position.id = str(row["id"])
+        return row
+
+    def batch_store_aircraft_positions(self, positions: List[AircraftPosition]) -> int:
+        client = self._ensure_client()
+        if not positions:
+            return 0
+        payload = [self._position_payload(position) for position in positions]
+        # Upsert so a replayed write-behind batch that had already committed is not stored twice
+        response = client.table("aircraft_positions").upsert(payload, on_conflict=self._POSITION_KEY).execute()
+        rows = response.data or []
+        # Inserted rows come back in request order; keep their ids for later updates
+        for position, row in zip(positions, rows):
+            if row.get("id") is not None:
+                position.id = str(row["id"])
+        return len(rows)
+
+    def update_position_sequence(
+        self, position_ids: List[str], sequence_number: int, topic_id: Optional[str] = None
+    ) -> None:
+        """Attach an HCS sequence number (and the topic it is on) to already stored positions."""
+        client = self._ensure_client()
+        if not position_ids:
+            return
+        update: Dict[str, Any] = {"hedera_sequence_number": sequence_number}
+        if topic_id:
+            update["hedera_topic_id"] = topic_id
+        client.table("aircraft_positions").update(update).in_("id", position_ids).execute()
+
+    def update_track_token(self, icao_address: str, since: str, token_id: str) -> None:
+        """Attach a Flight Track Token to a track session's positions that do not have one yet."""
+        client = self._ensure_client()
+        (
+            client.table("aircraft_positions")
+            .update({"flight_track_token_id": token_id})
+            .eq("icao_address", icao_address)
+            .gte("calculated_at", since)
+            .is_("flight_track_token_id", "null")
+            .execute()
+        )
 
     def get_recent_positions(self, minutes: int = 10) -> List[Dict[str, Any]]:
         client = self._ensure_client()
@@ -133,6 +298,142 @@ class SupabaseService:
             "ai_tags": tags
         }).eq("icao_address", icao_address).order("calculated_at", desc=True).limit(1).execute()
 
+    def fetch_subscribed_sensor_counts(self) -> Dict[str, int]:
+        """Count active marketplace subscriptions per Mode-S sensor_id."""
+        client = self._ensure_client()
+        response = (
+            client.table("subscriptions")
+            .select("sensor_offerings!inner(sensors!inner(sensor_id))")
+            .eq("status", "active")
+            .execute()
+        )
+        counts: Dict[str, int] = {}
+        for row in response.data or []:
+            sensor = ((row.get("sensor_offerings") or {}).get("sensors") or {}).get("sensor_id")
+            if sensor:
+                counts[sensor] = counts.get(sensor, 0) + 1
+        return counts
+
+    # ------------------------------------------------------------------
+    # Merkle notarization
+    # ------------------------------------------------------------------
+    def store_merkle_window(self, root: Dict[str, Any], leaves: List[Dict[str, Any]]) -> None:
+        """Store a notarized Merkle root and its leaves; upserts, so a retried store is harmless."""
+        client = self._ensure_client()
+        client.table("mlat_merkle_roots").upsert(root, on_conflict="root").execute()
+        for start in range(0, len(leaves), 500):
+            client.table("mlat_merkle_leaves").upsert(
+                leaves[start:start + 500], on_conflict="root,leaf_index"
+            ).execute()
+
+    def fetch_merkle_window(self, proof_key: str) -> Optional[Dict[str, Any]]:
+        """The latest stored leaf for ``proof_key`` with its root and every leaf hash of that window."""
+        client = self._ensure_client()
+        leaves = (
+            client.table("mlat_merkle_leaves")
+            .select("root, leaf_index, payload")
+            .eq("proof_key", proof_key)
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        ).data or []
+        if not leaves:
+            return None
+        leaf = leaves[0]
+        roots = client.table("mlat_merkle_roots").select("*").eq("root", leaf["root"]).limit(1).execute().data or []
+        if not roots:
+            return None
+        # PostgREST caps rows per response, so read the window's hashes a page at a time
+        leaf_hashes: List[str] = []
+        while len(leaf_hashes) < roots[0]["leaf_count"]:
+            page = (
+                client.table("mlat_merkle_leaves")
+                .select("leaf_hash")
+                .eq("root", leaf["root"])
+                .order("leaf_index")
+                .range(len(leaf_hashes), len(leaf_hashes) + 999)
+                .execute()
+            ).data or []
+            if not page:
+                break
+            leaf_hashes.extend(row["leaf_hash"] for row in page)
+        return {"root": roots[0], "leaf": leaf, "leaf_hashes": leaf_hashes}
+
+    # ------------------------------------------------------------------
+    # Operator payouts
+    # ------------------------------------------------------------------
+    _EARNINGS_SELECT = (
+        "id, total_amount, token_id, payout_transaction_id, "
+        "sensor_offerings!inner(sensors!inner(hedera_account_id))"
+    )
+
+    @staticmethod
+    def _earning_rows(data: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        rows = []
+        for row in data or []:
+            sensor = (row.get("sensor_offerings") or {}).get("sensors") or {}
+            rows.append({
+                "id": row["id"],
+                "total_amount": row["total_amount"],
+                "token_id": row.get("token_id"),
+                "payout_transaction_id": row.get("payout_transaction_id"),
+                "operator_account": sensor.get("hedera_account_id"),
+            })
+        return rows
+
+    def fetch_unpaid_earnings(self, limit: int = 10000) -> List[Dict[str, Any]]:
+        """Paid-for subscriptions not yet paid out, with the operator account of their sensor."""
+        client = self._ensure_client()
+        response = (
+            client.table("subscriptions")
+            .select(self._EARNINGS_SELECT)
+            .is_("payout_transaction_id", "null")
+            .not_.is_("transaction_hash", "null")
+            .order("created_at")
+            .limit(limit)
+            .execute()
+        )
+        return self._earning_rows(response.data)
+
+    def fetch_pending_payouts(self) -> List[Dict[str, Any]]:
+        """Subscriptions in a payout that was sent (or about to be) but not yet confirmed."""
+        client = self._ensure_client()
+        response = (
+            client.table("subscriptions")
+            .select(self._EARNINGS_SELECT)
+            .not_.is_("payout_transaction_id", "null")
+            .is_("paid_out_at", "null")
+            .execute()
+        )
+        return self._earning_rows(response.data)
+
+    def _update_earnings(
+        self,
+        subscription_ids: List[str],
+        update: Dict[str, Any],
+        transaction_id: Optional[str] = None,
+    ) -> None:
+        client = self._ensure_client()
+        # Keep each request's id list (and so its URL) short
+        for start in range(0, len(subscription_ids), 500):
+            query = client.table("subscriptions").update(update).in_("id", subscription_ids[start:start + 500])
+            if transaction_id is not None:
+                query = query.eq("payout_transaction_id", transaction_id)
+            query.execute()
+
+    def mark_earnings_pending(self, subscription_ids: List[str], transaction_id: str) -> None:
+        """Claim subscriptions for a payout transaction before it is submitted."""
+        self._update_earnings(subscription_ids, {"payout_transaction_id": transaction_id, "paid_out_at": None})
+
+    def mark_earnings_paid(self, subscription_ids: List[str], transaction_id: Optional[str]) -> None:
+        """Record the payout transaction on the subscriptions it settled."""
+        update = {"payout_transaction_id": transaction_id, "paid_out_at": datetime.now(timezone.utc).isoformat()}
+        self._update_earnings(subscription_ids, update)
+
+    def release_pending_earnings(self, subscription_ids: List[str], transaction_id: str) -> None:
+        """Make subscriptions payable again after their payout transaction is known to have failed."""
+        self._update_earnings(subscription_ids, {"payout_transaction_id": None}, transaction_id=transaction_id)
+
     # ------------------------------------------------------------------
     # Sensor metadata
     # ------------------------------------------------------------------
@@ -173,3 +474,22 @@ class SupabaseService:
         return {
             "supabase_configured": self.is_configured,
         }
+
+
+_services: Dict[bool, SupabaseService] = {}
+
+
+def get_supabase_service() -> SupabaseService:
+    """Shared anon-role service; use as ``Depends(get_supabase_service)`` in routes."""
+    service = _services.get(False)
+    if service is None or service.client is None:
+        service = _services[False] = SupabaseService()
+    return service
+
+
+def get_service_role_supabase() -> SupabaseService:
+    """Shared service-role service, for background jobs that bypass row level security."""
+    service = _services.get(True)
+    if service is None or service.client is None:
+        service = _services[True] = SupabaseService(use_service_role=True)
+    return service
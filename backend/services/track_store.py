@@ -0,0 +1,69 @@
+"""In-memory per-aircraft history of recently solved positions."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+from models import AircraftPosition
+
+
+class _Track:
+    __slots__ = ("positions", "last_seen")
+
+    def __init__(self, max_points: int) -> None:
+        self.positions: Deque[AircraftPosition] = deque(maxlen=max_points)
+        self.last_seen = 0.0
+
+
+class TrackStore:
+    """
+    Fixed-size ring buffer of the latest positions per ICAO, oldest first.
+
+    Aircraft with no new position for ``idle_ttl_s`` seconds are treated as
+    departed and dropped on the next sweep.
+    """
+
+    def __init__(self, max_points_per_icao: int = 32, idle_ttl_s: float = 300.0) -> None:
+        self.max_points_per_icao = max(1, max_points_per_icao)
+        self.idle_ttl_s = idle_ttl_s
+        self._tracks: Dict[str, _Track] = {}
+        self._next_sweep = 0.0
+        self._evicted = 0
+
+    def add(self, position: AircraftPosition, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        key = position.icaoAddress.upper()
+        track = self._tracks.get(key)
+        if track is None:
+            track = self._tracks[key] = _Track(self.max_points_per_icao)
+        track.positions.append(position)
+        track.last_seen = now
+        if now >= self._next_sweep:
+            self.evict_idle(now)
+
+    def recent(self, icao_address: str, limit: Optional[int] = None) -> List[AircraftPosition]:
+        track = self._tracks.get(icao_address.upper())
+        if track is None:
+            return []
+        if limit is None or limit >= len(track.positions):
+            return list(track.positions)
+        return list(islice(track.positions, len(track.positions) - max(0, limit), None))
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        expired = [key for key, track in self._tracks.items() if now - track.last_seen > self.idle_ttl_s]
+        for key in expired:
+            del self._tracks[key]
+        self._evicted += len(expired)
+        self._next_sweep = now + max(1.0, self.idle_ttl_s / 4)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "aircraft": len(self._tracks),
+            "positions": sum(len(track.positions) for track in self._tracks.values()),
+            "evicted_aircraft": self._evicted,
+        }
@@ -0,0 +1,325 @@
+"""Cached, coalesced and bulk verification of Hedera transactions through a mirror node."""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import base64
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+Lookup = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+DEFAULT_MIRROR_URL = "https://testnet.mirrornode.hedera.com"
+
+
+def mirror_transaction_id(transaction_id: str) -> str:
+    """``0.0.123@1700000000.000000001`` -> ``0.0.123-1700000000-000000001``, the mirror node's form."""
+    if "@" not in transaction_id:
+        return transaction_id
+    payer, valid_start = transaction_id.split("@", 1)
+    return f"{payer}-{valid_start.replace('.', '-')}"
+
+
+def debited_accounts(record: Dict[str, Any]) -> List[str]:
+    """Accounts the transaction took value from (negative amounts in its transfer list)."""
+    return [
+        transfer["account"]
+        for transfer in record.get("transfers") or []
+        if transfer.get("account") and (transfer.get("amount") or 0) < 0
+    ]
+
+
+# ----------------------------------------------------------------------
+# Mirror nodes
+# ----------------------------------------------------------------------
+class MirrorNode(abc.ABC):
+    """
+    Read-only source of transaction records.
+
+    ``get_transaction`` returns ``None`` while the transaction is unknown (not
+    yet reached consensus, or not yet ingested by the mirror), otherwise a record
+    with ``transaction_id``, ``result`` (e.g. ``SUCCESS``), ``consensus_timestamp``,
+    ``charged_tx_fee``, ``memo`` and ``transfers`` (``[{"account", "amount"}]``).
+    """
+
+    @abc.abstractmethod
+    async def get_transaction(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Record for ``transaction_id``, or ``None`` while the mirror does not know it."""
+
+    async def close(self) -> None:
+        return None
+
+
+class RestMirrorNode(MirrorNode):
+    """Hedera mirror node REST API, over one keep-alive HTTP client."""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_MIRROR_URL,
+        timeout_s: float = 5.0,
+        max_connections: int = 32,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def get_transaction(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        response = await self._client.get(f"/api/v1/transactions/{mirror_transaction_id(transaction_id)}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        transactions = response.json().get("transactions") or []
+        if not transactions:
+            return None
+        # Scheduled and child transactions share the ID; the parent is the one without a nonce
+        entry = next((t for t in transactions if not t.get("nonce")), transactions[0])
+        memo = entry.get("memo_base64") or ""
+        return {
+            "transaction_id": transaction_id,
+            "result": entry.get("result"),
+            "consensus_timestamp": entry.get("consensus_timestamp"),
+            "charged_tx_fee": entry.get("charged_tx_fee"),
+            "memo": base64.b64decode(memo).decode("utf-8", "replace") if memo else "",
+            "transfers": [
+                {"account": transfer.get("account"), "amount": transfer.get("amount")}
+                for transfer in entry.get("transfers") or []
+            ],
+        }
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class LocalMirrorNode(MirrorNode):
+    """In-memory stand-in for tests and local runs: ``record`` what the mirror should return."""
+
+    def __init__(self, latency_s: float = 0.0) -> None:
+        self.latency_s = latency_s
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.lookups = 0
+        self.max_concurrent = 0
+        self._active = 0
+
+    def record(
+        self,
+        transaction_id: str,
+        result: str = "SUCCESS",
+        transfers: Optional[List[Dict[str, Any]]] = None,
+        memo: str = "",
+        charged_tx_fee: int = 0,
+    ) -> None:
+        self.records[transaction_id] = {
+            "transaction_id": transaction_id,
+            "result": result,
+            "consensus_timestamp": f"{time.time():.9f}",
+            "charged_tx_fee": charged_tx_fee,
+            "memo": memo,
+            "transfers": list(transfers or []),
+        }
+
+    async def get_transaction(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        self.lookups += 1
+        self._active += 1
+        self.max_concurrent = max(self.max_concurrent, self._active)
+        try:
+            if self.latency_s:
+                await asyncio.sleep(self.latency_s)
+            record = self.records.get(transaction_id)
+            return dict(record) if record is not None else None
+        finally:
+            self._active -= 1
+
+
+# ----------------------------------------------------------------------
+# Verifier
+# ----------------------------------------------------------------------
+class TransactionVerifier:
+    """
+    Verifies transactions by ID with a TTL cache in front of the mirror node.
+
+    A transaction's outcome never changes once it reached consensus, so found
+    records are kept for ``ttl_s``. "Not found yet" is transient and is never
+    cached, nor are lookup errors: the next confirm asks again and sees the
+    transaction as soon as it lands. Concurrent verifications of one ID share a
+    single lookup, and ``verify_many`` checks many IDs at once with at most
+    ``max_concurrency`` lookups in flight.
+    """
+
+    def __init__(
+        self,
+        mirror: MirrorNode,
+        ttl_s: float = 3600.0,
+        max_entries: int = 10000,
+        max_concurrency: int = 16,
+    ) -> None:
+        self.mirror = mirror
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_concurrency = max(1, max_concurrency)
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lookups = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "TransactionVerifier":
+        # Mirror node used to verify purchases; HEDERA_VERIFY_* tune the cache and bulk fan-out
+        mirror = RestMirrorNode(
+            os.getenv("HEDERA_MIRROR_URL", DEFAULT_MIRROR_URL),
+            timeout_s=float(os.getenv("HEDERA_MIRROR_TIMEOUT_S", "5")),
+        )
+        return cls(
+            mirror,
+            ttl_s=float(os.getenv("HEDERA_VERIFY_CACHE_TTL_S", "3600")),
+            max_entries=int(os.getenv("HEDERA_VERIFY_CACHE_MAX", "10000")),
+            max_concurrency=int(os.getenv("HEDERA_VERIFY_CONCURRENCY", "16")),
+        )
+
+    async def verify(
+        self,
+        transaction_id: str,
+        expected_payer: Optional[str] = None,
+        fallback: Optional[Lookup] = None,
+    ) -> Dict[str, Any]:
+        """
+        Result in the shape ``verify_transaction`` has always returned.
+
+        ``fallback`` is asked when the mirror does not know the transaction yet,
+        e.g. a receipt query against the consensus nodes for a purchase that was
+        submitted a moment ago.
+        """
+        try:
+            record = await self.lookup(transaction_id, fallback)
+        except Exception as exc:
+            return {"success": False, "error": f"Failed to verify transaction: {exc}"}
+        return self._result(transaction_id, record, expected_payer)
+
+    async def verify_many(
+        self,
+        transaction_ids: Iterable[str],
+        expected_payer: Optional[str] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Verify many transactions concurrently; returns results keyed by transaction ID."""
+        unique = list(dict.fromkeys(transaction_ids))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _one(transaction_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.verify(transaction_id, expected_payer)
+
+        results = await asyncio.gather(*(_one(transaction_id) for transaction_id in unique))
+        return dict(zip(unique, results))
+
+    async def lookup(self, transaction_id: str, fallback: Optional[Lookup] = None) -> Optional[Dict[str, Any]]:
+        """Record for ``transaction_id`` from the cache, a lookup already running, or the mirror."""
+        now = time.monotonic()
+        cached = self._cache.get(transaction_id)
+        if cached is not None and cached[0] > now:
+            self.hits += 1
+            self._cache.move_to_end(transaction_id)
+            return cached[1]
+        running = self._inflight.get(transaction_id)
+        if running is not None:
+            self.coalesced += 1
+            return await asyncio.shield(running)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[transaction_id] = future
+        try:
+            self.lookups += 1
+            record = await self.mirror.get_transaction(transaction_id)
+            if record is None and fallback is not None:
+                record = await fallback(transaction_id)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Transaction lookup failed for %s: %s", transaction_id, exc)
+            future.set_exception(exc)
+            # Retrieved by anyone coalesced onto it; avoid "never retrieved" noise otherwise
+            future.exception()
+            raise
+        else:
+            self._store(transaction_id, record)
+            future.set_result(record)
+            return record
+        finally:
+            self._inflight.pop(transaction_id, None)
+
+    def invalidate(self, transaction_id: str) -> None:
+        self._cache.pop(transaction_id, None)
+
+    def _store(self, transaction_id: str, record: Optional[Dict[str, Any]]) -> None:
+        if record is None or self.ttl_s <= 0:
+            return
+        self._cache[transaction_id] = (time.monotonic() + self.ttl_s, record)
+        self._cache.move_to_end(transaction_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _result(transaction_id: str, record: Optional[Dict[str, Any]], expected_payer: Optional[str]) -> Dict[str, Any]:
+        if record is None:
+            return {"success": False, "error": "Transaction not found"}
+        if record.get("result") != "SUCCESS":
+            return {"success": False, "error": f"Transaction failed with status: {record.get('result')}"}
+        # The transaction ID only names who paid the fee; the buyer is whoever was debited
+        if expected_payer and expected_payer not in debited_accounts(record):
+            return {"success": False, "error": f"Transaction was not paid by {expected_payer}"}
+        return {
+            "success": True,
+            "transaction_id": transaction_id,
+            "consensus_timestamp": record.get("consensus_timestamp"),
+            "transaction_fee": record.get("charged_tx_fee"),
+            "transfers": record.get("transfers") or [],
+            "memo": record.get("memo"),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 3) if requests else None,
+            "lookups": self.lookups,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+        }
+
+    async def close(self) -> None:
+        await self.mirror.close()
+
+
+_verifier: Optional[TransactionVerifier] = None
+
+
+def get_transaction_verifier() -> TransactionVerifier:
+    """Process-wide verifier, so every confirm shares one cache and one mirror connection pool."""
+    global _verifier
+    if _verifier is None:
+        _verifier = TransactionVerifier.from_env()
+    return _verifier
+
+
+async def close_transaction_verifier() -> None:
+    global _verifier
+    verifier, _verifier = _verifier, None
+    if verifier is not None:
+        await verifier.close()
@@ -0,0 +1,272 @@
+"""Write-behind queue that batches remote writes and spools them to disk when remotes fail."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FlushHandler = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+_WRITTEN = "written"
+_FAILED = "failed"
+_TIMED_OUT = "timed_out"
+
+
+class WriteBehindQueue:
+    """
+    Accepts JSON records immediately and flushes them through ``handler`` in batches.
+
+    If a flush raises or exceeds ``flush_timeout_s``, the batch is appended to an
+    append-only NDJSON spool and every later record follows it there. A background
+    loop replays the spool in order and advances a committed byte offset
+    (``<spool>.offset``) after each replayed batch. Once the spool is fully
+    replayed it is truncated and direct flushing resumes. Records left in the
+    spool survive restarts and are replayed on the next ``start()``.
+
+    ``handler`` may mutate the records it is given (for example to note an HCS
+    sequence number already obtained) so a replay of a partially flushed batch
+    does not repeat completed work. A replayed batch the handler changed before
+    failing is appended to the spool again, so those notes survive instead of the
+    stale copy being replayed.
+
+    A flush that times out may still have committed. Its batch is spooled only
+    when ``idempotent`` says replaying an already-written batch is harmless (the
+    handler upserts on a natural key); otherwise it is dropped and counted under
+    ``unknown_outcome`` rather than risk writing it twice.
+    """
+
+    def __init__(
+        self,
+        handler: FlushHandler,
+        spool_path: Path,
+        batch_size: int = 50,
+        flush_interval_s: float = 0.25,
+        flush_timeout_s: float = 10.0,
+        max_queue: int = 10_000,
+        replay_interval_s: float = 5.0,
+        idempotent: bool = False,
+    ) -> None:
+        self.handler = handler
+        self.idempotent = idempotent
+        self.spool_path = Path(spool_path)
+        self.offset_path = self.spool_path.with_name(self.spool_path.name + ".offset")
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.flush_timeout_s = flush_timeout_s
+        self.max_queue = max(1, max_queue)
+        self.replay_interval_s = replay_interval_s
+        self._queue: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._replayer: Optional[asyncio.Task] = None
+        self._spooling = False
+        self._flush_lock = asyncio.Lock()
+        self._file_lock = threading.Lock()
+        self.enqueued = 0
+        self.flushed = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.respooled = 0
+        self.flush_failures = 0
+        self.unknown_outcome = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._flusher is not None:
+            return
+        self._spooling = self._spool_pending()
+        self._flusher = asyncio.create_task(self._flush_loop(), name="write-behind-flush")
+        self._replayer = asyncio.create_task(self._replay_loop(), name="write-behind-replay")
+
+    async def stop(self) -> None:
+        """Flush what is queued (spooling whatever cannot be written) and stop the loops."""
+        for task in (self._flusher, self._replayer):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._flusher, self._replayer) if t is not None), return_exceptions=True)
+        self._flusher = self._replayer = None
+        while self._queue:
+            await self._flush_once()
+
+    def enqueue(self, record: Dict[str, Any]) -> None:
+        self.start()
+        self.enqueued += 1
+        if len(self._queue) >= self.max_queue:
+            # Never drop: overflow goes straight to disk behind anything already spooled
+            self._spooling = True
+            self._append_to_spool([record])
+            return
+        self._queue.append(record)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                await self._flush_once()
+
+    async def _flush_once(self) -> None:
+        async with self._flush_lock:
+            # Take the batch only once the lock is held: a flusher cancelled while the
+            # replayer holds it must leave its records queued for stop() to flush.
+            # A spool append that is cancelled still completes on its worker thread.
+            batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+            if not batch:
+                return
+            if self._spooling:
+                await asyncio.to_thread(self._append_to_spool, batch)
+                return
+            try:
+                outcome = await self._write(batch)
+            except asyncio.CancelledError:
+                self._queue[:0] = batch  # stop() flushes or spools it
+                raise
+            if outcome == _WRITTEN:
+                self.flushed += len(batch)
+            elif outcome == _FAILED or self.idempotent:
+                self._spooling = True
+                await asyncio.to_thread(self._append_to_spool, batch)
+            else:
+                self.unknown_outcome += len(batch)
+                logger.error(
+                    "Write-behind flush of %d records timed out and may have committed; not spooling a non-idempotent write",
+                    len(batch),
+                )
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> str:
+        try:
+            await asyncio.wait_for(self.handler(batch), timeout=self.flush_timeout_s)
+            return _WRITTEN
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.flush_failures += 1
+            logger.warning("Write-behind flush of %d records timed out after %.1fs", len(batch), self.flush_timeout_s)
+            return _TIMED_OUT
+        except Exception as exc:
+            self.flush_failures += 1
+            logger.warning("Write-behind flush of %d records failed, spooling: %s", len(batch), exc)
+            return _FAILED
+
+    # ------------------------------------------------------------------
+    # Spool
+    # ------------------------------------------------------------------
+    def _append_to_spool(self, records: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        with self._file_lock:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spool_path.open("a", encoding="utf-8") as spool:
+                spool.write(lines)
+                spool.flush()
+                os.fsync(spool.fileno())
+        self.spooled += len(records)
+
+    def _committed_offset(self) -> int:
+        try:
+            return int(self.offset_path.read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _commit_offset(self, offset: int) -> None:
+        tmp = self.offset_path.with_name(self.offset_path.name + ".tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, self.offset_path)
+
+    def _spool_pending(self) -> bool:
+        try:
+            return self.spool_path.stat().st_size > self._committed_offset()
+        except FileNotFoundError:
+            return False
+
+    def _read_spool_batch(self, offset: int) -> tuple[List[Dict[str, Any]], int]:
+        records: List[Dict[str, Any]] = []
+        with self.spool_path.open("rb") as spool:
+            spool.seek(offset)
+            while len(records) < self.batch_size:
+                line = spool.readline()
+                if not line.endswith(b"\n"):
+                    break  # end of file, or a record still being appended
+                offset += len(line)
+                if line.strip():
+                    records.append(json.loads(line))
+        return records, offset
+
+    def _truncate_if_drained(self, offset: int) -> bool:
+        with self._file_lock:
+            try:
+                if self.spool_path.stat().st_size > offset:
+                    return False  # appended to while the last batch was replaying
+            except FileNotFoundError:
+                pass
+            self.spool_path.unlink(missing_ok=True)
+            self.offset_path.unlink(missing_ok=True)
+            return True
+
+    async def _replay_loop(self) -> None:
+        while True:
+            if self._spooling:
+                await self.replay()
+            await asyncio.sleep(self.replay_interval_s)
+
+    async def replay(self) -> bool:
+        """Replay the spool in order; returns True once it is fully drained."""
+        async with self._flush_lock:
+            while True:
+                offset = await asyncio.to_thread(self._committed_offset)
+                try:
+                    records, next_offset = await asyncio.to_thread(self._read_spool_batch, offset)
+                except FileNotFoundError:
+                    records, next_offset = [], offset
+                if not records:
+                    if not await asyncio.to_thread(self._truncate_if_drained, next_offset):
+                        continue
+                    # Spool is drained; hand the queue back to direct flushing unless
+                    # an overflow enqueue started a new one in the meantime
+                    self._spooling = self._spool_pending()
+                    return not self._spooling
+                before = [json.dumps(record, separators=(",", ":")) for record in records]
+                outcome = await self._write(records)
+                if outcome == _TIMED_OUT and not self.idempotent:
+                    # Cannot tell whether it landed; skip it rather than write it twice
+                    self.unknown_outcome += len(records)
+                elif outcome != _WRITTEN:
+                    if [json.dumps(record, separators=(",", ":")) for record in records] == before:
+                        return False
+                    # Keep what the handler noted (work already done) by spooling the batch
+                    # again behind the rest rather than replaying the stale copy
+                    await asyncio.to_thread(self._append_to_spool, records)
+                    await asyncio.to_thread(self._commit_offset, next_offset)
+                    self.respooled += len(records)
+                    return False
+                await asyncio.to_thread(self._commit_offset, next_offset)
+                self.replayed += len(records)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "spooling": self._spooling,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "respooled": self.respooled,
+            "flush_failures": self.flush_failures,
+            "unknown_outcome": self.unknown_outcome,
+        }
@@ -28,6 +28,8 @@ CREATE TABLE IF NOT EXISTS subscriptions (
   token_id TEXT NOT NULL,
   transaction_hash TEXT, -- Hedera transaction ID of payment
   hcs_sequence BIGINT, -- HCS sequence number of logged purchase
+  payout_transaction_id TEXT, -- Hedera transfer paying the sensor operator; pending until paid_out_at is set
+  paid_out_at TIMESTAMPTZ,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
@@ -44,6 +46,8 @@ CREATE TABLE IF NOT EXISTS consumer_api_keys (
 CREATE INDEX IF NOT EXISTS idx_subscriptions_consumer ON subscriptions(consumer_account);
 CREATE INDEX IF NOT EXISTS idx_subscriptions_status ON subscriptions(status);
 CREATE INDEX IF NOT EXISTS idx_subscriptions_offering ON subscriptions(offering_id);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_unpaid ON subscriptions(created_at) WHERE payout_transaction_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_subscriptions_payout_pending ON subscriptions(payout_transaction_id) WHERE payout_transaction_id IS NOT NULL AND paid_out_at IS NULL;
 CREATE INDEX IF NOT EXISTS idx_offerings_sensor ON sensor_offerings(sensor_id);
 CREATE INDEX IF NOT EXISTS idx_offerings_active ON sensor_offerings(is_active);
 CREATE INDEX IF NOT EXISTS idx_api_keys_consumer ON consumer_api_keys(consumer_account);
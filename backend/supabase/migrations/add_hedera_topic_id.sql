@@ -0,0 +1,12 @@
+-- Migration: Record which HCS topic each position was logged to
+-- Run this in Supabase SQL Editor to update existing databases
+
+-- With HCS_TOPIC_IDS sharding, sequence numbers are only unique per topic
+ALTER TABLE aircraft_positions
+ADD COLUMN IF NOT EXISTS hedera_topic_id TEXT;
+
+CREATE INDEX IF NOT EXISTS aircraft_positions_hcs_message_idx
+ON aircraft_positions (hedera_topic_id, hedera_sequence_number)
+WHERE hedera_sequence_number IS NOT NULL;
+
+COMMENT ON COLUMN aircraft_positions.hedera_topic_id IS 'HCS topic holding hedera_sequence_number';
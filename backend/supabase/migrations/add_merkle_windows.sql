@@ -0,0 +1,46 @@
+-- Migration: Store Merkle-notarized windows so inclusion proofs outlive the process
+-- Run this in Supabase SQL Editor to update existing databases
+
+-- One row per root submitted to HCS (MLAT_MERKLE_WINDOW_MS > 0)
+CREATE TABLE IF NOT EXISTS mlat_merkle_roots (
+    root TEXT PRIMARY KEY, -- hex SHA-256 root logged to HCS
+    batch_id BIGINT,
+    leaf_count INTEGER NOT NULL,
+    hedera_sequence_number BIGINT,
+    hedera_topic_id TEXT,
+    window_start TIMESTAMPTZ,
+    window_end TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Every leaf of every root, so any proof can be rebuilt from the stored hashes
+CREATE TABLE IF NOT EXISTS mlat_merkle_leaves (
+    root TEXT NOT NULL REFERENCES mlat_merkle_roots (root) ON DELETE CASCADE,
+    leaf_index INTEGER NOT NULL,
+    proof_key TEXT NOT NULL, -- ICAO|calculated_at of the notarized position
+    leaf_hash TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (root, leaf_index)
+);
+
+CREATE INDEX IF NOT EXISTS mlat_merkle_leaves_proof_key_idx
+ON mlat_merkle_leaves (proof_key, created_at DESC);
+
+ALTER TABLE mlat_merkle_roots ENABLE ROW LEVEL SECURITY;
+ALTER TABLE mlat_merkle_leaves ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow read for all" ON mlat_merkle_roots;
+DROP POLICY IF EXISTS "Allow write for all" ON mlat_merkle_roots;
+DROP POLICY IF EXISTS "Allow update for all" ON mlat_merkle_roots;
+DROP POLICY IF EXISTS "Allow read for all" ON mlat_merkle_leaves;
+DROP POLICY IF EXISTS "Allow write for all" ON mlat_merkle_leaves;
+DROP POLICY IF EXISTS "Allow update for all" ON mlat_merkle_leaves;
+
+CREATE POLICY "Allow read for all" ON mlat_merkle_roots FOR SELECT USING (true);
+CREATE POLICY "Allow write for all" ON mlat_merkle_roots FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow update for all" ON mlat_merkle_roots FOR UPDATE USING (true);
+CREATE POLICY "Allow read for all" ON mlat_merkle_leaves FOR SELECT USING (true);
+CREATE POLICY "Allow write for all" ON mlat_merkle_leaves FOR INSERT WITH CHECK (true);
+-- Upserts from a retried store
+CREATE POLICY "Allow update for all" ON mlat_merkle_leaves FOR UPDATE USING (true);
@@ -0,0 +1,17 @@
+-- Migration: Track which escrow payout settled each subscription
+-- Run this in Supabase SQL Editor to update existing databases
+
+-- The payout scheduler nets unpaid subscriptions per operator each period
+ALTER TABLE subscriptions
+ADD COLUMN IF NOT EXISTS payout_transaction_id TEXT,
+ADD COLUMN IF NOT EXISTS paid_out_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_subscriptions_unpaid
+ON subscriptions (created_at)
+WHERE payout_transaction_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_subscriptions_payout_pending
+ON subscriptions (payout_transaction_id)
+WHERE payout_transaction_id IS NOT NULL AND paid_out_at IS NULL;
+
+COMMENT ON COLUMN subscriptions.payout_transaction_id IS 'Hedera transfer paying this purchase to the sensor operator; pending until paid_out_at is set';
@@ -0,0 +1,16 @@
+-- Migration: Make aircraft position writes idempotent
+-- Run this in Supabase SQL Editor to update existing databases
+
+-- Write-behind replays upsert on (icao_address, calculated_at); drop duplicates earlier replays left behind
+DELETE FROM aircraft_positions a
+USING aircraft_positions b
+WHERE a.icao_address = b.icao_address
+  AND a.calculated_at = b.calculated_at
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS aircraft_positions_natural_key_idx
+ON aircraft_positions (icao_address, calculated_at);
+
+-- Upserts update the existing row
+DROP POLICY IF EXISTS "Allow update for all" ON aircraft_positions;
+CREATE POLICY "Allow update for all" ON aircraft_positions FOR UPDATE USING (true);
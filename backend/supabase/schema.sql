@@ -54,6 +54,7 @@ CREATE TABLE IF NOT EXISTS aircraft_positions (
     sensor_count INTEGER,
     calculation_method TEXT,
     hedera_sequence_number BIGINT,
+    hedera_topic_id TEXT, -- HCS topic the sequence number belongs to (HCS_TOPIC_IDS sharding)
     flight_track_token_id TEXT,
     -- AI Analysis Fields
     ai_threat_level TEXT,
@@ -66,6 +67,32 @@ CREATE TABLE IF NOT EXISTS aircraft_positions (
 CREATE INDEX IF NOT EXISTS aircraft_positions_icao_idx ON aircraft_positions (icao_address, calculated_at DESC);
 CREATE INDEX IF NOT EXISTS aircraft_positions_confidence_idx ON aircraft_positions (confidence_score DESC);
 CREATE INDEX IF NOT EXISTS aircraft_positions_calculated_at_idx ON aircraft_positions (calculated_at DESC);
+-- Natural key: write-behind replays upsert on it, so a batch is never stored twice
+CREATE UNIQUE INDEX IF NOT EXISTS aircraft_positions_natural_key_idx ON aircraft_positions (icao_address, calculated_at);
+
+-- Merkle-notarized windows (MLAT_MERKLE_WINDOW_MS > 0): roots logged to HCS and every leaf under them
+CREATE TABLE IF NOT EXISTS mlat_merkle_roots (
+    root TEXT PRIMARY KEY,
+    batch_id BIGINT,
+    leaf_count INTEGER NOT NULL,
+    hedera_sequence_number BIGINT,
+    hedera_topic_id TEXT,
+    window_start TIMESTAMPTZ,
+    window_end TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS mlat_merkle_leaves (
+    root TEXT NOT NULL REFERENCES mlat_merkle_roots (root) ON DELETE CASCADE,
+    leaf_index INTEGER NOT NULL,
+    proof_key TEXT NOT NULL, -- ICAO|calculated_at of the notarized position
+    leaf_hash TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (root, leaf_index)
+);
+
+CREATE INDEX IF NOT EXISTS mlat_merkle_leaves_proof_key_idx ON mlat_merkle_leaves (proof_key, created_at DESC);
 
 -- ============================================================================
 -- Row Level Security (optional multi-tenant controls)
@@ -73,6 +100,8 @@ CREATE INDEX IF NOT EXISTS aircraft_positions_calculated_at_idx ON aircraft_posi
 ALTER TABLE sensors ENABLE ROW LEVEL SECURITY;
 ALTER TABLE mode_s_messages ENABLE ROW LEVEL SECURITY;
 ALTER TABLE aircraft_positions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE mlat_merkle_roots ENABLE ROW LEVEL SECURITY;
+ALTER TABLE mlat_merkle_leaves ENABLE ROW LEVEL SECURITY;
 
 -- By default allow read/write access; tighten policies once auth is wired up
 DROP POLICY IF EXISTS "Allow read for all" ON sensors;
@@ -81,6 +110,13 @@ DROP POLICY IF EXISTS "Allow read for all" ON mode_s_messages;
 DROP POLICY IF EXISTS "Allow write for all" ON mode_s_messages;
 DROP POLICY IF EXISTS "Allow read for all" ON aircraft_positions;
 DROP POLICY IF EXISTS "Allow write for all" ON aircraft_positions;
+DROP POLICY IF EXISTS "Allow update for all" ON aircraft_positions;
+DROP POLICY IF EXISTS "Allow read for all" ON mlat_merkle_roots;
+DROP POLICY IF EXISTS "Allow write for all" ON mlat_merkle_roots;
+DROP POLICY IF EXISTS "Allow update for all" ON mlat_merkle_roots;
+DROP POLICY IF EXISTS "Allow read for all" ON mlat_merkle_leaves;
+DROP POLICY IF EXISTS "Allow write for all" ON mlat_merkle_leaves;
+DROP POLICY IF EXISTS "Allow update for all" ON mlat_merkle_leaves;
 
 CREATE POLICY "Allow read for all" ON sensors FOR SELECT USING (true);
 CREATE POLICY "Allow write for all" ON sensors FOR INSERT WITH CHECK (true);
@@ -91,3 +127,12 @@ CREATE POLICY "Allow write for all" ON mode_s_messages FOR INSERT WITH CHECK (tr
 
 CREATE POLICY "Allow read for all" ON aircraft_positions FOR SELECT USING (true);
 CREATE POLICY "Allow write for all" ON aircraft_positions FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow update for all" ON aircraft_positions FOR UPDATE USING (true);
+
+CREATE POLICY "Allow read for all" ON mlat_merkle_roots FOR SELECT USING (true);
+CREATE POLICY "Allow write for all" ON mlat_merkle_roots FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow update for all" ON mlat_merkle_roots FOR UPDATE USING (true);
+
+CREATE POLICY "Allow read for all" ON mlat_merkle_leaves FOR SELECT USING (true);
+CREATE POLICY "Allow write for all" ON mlat_merkle_leaves FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow update for all" ON mlat_merkle_leaves FOR UPDATE USING (true);
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from services import adaptive_limiter
+from services.adaptive_limiter import AdaptiveLimiter, is_throttle, with_retries
+
+
+def test_limit_grows_additively_and_halves_on_throttle():
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=8, backoff_cooldown_s=1)
+
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.current_limit == 4 and limiter.limit > 4.9
+
+    limiter.on_throttle(now=100.0)
+    limiter.on_throttle(now=100.5)  # same burst: only one cut
+    assert limiter.current_limit == 2 and limiter.backoffs == 1
+    limiter.on_throttle(now=102.0)
+    limiter.on_throttle(now=104.0)
+    assert limiter.current_limit == 1
+
+    for _ in range(200):
+        limiter.on_success()
+    assert limiter.current_limit == 8
+
+
+def test_only_busy_throttles_and_timeouts_back_off():
+    assert is_throttle(RuntimeError("PrecheckStatusException: BUSY"))
+    assert is_throttle(RuntimeError("receipt for transaction failed: THROTTLED_AT_CONSENSUS"))
+    assert is_throttle(asyncio.TimeoutError())
+    assert not is_throttle(RuntimeError("INVALID_SIGNATURE"))
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_at_the_limit():
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    limiter.release()
+    await asyncio.wait_for(waiting, timeout=1)
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_busy_with_jitter_and_cuts_the_limit(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(adaptive_limiter.asyncio, "sleep", fake_sleep)
+    limiter = AdaptiveLimiter(initial=8, max_limit=8, backoff_cooldown_s=0)
+    calls = []
+
+    async def submit():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("BUSY")
+        return 42
+
+    assert await with_retries(limiter, submit, max_attempts=4, base_delay_s=0.25) == 42
+    assert len(calls) == 3 and limiter.retries == 2
+    assert limiter.current_limit == 2 and limiter.in_flight == 0
+    assert 0 <= delays[0] <= 0.25 and 0 <= delays[1] <= 0.5
+
+    async def rejected():
+        raise RuntimeError("INVALID_SIGNATURE")
+
+    with pytest.raises(RuntimeError):
+        await with_retries(limiter, rejected)
+    assert limiter.retries == 2 and limiter.in_flight == 0
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from services.ai_dispatcher import AIAnalysisDispatcher
+
+
+@pytest.mark.asyncio
+async def test_latest_submission_wins_and_cooldown_drops_repeats():
+    analysed = []
+    release = asyncio.Event()
+
+    async def handler(icao, item):
+        await release.wait()
+        analysed.append((icao, item))
+
+    dispatcher = AIAnalysisDispatcher(handler, workers=1, cooldown_s=60)
+    dispatcher.submit("abc123", 1)
+    await asyncio.sleep(0)  # worker picks up ABC123 and blocks
+    dispatcher.submit("DEF456", 1)
+    dispatcher.submit("DEF456", 2)
+    dispatcher.submit("DEF456", 3)
+    assert not dispatcher.submit("ABC123", 2)  # analysis already started within the cooldown
+
+    release.set()
+    for _ in range(10):
+        await asyncio.sleep(0)
+    await dispatcher.stop()
+
+    assert analysed == [("ABC123", 1), ("DEF456", 3)]
+    stats = dispatcher.stats()
+    assert stats["coalesced"] == 2
+    assert stats["dropped"] == {"cooldown": 1, "queue_full": 0}
+
+
+@pytest.mark.asyncio
+async def test_new_aircraft_are_dropped_when_pending_is_full():
+    dispatcher = AIAnalysisDispatcher(lambda icao, item: asyncio.sleep(0), workers=1, max_pending=2)
+
+    accepted = [dispatcher.submit(icao, None) for icao in ("A1", "A2", "A3")]
+    await dispatcher.stop()
+
+    assert accepted == [True, True, False]
+    assert dispatcher.stats()["dropped"]["queue_full"] == 1
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from services.executors import HEDERA, SUPABASE, executor_stats, get_executor, shutdown_executors
+
+
+@pytest.mark.asyncio
+async def test_runs_blocking_work_off_the_event_loop():
+    executor = BoundedExecutor("test", max_workers=2, max_queue=2)
+    loop_thread = threading.get_ident()
+
+    result = await executor.run(threading.get_ident)
+
+    assert result != loop_thread
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_fast_when_queue_is_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    waiting = asyncio.ensure_future(executor.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.run(release.wait, 5)
+
+    release.set()
+    assert await running is True
+    assert await waiting is True
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_counts_failures():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+
+    def _boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.run(_boom)
+
+    assert executor.stats()["failed"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_queued_call_frees_its_slot():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait, 5))
+    waiting = asyncio.ensure_future(executor.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+    assert executor.stats()["queued"] == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    stats = executor.stats()
+    assert stats["queued"] == 0 and stats["active"] == 1 and stats["cancelled"] == 1
+    # The freed slot admits new work instead of rejecting it
+    queued_again = asyncio.ensure_future(executor.run(lambda: "ran"))
+    release.set()
+    assert await running is True
+    assert await queued_again == "ran"
+    assert executor.stats()["queued"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_slow_hedera_pool_does_not_starve_supabase(monkeypatch):
+    shutdown_executors()
+    monkeypatch.setenv("EXECUTOR_HEDERA_WORKERS", "1")
+    release = threading.Event()
+    try:
+        hedera = get_executor(HEDERA)
+        assert get_executor(HEDERA) is hedera
+        stuck = [asyncio.ensure_future(hedera.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        assert await asyncio.wait_for(get_executor(SUPABASE).run(lambda: "written"), timeout=1) == "written"
+        stats = executor_stats()
+        assert stats[HEDERA]["active"] == 1 and stats[HEDERA]["queued"] == 1
+        assert stats[SUPABASE]["completed"] == 1
+    finally:
+        release.set()
+        await asyncio.gather(*stuck)
+        shutdown_executors()
@@ -0,0 +1,51 @@
+import pytest
+
+from models import AircraftPosition
+from services.ftt_minter import FlightTrackMinter
+
+
+def _position(icao, confidence=95.0, sensors=4):
+    return AircraftPosition(
+        icaoAddress=icao, latitude=51.5, longitude=-0.1, confidenceScore=confidence, sensorCount=sensors
+    )
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_minted_once_and_batched():
+    amounts = []
+    minted = []
+
+    async def mint(amount):
+        amounts.append(amount)
+        return "0.0.777"
+
+    async def on_minted(sessions):
+        minted.extend(session.session_id for session in sessions)
+
+    minter = FlightTrackMinter(mint, on_minted=on_minted, session_gap_s=60, flush_interval_s=60)
+    for second in range(5):
+        minter.observe(_position("ABC123", confidence=90 + second), now=second)
+    minter.observe(_position("DEF456", confidence=99), now=0)
+    minter.observe(_position("LOW001", confidence=70), now=0)
+    await minter.stop()
+
+    assert amounts == [94 + 99]  # best confidence seen before the batch was minted
+    assert minted == ["ABC123-1", "DEF456-2"]
+    assert minter.observe(_position("ABC123"), now=6).token_id == "0.0.777"
+    assert minter.stats()["mint_batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gap_starts_new_session_and_failed_mints_stay_pending():
+    async def mint(amount):
+        raise ConnectionError("BUSY")
+
+    minter = FlightTrackMinter(mint, session_gap_s=60, flush_interval_s=60)
+    first = minter.observe(_position("ABC123"), now=0)
+    second = minter.observe(_position("ABC123"), now=120)
+
+    assert first.session_id != second.session_id
+    assert not await minter.flush()
+    assert minter.stats()["pending_sessions"] == 2
+    assert minter.stats()["mint_failures"] == 1
+    await minter.stop()
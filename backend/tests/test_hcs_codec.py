@@ -0,0 +1,60 @@
+import pytest
+
+from services import hcs_codec
+
+
+def _payload(icao="4840D6", sensors=("sensor_0", "sensor_1", "sensor_2")):
+    return {
+        "type": "mlat_position",
+        "icao": icao,
+        "latitude": 51.501234567,
+        "longitude": -0.098765432,
+        "altitude_ft": None,
+        "confidence": 93.456,
+        "sensor_count": len(sensors),
+        "sensor_ids": list(sensors),
+        "calculation_method": "TDOA",
+        "timestamp": "2026-01-02T03:04:05.123456+00:00",
+    }
+
+
+def test_position_round_trips_with_quantised_coordinates():
+    payload = _payload()
+    encoded = hcs_codec.encode(payload)
+    decoded = hcs_codec.decode(encoded)
+
+    assert len(encoded) < len(str(payload)) / 3
+    assert decoded["latitude"] == pytest.approx(payload["latitude"], abs=1e-7)
+    assert decoded["confidence"] == 93.46
+    assert decoded["timestamp"] == payload["timestamp"]
+    assert decoded["sensor_ids"] == payload["sensor_ids"]
+    assert hcs_codec.encode(decoded) == encoded  # canonical: decode/encode is stable
+
+
+def test_batches_merkle_roots_and_other_payloads():
+    batch = {"type": "mlat_position_batch", "deferred": True, "positions": [_payload(), _payload("ABCDEF")]}
+    assert [p["icao"] for p in hcs_codec.decode(hcs_codec.encode(batch))["positions"]] == ["4840D6", "ABCDEF"]
+    assert hcs_codec.decode(hcs_codec.encode(batch))["deferred"] is True
+
+    root = {
+        "type": "mlat_merkle_root", "batch_id": 3, "root": "ab" * 32, "leaf_count": 12, "hash": "sha256",
+        "window_start": "2026-01-02T03:04:05+00:00", "window_end": "2026-01-02T03:04:06+00:00",
+    }
+    assert hcs_codec.decode(hcs_codec.encode(root)) == root
+
+    # Not a 24-bit ICAO, or not a known layout: lossless canonical JSON
+    odd = _payload(icao="NOPE00")
+    assert hcs_codec.decode(hcs_codec.encode(odd)) == odd
+    assert hcs_codec.decode(hcs_codec.encode({"skill": "python", "score": 9})) == {"skill": "python", "score": 9}
+
+
+def test_split_positions_respects_message_size():
+    payloads = [_payload() for _ in range(40)]
+    groups = hcs_codec.split_positions(payloads, max_bytes=1024, max_positions=32)
+
+    assert [idx for group in groups for idx in group] == list(range(40))
+    for group in groups:
+        message = hcs_codec.encode({"type": "mlat_position_batch", "positions": [payloads[idx] for idx in group]})
+        assert len(message) <= 1024
+    with pytest.raises(hcs_codec.HCSMessageTooLarge):
+        hcs_codec.ensure_fits(b"x" * (hcs_codec.HCS_CHUNK_BYTES * hcs_codec.HCS_MAX_CHUNKS + 1))
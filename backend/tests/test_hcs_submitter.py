@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import hcs_codec
+from services.adaptive_limiter import AdaptiveLimiter
+from services.hcs_submitter import HCSSubmitter
+
+
+class FakeTopic:
+    """Hands out sequence numbers at submit time; receipts block until released."""
+
+    def __init__(self):
+        self.sequence = 0
+        self.messages = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def topic_configured(self, topic_id=None):
+        return True
+
+    def prepare_topic_message(self, message, topic_id=None):
+        def _send():
+            self.sequence += 1
+            self.messages.append(hcs_codec.decode(message))
+            return self.sequence
+
+        return _send
+
+    def topic_receipt(self, response):
+        self.release.wait(5)
+        if response == 2:
+            raise RuntimeError("BUSY")
+        return response
+
+
+@pytest.mark.asyncio
+async def test_submits_run_ahead_of_receipts_up_to_the_window():
+    topic = FakeTopic()
+    topic.release.clear()
+    submitter = HCSSubmitter(topic, limiter=AdaptiveLimiter(initial=3, max_limit=3))
+
+    receipts = [await submitter.submit({"type": "note", "n": n}) for n in range(3)]
+    assert submitter.limiter.in_flight == 3
+    blocked = asyncio.ensure_future(submitter.submit({"type": "note", "n": 3}))
+    await asyncio.sleep(0.05)
+    assert not blocked.done() and len(topic.messages) == 3
+
+    topic.release.set()
+    receipts.append(await blocked)
+    results = await asyncio.gather(*receipts, return_exceptions=True)
+    await submitter.drain()
+
+    assert results[0] == 1 and results[2] == 3 and results[3] == 4
+    assert isinstance(results[1], RuntimeError)
+    assert [message["n"] for message in topic.messages] == [0, 1, 2, 3]
+    stats = submitter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["submitted"] == 4 and stats["confirmed"] == 3 and stats["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stub_mode_uses_local_sequences():
+    class Stub:
+        def topic_configured(self, topic_id=None):
+            return False
+
+        async def log_evaluation(self, payload, topic_id=None):
+            return 7
+
+    assert await HCSSubmitter(Stub()).log({"type": "note"}) == 7
+
+
+@pytest.mark.asyncio
+async def test_send_that_timed_out_after_acceptance_is_resent_with_the_same_transaction_id():
+    class TimeoutAfterAccept:
+        """The network takes the first send but the answer never arrives; it dedupes by transaction ID."""
+
+        def __init__(self):
+            self.prepared = 0
+            self.sent = []
+            self.accepted = {}
+            self.receipts = 0
+
+        def topic_configured(self, topic_id=None):
+            return True
+
+        def prepare_topic_message(self, message, topic_id=None):
+            self.prepared += 1
+            transaction_id = f"0.0.2@{self.prepared}.0"
+
+            def _send():
+                self.sent.append(transaction_id)
+                if transaction_id not in self.accepted:
+                    self.accepted[transaction_id] = len(self.accepted) + 1
+                    raise TimeoutError("no answer from node")
+                return transaction_id
+
+            return _send
+
+        def topic_receipt(self, transaction_id):
+            self.receipts += 1
+            if self.receipts == 1:
+                raise TimeoutError("receipt query timed out")
+            return self.accepted[transaction_id]
+
+    topic = TimeoutAfterAccept()
+    submitter = HCSSubmitter(topic, limiter=AdaptiveLimiter(initial=2, max_limit=2))
+
+    assert await submitter.log({"type": "note"}) == 1
+    await submitter.drain()
+
+    assert topic.prepared == 1 and topic.sent == ["0.0.2@1.0"] * 2
+    assert list(topic.accepted) == ["0.0.2@1.0"] and topic.receipts == 2
+    assert submitter.stats()["confirmed"] == 1 and submitter.stats()["failed"] == 0
@@ -0,0 +1,35 @@
+import zlib
+
+from services.hcs_topics import ROUTING_REGION, TopicRouter
+
+
+def test_icao_routing_is_a_stable_hash():
+    router = TopicRouter(["0.0.1", "0.0.2", "0.0.3"])
+
+    for icao in ("ABC123", "4CA2D1", "A00001"):
+        expected = router.topic_ids[zlib.crc32(icao.encode()) % 3]
+        assert router.topic_for(icao.lower(), longitude=10.0) == expected
+        assert router.topic_for(icao, longitude=-120.0) == expected
+
+
+def test_region_routing_uses_longitude_sectors():
+    router = TopicRouter(["0.0.1", "0.0.2", "0.0.3", "0.0.4"], routing=ROUTING_REGION, primary="0.0.9")
+
+    assert router.topic_for("ABC123", longitude=-100.0) == "0.0.1"
+    assert router.topic_for("ABC123", longitude=-80.0) == "0.0.2"
+    assert router.topic_for("ABC123", longitude=-0.1) == "0.0.2"
+    assert router.topic_for("ABC123", longitude=0.1) == "0.0.3"
+    assert router.topic_for("ABC123", longitude=180.0) == "0.0.1"
+    mapping = router.mapping()
+    assert mapping["primaryTopicId"] == "0.0.9"
+    assert mapping["topics"][2] == {"index": 2, "topicId": "0.0.3", "longitudeFrom": 0.0, "longitudeTo": 90.0}
+
+
+def test_single_topic_from_env(monkeypatch):
+    monkeypatch.delenv("HCS_TOPIC_IDS", raising=False)
+    monkeypatch.setenv("HCS_TOPIC_ID", "0.0.7")
+
+    router = TopicRouter.from_env()
+
+    assert router.topic_ids == ["0.0.7"] and router.primary == "0.0.7"
+    assert router.topic_for("ABC123", 50.0) == "0.0.7"
@@ -0,0 +1,70 @@
+import pytest
+
+from services import hedera_client
+from services.hedera_client import HederaClientProvider
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.pings = 0
+        self.closed = False
+
+    def pingAll(self):
+        self.pings += 1
+        if self.fail:
+            raise RuntimeError("node 0.0.3 unreachable")
+
+    def getNetwork(self):
+        return {"35.237.200.180:50211": "0.0.3", "34.239.82.6:50211": "0.0.4"}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeService:
+    simulator = None
+
+    def __init__(self, client):
+        self.client = client
+
+
+@pytest.mark.asyncio
+async def test_start_builds_once_and_warms_the_channels():
+    client = FakeClient()
+    built = []
+    provider = HederaClientProvider(factory=lambda: built.append(1) or FakeService(client))
+
+    service = await provider.start()
+
+    assert provider.service is service and built == [1]
+    assert client.pings == 1
+    health = provider.health()
+    assert health["state"] == "warm" and health["nodes"] == 2 and health["warmup_ms"] is not None
+
+    provider.close()
+    assert client.closed and provider.health()["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_reported_but_keeps_the_client():
+    client = FakeClient(fail=True)
+    provider = HederaClientProvider(factory=lambda: FakeService(client))
+
+    service = await provider.start()
+
+    assert service.client is client
+    health = provider.health()
+    assert health["state"] == "degraded" and "unreachable" in health["last_error"]
+
+
+@pytest.mark.asyncio
+async def test_stub_mode_is_shared_and_not_warmed(monkeypatch):
+    for name in ("HEDERA_OPERATOR_ID", "HEDERA_OPERATOR_KEY", "HEDERA_BACKEND"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(hedera_client, "_provider", None)
+
+    await hedera_client.get_hedera_provider().start()
+
+    assert hedera_client.get_hedera_service() is hedera_client.get_hedera_service()
+    assert hedera_client.get_hedera_provider().health()["state"] == "stub"
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from hedera_logger import HederaLogger
+
+
+class FakeService:
+    def __init__(self, fail_on=None):
+        self.messages = []
+        self.active = 0
+        self.peak = 0
+        self.fail_on = fail_on
+
+    async def submit_topic_message(self, topic_id, message):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        sequence = len(self.messages) + 1
+        self.messages.append(json.loads(message))
+        # Finish in reverse order of submission
+        await asyncio.sleep(0.01 * (10 - sequence))
+        self.active -= 1
+        if self.fail_on is not None and sequence == self.fail_on:
+            raise RuntimeError("INVALID_TOPIC_ID")
+        return {"sequence_number": sequence, "transaction_id": f"tx-{sequence}", "consensus_timestamp": None}
+
+
+def _logger(service, **kwargs):
+    return HederaLogger(operator_id="0.0.1", operator_key="key", service=service, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_log_batch_is_concurrent_bounded_and_ordered():
+    service = FakeService(fail_on=3)
+    logger = _logger(service, max_concurrency=3)
+    positions = [{"icao": f"A{n}"} for n in range(6)]
+
+    results = await logger.log_batch("0.0.5", positions)
+
+    assert service.peak == 3
+    assert [message["icao"] for message in service.messages] == [p["icao"] for p in positions]
+    assert [result.sequence_number for result in results] == [1, 2, None, 4, 5, 6]
+    assert not results[2].success and "INVALID_TOPIC_ID" in results[2].error
+    assert logger.service is service
+
+
+@pytest.mark.asyncio
+async def test_log_batch_packs_positions_into_shared_messages():
+    service = FakeService()
+    logger = _logger(service)
+    positions = [{"icao": f"A{n}", "latitude": 51.5, "longitude": -0.1} for n in range(10)]
+
+    results = await logger.log_batch("0.0.5", positions, pack=True, max_message_bytes=200)
+
+    assert all(len(json.dumps(message)) <= 200 for message in service.messages)
+    assert [p for message in service.messages for p in message["positions"]] == positions
+    assert len(service.messages) < len(positions)
+    first = len(service.messages[0]["positions"])
+    assert {result.sequence_number for result in results[:first]} == {1}
+    assert [result.batch_index for result in results[:first]] == list(range(first))
+    assert results[first].sequence_number == 2 and results[first].batch_index == 0
@@ -47,3 +47,19 @@ async def test_mint_skill_token(mocker):
     service = HederaService()
     result = await service.mint_skill_token("0.0.7", 100)
     assert result == "0.0.123"
+
+
+def test_resend_of_an_accepted_transaction_goes_on_to_its_receipt(mocker):
+    from services.hedera_service import _AcceptedTransaction, _sender
+
+    transaction = mocker.Mock()
+    transaction.execute.side_effect = [TimeoutError("no answer"), RuntimeError("PrecheckStatusException: DUPLICATE_TRANSACTION")]
+    transaction.get_transaction_id.return_value = "0.0.2@1.0"
+    send = _sender(transaction, client=object())
+
+    with pytest.raises(TimeoutError):
+        send()
+    response = send()
+
+    assert isinstance(response, _AcceptedTransaction) and response.transactionId == "0.0.2@1.0"
+    assert transaction.execute.call_count == 2
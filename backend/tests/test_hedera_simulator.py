@@ -0,0 +1,121 @@
+import pytest
+
+from services import hcs_codec, hedera_simulator
+from services.adaptive_limiter import is_throttle
+from services.hedera_service import HederaService
+from services.hedera_simulator import HederaSimulator, LatencyModel, SimulatedStatusError
+
+
+def _fast(**kwargs):
+    return HederaSimulator(
+        submit_latency=LatencyModel("fixed", 0),
+        consensus_latency=kwargs.pop("consensus_latency", LatencyModel("fixed", 1)),
+        seed=3,
+        **kwargs,
+    )
+
+
+def test_sequence_numbers_follow_consensus_order():
+    simulator = _fast(consensus_latency=LatencyModel("uniform", 20, 0.9))
+    responses = [simulator.submit_message("0.0.5", f"m{n}".encode()) for n in range(20)]
+    consensus_order = sorted(range(20), key=lambda n: simulator._consensus_at[responses[n].transaction_id])
+
+    receipts = [response.get_receipt() for response in responses]
+
+    assert sorted(r.topic_sequence_number for r in receipts) == list(range(1, 21))
+    messages = simulator.topic_messages("0.0.5")
+    assert [message for _, message in messages] == [f"m{n}".encode() for n in consensus_order]
+    for n, receipt in enumerate(receipts):
+        assert messages[receipt.topic_sequence_number - 1] == (receipt.topic_sequence_number, f"m{n}".encode())
+
+
+def test_busy_injection_and_capacity_throttle():
+    busy = _fast(busy_rate=1.0)
+    with pytest.raises(SimulatedStatusError) as exc_info:
+        busy.submit_message("0.0.5", b"x")
+    assert exc_info.value.status == "BUSY" and is_throttle(exc_info.value)
+
+    limited = _fast(capacity_tps=3)
+    for _ in range(3):
+        limited.submit_message("0.0.5", b"x")
+    with pytest.raises(SimulatedStatusError):
+        limited.submit_message("0.0.5", b"x")
+    assert limited.stats()["busy"] == 1 and limited.stats()["submitted"] == 3
+
+
+def test_mints_return_supply_and_serials():
+    simulator = _fast()
+    assert simulator.mint("0.0.9", amount=40).get_receipt().total_supply == 40
+    assert simulator.mint("0.0.9", amount=2).get_receipt().total_supply == 42
+    assert simulator.mint("0.0.8", metadata=[b"a", b"b"]).get_receipt().serials == [1, 2]
+    assert simulator.mint("0.0.8", metadata=[b"c"]).get_receipt().serials == [3]
+
+
+@pytest.mark.asyncio
+async def test_hedera_service_runs_against_the_simulator(monkeypatch):
+    simulator = _fast()
+    monkeypatch.setattr(hedera_simulator, "_simulator", simulator)
+    monkeypatch.setenv("HEDERA_BACKEND", "simulator")
+    monkeypatch.delenv("HCS_TOPIC_ID", raising=False)
+    monkeypatch.delenv("HCS_TOPIC_IDS", raising=False)
+
+    service = HederaService()
+
+    assert service.client is simulator
+    assert await service.log_evaluation({"type": "note", "n": 1}) == 1
+    assert await service.log_evaluation({"type": "note", "n": 2}) == 2
+    (sequence, message), _ = simulator.topic_messages(hedera_simulator.DEFAULT_TOPIC_ID)
+    assert sequence == 1 and hcs_codec.decode(message) == {"type": "note", "n": 1}
+    minted = await service.mint_token("0.0.8", b"{}")
+    assert minted["serial_number"] == 1 and minted["transaction_id"].startswith(simulator.operator_id + "@")
+    assert await service.mint_skill_token("0.0.3", 50) == hedera_simulator.DEFAULT_TOKEN_ID
+
+
+@pytest.mark.asyncio
+async def test_receipt_timeout_retries_the_receipt_not_the_mint(monkeypatch):
+    simulator = _fast()
+    monkeypatch.setattr(hedera_simulator, "_simulator", simulator)
+    monkeypatch.setenv("HEDERA_BACKEND", "simulator")
+    receipt = simulator.receipt
+    lookups = []
+
+    def _slow_once(transaction_id):
+        lookups.append(transaction_id)
+        if len(lookups) == 1:
+            raise TimeoutError("receipt query timed out")
+        return receipt(transaction_id)
+
+    monkeypatch.setattr(simulator, "receipt", _slow_once)
+    service = HederaService()
+
+    minted = await service.mint_token("0.0.8", b"{}")
+
+    assert minted["serial_number"] == 1
+    assert simulator.stats()["submitted"] == 1
+    assert lookups == [minted["transaction_id"]] * 2
+
+
+@pytest.mark.asyncio
+async def test_busy_receipt_lookup_does_not_post_the_message_twice(monkeypatch):
+    simulator = _fast()
+    monkeypatch.setattr(hedera_simulator, "_simulator", simulator)
+    monkeypatch.setenv("HEDERA_BACKEND", "simulator")
+    monkeypatch.delenv("HCS_TOPIC_ID", raising=False)
+    monkeypatch.delenv("HCS_TOPIC_IDS", raising=False)
+    receipt = simulator.receipt
+    lookups = []
+
+    def _busy_once(transaction_id):
+        lookups.append(transaction_id)
+        if len(lookups) == 1:
+            raise SimulatedStatusError("BUSY", transaction_id)
+        return receipt(transaction_id)
+
+    monkeypatch.setattr(simulator, "receipt", _busy_once)
+    service = HederaService()
+
+    result = await service.submit_topic_message(hedera_simulator.DEFAULT_TOPIC_ID, b"hello")
+
+    assert result["sequence_number"] == 1
+    assert lookups == [result["transaction_id"]] * 2
+    assert simulator.topic_messages(hedera_simulator.DEFAULT_TOPIC_ID) == [(1, b"hello")]
@@ -0,0 +1,36 @@
+from services.load_governor import DegradationMode, LoadGovernor
+
+
+def test_escalates_one_level_per_step_and_recovers_after_cooldown():
+    governor = LoadGovernor(queue_high=10, step_s=1.0, cooldown_s=5.0)
+
+    assert governor.update(20, now=0.0) is DegradationMode.NO_AI
+    assert governor.update(20, now=0.5) is DegradationMode.NO_AI
+    assert governor.update(20, now=1.0) is DegradationMode.NO_MINT
+    assert governor.update(20, now=2.0) is DegradationMode.DEFER_HCS
+    assert governor.update(20, now=3.0) is DegradationMode.DEFER_HCS
+    assert not governor.allows_hcs
+
+    # Between the recovery and overload thresholds nothing changes
+    assert governor.update(7, now=10.0) is DegradationMode.DEFER_HCS
+    assert governor.update(2, now=10.0) is DegradationMode.NO_MINT
+    assert governor.update(2, now=12.0) is DegradationMode.NO_MINT
+    assert governor.update(2, now=15.0) is DegradationMode.NO_AI
+    assert governor.allows_mint and not governor.allows_ai
+
+    assert governor.stats()["transitions"] == {
+        "NORMAL->NO_AI": 1,
+        "NO_AI->NO_MINT": 1,
+        "NO_MINT->DEFER_HCS": 1,
+        "DEFER_HCS->NO_MINT": 1,
+        "NO_MINT->NO_AI": 1,
+    }
+
+
+def test_latency_above_slo_triggers_shedding():
+    governor = LoadGovernor(latency_slo_ms=100, latency_alpha=1.0)
+    governor.observe_latency(250)
+
+    assert governor.update(0, now=0.0) is DegradationMode.NO_AI
+    governor.record_shed("ai", 3)
+    assert governor.stats()["shed"] == {"ai": 3}
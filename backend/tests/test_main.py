@@ -7,3 +7,32 @@ def test_root():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "SynapseWorth Backend API"}
+
+def test_mlat_routes_are_mounted():
+    paths = app.openapi()["paths"]
+    assert "/api/mlat/process-batch" in paths and "/api/mlat/interest" in paths
+    assert client.get("/api/mlat/runtime").json() == {"running": False, "stages": {}}
+
+
+def test_mlat_metrics_are_served_to_prometheus():
+    response = client.get("/api/mlat/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE mlat_stage_latency_seconds histogram" in response.text
+
+
+def test_mlat_proof_and_topic_routes_are_served():
+    response = client.get("/api/mlat/proof/abc123", params={"calculatedAt": "2024-01-01T00:00:00+00:00"})
+    assert response.status_code == 404
+    assert client.get("/api/mlat/hcs/topics").status_code == 200
+
+def test_importing_the_mlat_router_does_not_build_the_pipeline(monkeypatch):
+    import importlib
+
+    import routers.mlat
+    from services import mlat_pipeline
+
+    monkeypatch.setattr(mlat_pipeline, "_pipeline", None)
+    importlib.reload(routers.mlat)
+    # Built by the lifespan (or the first request), after the shared clients are warmed
+    assert mlat_pipeline._pipeline is None
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from services.merkle_notary import MerkleNotary, MerkleTree, leaf_hash, verify_proof
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8])
+def test_every_leaf_proves_against_the_root(count):
+    leaves = [leaf_hash({"icao": "ABC123", "n": n}) for n in range(count)]
+    tree = MerkleTree(leaves)
+
+    for idx, leaf in enumerate(leaves):
+        assert verify_proof(leaf, tree.proof(idx), tree.root)
+    assert not verify_proof(leaf_hash({"icao": "ABC123", "n": 99}), tree.proof(0), tree.root)
+
+
+@pytest.mark.asyncio
+async def test_window_submits_one_root_and_keeps_proofs():
+    roots = []
+
+    async def submit(message, topic_id=None):
+        roots.append(message)
+        return 41
+
+    notary = MerkleNotary(submit, window_s=60)
+    payloads = [{"icao": f"A{n}", "timestamp": "t"} for n in range(3)]
+    tasks = [asyncio.ensure_future(notary.add(f"A{n}", payload)) for n, payload in enumerate(payloads)]
+    await asyncio.sleep(0)
+    await notary.stop()
+
+    assert [await task for task in tasks] == [41, 41, 41]
+    assert len(roots) == 1 and roots[0]["leaf_count"] == 3
+    proof = await notary.proof("A1")
+    assert proof["hederaSequenceNumber"] == 41
+    assert proof["root"] == roots[0]["root"]
+    assert verify_proof(bytes.fromhex(proof["leafHash"]), proof["proof"], bytes.fromhex(proof["root"]))
+    assert proof["leaf"] == payloads[1]
+
+
+@pytest.mark.asyncio
+async def test_proofs_are_rebuilt_from_stored_leaves_after_a_restart():
+    roots, leaves = {}, {}
+
+    async def submit(message, topic_id=None):
+        return 7
+
+    async def store(root, rows):
+        roots[root["root"]] = root
+        for row in rows:
+            leaves[(row["root"], row["leaf_index"])] = row
+
+    async def load(key):
+        leaf = next((row for row in leaves.values() if row["proof_key"] == key), None)
+        if leaf is None:
+            return None
+        hashes = [leaves[(leaf["root"], idx)]["leaf_hash"] for idx in range(roots[leaf["root"]]["leaf_count"])]
+        return {"root": roots[leaf["root"]], "leaf": leaf, "leaf_hashes": hashes}
+
+    notary = MerkleNotary(submit, window_s=60, store_batch=store)
+    payloads = [{"icao": f"A{n}", "timestamp": "t"} for n in range(5)]
+    tasks = [asyncio.ensure_future(notary.add(f"A{n}", payload)) for n, payload in enumerate(payloads)]
+    await asyncio.sleep(0)
+    await notary.stop()
+    await asyncio.gather(*tasks)
+    live = await notary.proof("A3")
+
+    restarted = MerkleNotary(submit, window_s=60, load_batch=load)
+    proof = await restarted.proof("A3")
+
+    assert len(leaves) == 5 and proof == live
+    assert verify_proof(bytes.fromhex(proof["leafHash"]), proof["proof"], bytes.fromhex(proof["root"]))
+    assert await restarted.proof("missing") is None
+    assert restarted.stats()["proofs_from_storage"] == 1
+
+
+@pytest.mark.asyncio
+async def test_each_topic_gets_its_own_window_and_root():
+    roots = []
+
+    async def submit(message, topic_id=None):
+        roots.append((topic_id, message["leaf_count"]))
+        return len(roots)
+
+    notary = MerkleNotary(submit, window_s=60)
+    tasks = [
+        asyncio.ensure_future(notary.add(f"A{n}", {"icao": f"A{n}", "timestamp": "t"}, "0.0.1" if n % 2 else "0.0.2"))
+        for n in range(5)
+    ]
+    await asyncio.sleep(0)
+    assert notary.stats()["open_windows"] == 2
+    await notary.stop()
+    await asyncio.gather(*tasks)
+
+    assert sorted(roots) == [("0.0.1", 2), ("0.0.2", 3)]
+    assert (await notary.proof("A1"))["hederaTopicId"] == "0.0.1"
+    assert (await notary.proof("A2"))["hederaTopicId"] == "0.0.2"
@@ -0,0 +1,58 @@
+from models import ModeSMessage, SensorLocation
+from services.message_store import MessageWindowStore
+
+
+def _message(icao, sensor_id, timestamp_ns):
+    return ModeSMessage(
+        sensorId=sensor_id,
+        icaoAddress=icao,
+        rawMessage="8d4840d6202cc371c32ce0576098",
+        timestampNs=timestamp_ns,
+        sensorLocation=SensorLocation(latitude=51.5, longitude=-0.1),
+    )
+
+
+def test_returns_window_relative_to_newest_message():
+    store = MessageWindowStore()
+    store.add_messages([
+        _message("abc123", "s1", 1_000_000_000),
+        _message("ABC123", "s2", 3_500_000_000),
+        _message("abc123", "s3", 4_000_000_000),
+    ], now=0.0)
+
+    observations = store.recent_observations("Abc123", time_window_ms=1000)
+
+    assert [obs["sensor_id"] for obs in observations] == ["s2", "s3"]
+    assert observations[0]["latitude"] == 51.5
+
+
+def test_keeps_out_of_order_messages_sorted():
+    store = MessageWindowStore()
+    store.add_messages([
+        _message("ABC123", "s1", 300),
+        _message("ABC123", "s2", 100),
+        _message("ABC123", "s3", 200),
+    ], now=0.0)
+
+    observations = store.recent_observations("ABC123", time_window_ms=1)
+
+    assert [obs["timestamp_ns"] for obs in observations] == [100, 200, 300]
+
+
+def test_bounds_messages_per_aircraft_and_retention():
+    store = MessageWindowStore(max_messages_per_icao=3, retention_ms=10)
+    store.add_messages([_message("ABC123", f"s{i}", i * 1_000_000) for i in range(6)], now=0.0)
+    assert len(store.recent_observations("ABC123", time_window_ms=1000)) == 3
+
+    store.add_messages([_message("ABC123", "late", 100_000_000)], now=0.0)
+    assert [obs["sensor_id"] for obs in store.recent_observations("ABC123", 1000)] == ["late"]
+
+
+def test_evicts_idle_aircraft():
+    store = MessageWindowStore(idle_ttl_s=10)
+    store.add_messages([_message("ABC123", "s1", 1)], now=0.0)
+    store.add_messages([_message("DEF456", "s1", 1)], now=8.0)
+
+    assert store.evict_idle(now=15.0) == 1
+    assert store.recent_observations("ABC123", 1000) == []
+    assert store.stats()["aircraft"] == 1
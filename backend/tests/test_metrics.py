@@ -0,0 +1,35 @@
+import pytest
+
+from services.metrics import StageMetrics
+
+
+def test_histogram_buckets_and_outcomes_render_as_prometheus():
+    metrics = StageMetrics("mlat", buckets=(0.01, 0.1))
+    metrics.observe("solve", 0.005)
+    metrics.observe("solve", 0.1)
+    metrics.observe("solve", 0.5, outcome="no_solution")
+    metrics.count("solve", "insufficient_sensors")
+
+    text = metrics.render_prometheus()
+
+    assert 'mlat_stage_latency_seconds_bucket{stage="solve",le="0.01"} 1' in text
+    assert 'mlat_stage_latency_seconds_bucket{stage="solve",le="0.1"} 2' in text
+    assert 'mlat_stage_latency_seconds_bucket{stage="solve",le="+Inf"} 3' in text
+    assert 'mlat_stage_latency_seconds_count{stage="solve"} 3' in text
+    assert 'mlat_stage_outcomes_total{stage="solve",outcome="insufficient_sensors"} 1' in text
+    stats = metrics.stats()["solve"]
+    assert stats["outcomes"] == {"success": 2, "no_solution": 1, "insufficient_sensors": 1}
+    assert stats["p50_ms"] == 100.0
+    assert stats["max_ms"] == 500.0
+
+
+def test_timer_counts_exceptions_by_type():
+    metrics = StageMetrics("mlat")
+    with pytest.raises(TimeoutError):
+        with metrics.time("supabase_insert"):
+            raise TimeoutError()
+    with metrics.time("supabase_insert") as timer:
+        timer.fail("empty")
+
+    assert metrics.stats()["supabase_insert"]["outcomes"] == {"TimeoutError": 1, "empty": 1}
+    assert metrics.stats()["supabase_insert"]["count"] == 2
@@ -0,0 +1,344 @@
+import asyncio
+
+import pytest
+
+from models import MLATBatchProcessRequest, MLATProcessRequest, ModeSMessage, SensorLocation
+from services import hcs_codec, hedera_client
+from services.load_governor import DegradationMode
+from services.mlat_pipeline import MLATPipelineService
+from services.mlat_solver import MLATSolver
+
+
+SENSORS = [
+    ("sensor_0", 51.52, -0.12),
+    ("sensor_1", 51.48, -0.15),
+    ("sensor_2", 51.55, -0.05),
+]
+
+
+def _message_rows(icao, aircraft_lat, aircraft_lon, base_timestamp=1_700_000_000_000_000_000):
+    solver = MLATSolver()
+    distances = [
+        solver.geod.inv(aircraft_lon, aircraft_lat, lon, lat)[2]
+        for _, lat, lon in SENSORS
+    ]
+    return [
+        {
+            "icao_address": icao,
+            "sensor_id": sensor_id,
+            "sensor_lat": lat,
+            "sensor_lon": lon,
+            "sensor_alt_m": None,
+            "timestamp_ns": int(base_timestamp + (distance - distances[0]) / solver.speed_of_light * 1e9),
+        }
+        for (sensor_id, lat, lon), distance in zip(SENSORS, distances)
+    ]
+
+
+def _mode_s_messages(icao, aircraft_lat, aircraft_lon):
+    return [
+        ModeSMessage(
+            sensorId=row["sensor_id"],
+            icaoAddress=icao,
+            rawMessage="8d4840d6202cc371c32ce0576098",
+            timestampNs=row["timestamp_ns"],
+            sensorLocation=SensorLocation(latitude=row["sensor_lat"], longitude=row["sensor_lon"]),
+        )
+        for row in _message_rows(icao, aircraft_lat, aircraft_lon)
+    ]
+
+
+def _mock_supabase(mocker, messages_by_icao):
+    supabase = mocker.Mock(is_configured=True)
+    supabase.fetch_recent_messages_bulk.return_value = messages_by_icao
+    supabase.fetch_subscribed_sensor_counts.return_value = {}
+    return supabase
+
+
+@pytest.fixture
+def pipeline(monkeypatch, mocker):
+    for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "HEDERA_OPERATOR_ID", "HEDERA_OPERATOR_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MLAT_WRITE_BEHIND", "false")
+    monkeypatch.setenv("MLAT_MERKLE_WINDOW_MS", "0")
+    # Fresh shared Hedera client per test; tests swap its client and topics
+    monkeypatch.setattr(hedera_client, "_provider", None)
+    service = MLATPipelineService()
+    mocker.patch.object(service, "_schedule_ai_analysis", mocker.AsyncMock())
+    return service
+
+
+@pytest.mark.asyncio
+async def test_process_mlat_batch_fetches_and_stores_once(pipeline, mocker):
+    supabase = _mock_supabase(mocker, {
+        "ABC123": _message_rows("ABC123", 51.50, -0.10),
+        "DEF456": _message_rows("DEF456", 51.51, -0.11),
+    })
+    pipeline.supabase = supabase
+
+    response = await pipeline.process_mlat_batch(
+        MLATBatchProcessRequest(icaoAddresses=["ABC123", "DEF456", "FFF000"])
+    )
+
+    assert [r.icaoAddress for r in response.results] == ["ABC123", "DEF456", "FFF000"]
+    assert [r.success for r in response.results] == [True, True, False]
+    assert response.solvedCount == 2
+    assert response.results[0].position.latitude == pytest.approx(51.50, abs=0.01)
+    supabase.fetch_recent_messages_bulk.assert_called_once()
+    stored = supabase.batch_store_aircraft_positions.call_args.args[0]
+    assert [p.icaoAddress for p in stored] == ["ABC123", "DEF456"]
+
+
+@pytest.mark.asyncio
+async def test_process_mlat_batch_packs_hcs_logs(pipeline, mocker):
+    supabase = _mock_supabase(mocker, {
+        icao: _message_rows(icao, 51.50, -0.10) for icao in ("A1", "A2", "A3")
+    })
+    pipeline.supabase = supabase
+    pipeline.hcs_batch_size = 2
+    pipeline.hedera.client = object()
+    log = mocker.patch.object(pipeline.hedera, "log_evaluation", mocker.AsyncMock(side_effect=[10, 11]))
+
+    response = await pipeline.process_mlat_batch(MLATBatchProcessRequest(icaoAddresses=["A1", "A2", "A3"]))
+
+    assert log.await_count == 2
+    assert [len(call.args[0]["positions"]) for call in log.await_args_list] == [2, 1]
+    assert [r.hederaSequenceNumber for r in response.results] == [10, 10, 11]
+
+
+@pytest.mark.asyncio
+async def test_process_mlat_solves_from_ingested_messages_without_database(pipeline):
+    messages = _mode_s_messages("abc123", 51.50, -0.10)
+
+    response = await pipeline.process_mlat(MLATProcessRequest(icaoAddress="abc123", messages=messages))
+
+    assert response.success
+    assert response.storedMessageCount == 3
+    assert response.position.icaoAddress == "ABC123"
+    assert response.position.longitude == pytest.approx(-0.10, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_hcs_logging_is_deferred_under_load_and_drained_later(pipeline, mocker):
+    pipeline.hedera.client = object()
+    log = mocker.patch.object(pipeline.hedera, "log_evaluation", mocker.AsyncMock(return_value=42))
+    pipeline.governor.mode = DegradationMode.DEFER_HCS
+    position, _ = await pipeline._solve("ABC123", pipeline._observations_from_rows(_message_rows("ABC123", 51.5, -0.1)))
+
+    await pipeline._notarize_positions([(position, [])])
+    assert log.await_count == 0
+    assert position.hederaSequenceNumber is None
+    assert pipeline.health()["load_governor"]["deferred_hcs_pending"] == 1
+
+    pipeline.governor.mode = DegradationMode.NORMAL
+    pipeline._refresh_load_mode()
+    await pipeline._drain_task
+
+    assert log.await_args.args[0]["deferred"] is True
+    assert position.hederaSequenceNumber == 42
+    assert pipeline.health()["load_governor"]["deferred_hcs_drained"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_process_calls_share_one_solve(pipeline, mocker):
+    await pipeline.ingest_messages(_mode_s_messages("ABC123", 51.50, -0.10))
+    solve = mocker.spy(pipeline.solver, "solve_position")
+
+    responses = await asyncio.gather(*(
+        pipeline.process_mlat(MLATProcessRequest(icaoAddress="ABC123")) for _ in range(3)
+    ))
+
+    assert all(response.success for response in responses)
+    assert solve.call_count == 1
+    assert pipeline.health()["coalescing"]["coalesced_requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_resolve_is_skipped_within_interval_unless_sensors_change(pipeline, mocker):
+    pipeline.min_resolve_interval_s = 60
+    await pipeline.ingest_messages(_mode_s_messages("ABC123", 51.50, -0.10))
+    solve = mocker.spy(pipeline.solver, "solve_position")
+
+    first = await pipeline.process_mlat(MLATProcessRequest(icaoAddress="ABC123"))
+    second = await pipeline.process_mlat(MLATProcessRequest(icaoAddress="ABC123"))
+    assert solve.call_count == 1
+    assert second.message.startswith("MLAT solution reused")
+    assert second.position == first.position
+
+    extra = _mode_s_messages("ABC123", 51.50, -0.10)[0].model_copy(update={"sensorId": "sensor_9"})
+    await pipeline.process_mlat(MLATProcessRequest(icaoAddress="ABC123", messages=[extra]))
+    assert solve.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_stage_latency_is_reported_in_health(pipeline):
+    await pipeline.process_mlat(MLATProcessRequest(icaoAddress="NOPE00"))
+    await pipeline.process_mlat(
+        MLATProcessRequest(icaoAddress="ABC123", messages=_mode_s_messages("ABC123", 51.50, -0.10))
+    )
+
+    stages = pipeline.health()["stages"]
+    assert stages["solve"]["outcomes"] == {"insufficient_sensors": 1, "success": 1}
+    assert stages["solve"]["count"] == 1
+    assert stages["process"]["count"] == 2
+    assert 'stage="solve"' in pipeline.metrics.render_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_ai_analysis_runs_in_process_without_http(pipeline, mocker):
+    assess = mocker.patch("services.mlat_pipeline.assess_track")
+    mocker.patch("services.mlat_pipeline.get_groq")
+    position, _ = await pipeline._solve("ABC123", pipeline._observations_from_rows(_message_rows("ABC123", 51.5, -0.1)))
+
+    await pipeline._analyse_track("ABC123", position)
+
+    request = assess.call_args.args[0]
+    assert request.icao == "ABC123"
+    assert [point.lat for point in request.track] == [position.latitude]
+    assert request.track[0].confidence <= 1
+
+
+@pytest.mark.asyncio
+async def test_recent_track_is_served_from_memory(pipeline, mocker):
+    pipeline.supabase = _mock_supabase(mocker, {})
+    rows = pipeline._observations_from_rows(_message_rows("ABC123", 51.5, -0.1))
+    first, _ = await pipeline._solve("ABC123", rows)
+    second, _ = await pipeline._solve("ABC123", rows)
+
+    track = await pipeline.recent_track("abc123")
+
+    assert track == [first, second]
+    pipeline.supabase.fetch_recent_positions.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_fixes_are_not_notarized_again(pipeline, mocker):
+    pipeline.hedera.client = object()
+    log = mocker.patch.object(pipeline.hedera, "log_evaluation", mocker.AsyncMock(return_value=5))
+    rows = pipeline._observations_from_rows(_message_rows("ABC123", 51.5, -0.1))
+    first, _ = await pipeline._solve("ABC123", rows)
+    second, _ = await pipeline._solve("ABC123", rows)
+
+    await pipeline._notarize_positions([(first, rows), (second, rows)])
+
+    assert log.await_count == 1
+    assert second.hederaSequenceNumber is None
+    assert pipeline.health()["notarization"]["avoided"] == 1
+
+
+@pytest.mark.asyncio
+async def test_policy_decides_by_default_and_merkle_window_covers_every_fix(monkeypatch, mocker):
+    for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "HEDERA_OPERATOR_ID", "HEDERA_OPERATOR_KEY", "MLAT_MERKLE_WINDOW_MS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MLAT_WRITE_BEHIND", "false")
+    monkeypatch.setenv("MLAT_NOTARIZE_MIN_DISTANCE_M", "50")
+
+    async def notarize_twice():
+        monkeypatch.setattr(hedera_client, "_provider", None)
+        service = MLATPipelineService()
+        service.hedera.client = object()
+        log = mocker.patch.object(service.hedera, "log_evaluation", mocker.AsyncMock(return_value=3))
+        rows = service._observations_from_rows(_message_rows("ABC123", 51.5, -0.1))
+        first, _ = await service._solve("ABC123", rows)
+        second, _ = await service._solve("ABC123", rows)
+        await service._notarize_positions([(first, rows), (second, rows)])
+        await service.stop()
+        return service, log, [first, second]
+
+    default, log, positions = await notarize_twice()
+    assert default.merkle_notary is None and log.await_count == 1
+    assert [p.hederaSequenceNumber for p in positions] == [3, None]
+    assert default.health()["notarization"]["avoided"] == 1
+
+    monkeypatch.setenv("MLAT_MERKLE_WINDOW_MS", "10")
+    merkle, log, positions = await notarize_twice()
+    assert merkle.merkle_notary is not None and log.await_count == 1
+    assert [p.hederaSequenceNumber for p in positions] == [3, 3]
+    assert merkle.health()["notarization"]["avoided"] == 0
+
+
+@pytest.mark.asyncio
+async def test_merkle_window_notarizes_one_root_with_proofs(pipeline, mocker):
+    from services.merkle_notary import MerkleNotary
+
+    pipeline.hedera.client = object()
+    log = mocker.patch.object(pipeline.hedera, "log_evaluation", mocker.AsyncMock(return_value=9))
+    pipeline.merkle_notary = MerkleNotary(pipeline._log_hcs, window_s=0.01)
+    items = []
+    for icao in ("A1", "A2", "A3"):
+        rows = pipeline._observations_from_rows(_message_rows(icao, 51.5, -0.1))
+        position, _ = await pipeline._solve(icao, rows)
+        items.append((position, rows))
+    # An unchanged fix the movement filter would skip is still a leaf
+    rows = items[0][1]
+    repeat, _ = await pipeline._solve("A1", rows)
+    items.append((repeat, rows))
+
+    await pipeline._notarize_positions(items)
+    await pipeline.stop()
+
+    assert log.await_count == 1
+    assert log.await_args.args[0]["type"] == "mlat_merkle_root"
+    assert [position.hederaSequenceNumber for position, _ in items] == [9, 9, 9, 9]
+    proof = await pipeline.position_proof("a2", items[1][0].calculatedAt)
+    assert proof["leafCount"] == 4 and proof["leaf"]["icao"] == "A2"
+
+
+@pytest.mark.asyncio
+async def test_positions_are_sharded_across_hcs_topics(pipeline, mocker):
+    from services.hcs_topics import TopicRouter
+
+    pipeline.hedera.client = object()
+    pipeline.hedera.topics = TopicRouter(["0.0.11", "0.0.12"])
+    sent = []
+    mocker.patch.object(
+        pipeline.hedera, "prepare_topic_message",
+        side_effect=lambda message, topic_id: lambda: sent.append((topic_id, hcs_codec.decode(message))) or len(sent),
+    )
+    mocker.patch.object(pipeline.hedera, "topic_receipt", side_effect=lambda response: response)
+    items = []
+    for icao in ("A1", "A2", "A3", "A4"):
+        rows = pipeline._observations_from_rows(_message_rows(icao, 51.5, -0.1))
+        position, _ = await pipeline._solve(icao, rows)
+        items.append((position, rows))
+
+    await pipeline._notarize_positions(items)
+
+    topics = {topic_id: [p["icao"] for p in message["positions"]] for topic_id, message in sent}
+    assert set(topics) == {"0.0.11", "0.0.12"}
+    for position, _ in items:
+        assert position.hederaTopicId == pipeline.hedera.topics.topic_for(position.icaoAddress)
+        assert position.icaoAddress in topics[position.hederaTopicId]
+        assert sent[position.hederaSequenceNumber - 1][0] == position.hederaTopicId
+
+
+@pytest.mark.asyncio
+async def test_merkle_roots_follow_the_topic_shards(pipeline, mocker):
+    from services.hcs_topics import TopicRouter
+    from services.merkle_notary import MerkleNotary
+
+    pipeline.hedera.client = object()
+    pipeline.hedera.topics = TopicRouter(["0.0.11", "0.0.12"])
+    pipeline.merkle_notary = MerkleNotary(pipeline._log_hcs, window_s=0.01)
+    sent = []
+    mocker.patch.object(
+        pipeline.hedera, "prepare_topic_message",
+        side_effect=lambda message, topic_id: lambda: sent.append((topic_id, hcs_codec.decode(message))) or len(sent),
+    )
+    mocker.patch.object(pipeline.hedera, "topic_receipt", side_effect=lambda response: response)
+    items = []
+    for icao in ("A1", "A2", "A3", "A4"):
+        rows = pipeline._observations_from_rows(_message_rows(icao, 51.5, -0.1))
+        position, _ = await pipeline._solve(icao, rows)
+        items.append((position, rows))
+
+    await pipeline._notarize_positions(items)
+    await pipeline.stop()
+
+    assert sorted(topic_id for topic_id, _ in sent) == ["0.0.11", "0.0.12"]
+    assert all(message["type"] == "mlat_merkle_root" for _, message in sent)
+    for position, _ in items:
+        assert position.hederaTopicId == pipeline.hedera.topics.topic_for(position.icaoAddress)
+        assert sent[position.hederaSequenceNumber - 1][0] == position.hederaTopicId
+        proof = await pipeline.position_proof(position.icaoAddress, position.calculatedAt)
+        assert proof["hederaTopicId"] == position.hederaTopicId
@@ -0,0 +1,22 @@
+from models import AircraftPosition
+from services.notarization_policy import NotarizationPolicy
+
+
+def _position(lat=51.5, lon=-0.1, confidence=90.0):
+    return AircraftPosition(icaoAddress="ABC123", latitude=lat, longitude=lon, confidenceScore=confidence, sensorCount=4)
+
+
+def test_small_changes_are_skipped_until_movement_confidence_or_heartbeat():
+    policy = NotarizationPolicy(min_distance_m=50, min_confidence_delta=5, heartbeat_s=60)
+
+    assert policy.should_notarize(_position(), now=0)
+    assert not policy.should_notarize(_position(lat=51.5001), now=1)  # ~11 m
+    assert not policy.should_notarize(_position(confidence=93), now=2)
+    assert policy.should_notarize(_position(lat=51.501), now=3)  # ~111 m
+    assert policy.should_notarize(_position(lat=51.501, confidence=80), now=4)
+    assert not policy.should_notarize(_position(lat=51.501, confidence=80), now=30)
+    assert policy.should_notarize(_position(lat=51.501, confidence=80), now=64)
+
+    stats = policy.stats()
+    assert stats["notarized"] == {"first": 1, "moved": 1, "confidence": 1, "heartbeat": 1}
+    assert stats["avoided"] == 3
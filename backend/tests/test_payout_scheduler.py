@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from services.payout_scheduler import Earning, PayoutScheduler, chunk_lines, net_earnings
+
+
+def _earnings(purchases_per_operator=100, operators=25):
+    return [
+        Earning(f"sub-{op}-{n}", f"0.0.{1000 + op}", 10)
+        for op in range(operators)
+        for n in range(purchases_per_operator)
+    ]
+
+
+def test_netting_and_chunking_to_transfer_limits():
+    earnings = _earnings(3, 4) + [Earning("refund", "0.0.1000", -5), Earning("tok", "0.0.1000", 7, "0.0.77")]
+    lines = net_earnings(earnings)
+
+    assert [(line.operator_account, line.amount) for line in lines["HBAR"]] == [
+        ("0.0.1000", 25), ("0.0.1001", 30), ("0.0.1002", 30), ("0.0.1003", 30),
+    ]
+    assert lines["0.0.77"][0].source_ids == ["tok"]
+    # The escrow debit takes one of the ten account amounts
+    assert [len(chunk) for chunk in chunk_lines(list(range(20)), 10)] == [9, 9, 2]
+
+
+def _prepare(valid_start=None):
+    counter = itertools.count(1)
+
+    async def prepare(batch):
+        start = time.time() if valid_start is None else valid_start
+        return f"0.0.2@{int(start)}.{next(counter):09d}"
+
+    return prepare
+
+
+@pytest.mark.asyncio
+async def test_thousands_of_purchases_become_a_handful_of_concurrent_transfers():
+    submitted, settled = [], []
+    active = {"now": 0, "peak": 0}
+
+    async def submit(batch):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        submitted.append(batch)
+        return {"success": True, "transaction_id": batch.transaction_id}
+
+    async def on_settled(batch):
+        settled.extend(batch.source_ids)
+
+    earnings = _earnings()
+
+    async def fetch():
+        return earnings
+
+    scheduler = PayoutScheduler(_prepare(), submit, fetch_earnings=fetch, on_settled=on_settled, max_concurrency=2)
+    summary = await scheduler.run_period()
+
+    assert summary["fetched_earnings"] == 2500 and summary["paid_earnings"] == 2500
+    assert summary["transactions"] == 3 and summary["operators"] == 25
+    assert [len(batch.lines) for batch in submitted] == [9, 9, 7]
+    assert all(line.amount == 1000 for batch in submitted for line in batch.lines)
+    assert active["peak"] == 2 and len(settled) == 2500
+
+    # Fetching the same subscriptions again (before they were marked paid) pays nothing
+    assert (await scheduler.run_period())["transactions"] == 0
+    assert scheduler.stats()["amount_paid"] == {"HBAR": 25000}
+
+
+@pytest.mark.asyncio
+async def test_unknown_outcomes_are_reconciled_on_the_mirror_and_never_resubmitted():
+    mirror, pending, released, submitted = {}, {}, [], []
+
+    async def on_pending(batch):
+        for source_id in batch.source_ids:
+            pending[source_id] = batch.transaction_id
+
+    async def submit(batch):
+        # Recorded as pending before it is sent
+        assert all(pending[source_id] == batch.transaction_id for source_id in batch.source_ids)
+        submitted.append(batch)
+        return {"success": False, "transaction_id": batch.transaction_id, "error": "receipt timed out"}
+
+    async def on_released(batch):
+        released.append(batch.transaction_id)
+
+    async def lookup(transaction_id):
+        return mirror.get(transaction_id)
+
+    scheduler = PayoutScheduler(
+        _prepare(), submit, on_pending=on_pending, on_released=on_released, lookup=lookup, max_transfers_per_tx=2,
+    )
+    scheduler.accrue(Earning("a", "0.0.1001", 50))
+    scheduler.accrue(Earning("b", "0.0.1002", 70))
+
+    first = await scheduler.run_period()
+    assert first["unreconciled"] == 2 and first["carried_earnings"] == 0
+    paid_a, paid_b = (batch.transaction_id for batch in submitted)
+    # Held while the outcome is unknown: neither accrued nor submitted again
+    assert not scheduler.accrue(Earning("b", "0.0.1002", 70))
+    assert (await scheduler.run_period())["transactions"] == 0 and len(submitted) == 2
+
+    mirror[paid_a] = {"result": "SUCCESS"}
+    mirror[paid_b] = {"result": "INSUFFICIENT_PAYER_BALANCE"}
+    third = await scheduler.run_period()
+    assert third["reconciled_from_earlier"] == 2 and released == [paid_b]
+    # Only the one that failed on the network is paid again, under a new transaction ID
+    assert [batch.lines[0].operator_account for batch in submitted[2:]] == ["0.0.1002"]
+    assert submitted[2].transaction_id != paid_b
+    assert scheduler.stats()["amount_paid"] == {"HBAR": 50}
+
+
+@pytest.mark.asyncio
+async def test_pending_payouts_are_recovered_after_a_restart():
+    submitted, settled = [], []
+    old = f"0.0.2@{int(time.time()) - 3600}.000000001"
+    recent = f"0.0.2@{int(time.time())}.000000002"
+    lost = f"0.0.2@{int(time.time()) - 3600}.000000003"
+    mirror = {old: {"result": "SUCCESS"}}
+
+    async def fetch_pending():
+        return {
+            old: [Earning("a", "0.0.1001", 50)],
+            recent: [Earning("b", "0.0.1002", 70)],
+            lost: [Earning("c", "0.0.1003", 90)],
+        }
+
+    async def fetch():
+        # Racing the pending write: storage may still report these as unpaid
+        return [Earning("a", "0.0.1001", 50), Earning("b", "0.0.1002", 70)]
+
+    async def submit(batch):
+        submitted.append(batch)
+        return {"success": True, "transaction_id": batch.transaction_id}
+
+    async def on_settled(batch):
+        settled.append(batch.transaction_id)
+
+    async def lookup(transaction_id):
+        return mirror.get(transaction_id)
+
+    scheduler = PayoutScheduler(
+        _prepare(), submit, fetch_earnings=fetch, fetch_pending=fetch_pending, on_settled=on_settled, lookup=lookup,
+    )
+    summary = await scheduler.run_period()
+
+    # Confirmed on the mirror, still in flight, and expired without reaching consensus
+    assert settled[0] == old and scheduler.stats()["unreconciled_batches"] == 1
+    assert [line.operator_account for batch in submitted for line in batch.lines] == ["0.0.1003"]
+    assert summary["reconciled_from_earlier"] == 2 and summary["transactions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_payout_is_not_sent_when_its_pending_id_cannot_be_recorded():
+    submitted = []
+
+    async def on_pending(batch):
+        raise RuntimeError("supabase unavailable")
+
+    async def submit(batch):
+        submitted.append(batch)
+        return {"success": True}
+
+    scheduler = PayoutScheduler(_prepare(), submit, on_pending=on_pending)
+    scheduler.accrue(Earning("a", "0.0.1001", 50))
+
+    summary = await scheduler.run_period()
+    assert submitted == [] and summary["failed"] == 1 and summary["carried_earnings"] == 1
@@ -0,0 +1,206 @@
+import asyncio
+import time
+
+import pytest
+
+from models import MLATBatchProcessRequest, MLATProcessRequest, ModeSMessage, SensorLocation
+from services import hedera_client
+from services.mlat_pipeline import MLATPipelineService
+from services.neuron_buyer import NeuronBuyerService
+from services.pipeline_runtime import MLATPipelineRuntime, StageConfig
+from tests.test_mlat_pipeline import _message_rows
+
+
+@pytest.fixture
+def runtime(monkeypatch, mocker):
+    for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "HEDERA_OPERATOR_ID", "HEDERA_OPERATOR_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MLAT_WRITE_BEHIND", "false")
+    monkeypatch.setenv("MLAT_MERKLE_WINDOW_MS", "0")
+    monkeypatch.setattr(hedera_client, "_provider", None)
+    pipeline = MLATPipelineService()
+    mocker.patch.object(pipeline, "_schedule_ai_analysis", mocker.AsyncMock())
+    return MLATPipelineRuntime(
+        pipeline,
+        NeuronBuyerService(),
+        stage_config={"persist": StageConfig(batch_size=4, linger_ms=10)},
+    )
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "runtime did not drain in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_runtime_drains_buyer_messages_to_ai_stage(runtime):
+    for row in _message_rows("abc123", 51.50, -0.10):
+        runtime.buyer._message_queue.put_nowait(ModeSMessage(
+            sensorId=row["sensor_id"],
+            icaoAddress="abc123",
+            rawMessage="8d4840d6202cc371c32ce0576098",
+            timestampNs=row["timestamp_ns"],
+            sensorLocation=SensorLocation(latitude=row["sensor_lat"], longitude=row["sensor_lon"]),
+        ))
+
+    await runtime.start()
+    try:
+        await _wait_for(lambda: runtime.stages["ai"].items_in >= 1)
+    finally:
+        await runtime.stop()
+
+    stats = runtime.stats()
+    assert stats["stages"]["ingest"]["items_in"] == 3
+    assert stats["stages"]["solve"]["items_out"] == 1
+    assert stats["stages"]["persist"]["batch_size"] == 4
+    position = runtime.pipeline._schedule_ai_analysis.await_args.args[0]
+    assert position.icaoAddress == "ABC123"
+
+
+def _messages(icao, lat, lon):
+    return [
+        ModeSMessage(
+            sensorId=row["sensor_id"],
+            icaoAddress=icao,
+            rawMessage="8d4840d6202cc371c32ce0576098",
+            timestampNs=row["timestamp_ns"],
+            sensorLocation=SensorLocation(latitude=row["sensor_lat"], longitude=row["sensor_lon"]),
+        )
+        for row in _message_rows(icao, lat, lon)
+    ]
+
+
+def _wire(pipeline, mocker):
+    """Capture inserted positions and HCS-logged positions instead of talking to Supabase and Hedera."""
+    from services import hcs_codec
+
+    stored, logged = [], []
+    pipeline.supabase = mocker.Mock(is_configured=True)
+    pipeline.supabase.batch_store_mode_s_messages.side_effect = lambda messages: len(messages)
+    pipeline.supabase.batch_store_aircraft_positions.side_effect = lambda positions: stored.extend(positions) or len(positions)
+    pipeline.supabase.fetch_recent_messages_bulk.return_value = {}
+    pipeline.supabase.fetch_subscribed_sensor_counts.return_value = {}
+    pipeline.hedera.client = object()
+    mocker.patch.object(
+        pipeline.hedera, "prepare_topic_message",
+        side_effect=lambda message, topic_id: lambda: logged.extend(hcs_codec.decode(message)["positions"]) or len(logged),
+    )
+    mocker.patch.object(pipeline.hedera, "topic_receipt", side_effect=lambda response: response)
+    return stored, logged
+
+
+@pytest.mark.asyncio
+async def test_runtime_stages_match_process_mlat_batch(runtime, mocker):
+    aircraft = {"ABC123": (51.50, -0.10), "DEF456": (51.51, -0.11), "FFF000": (51.52, -0.12)}
+    messages = [
+        message for icao, (lat, lon) in aircraft.items() if icao != "FFF000"
+        for message in _messages(icao, lat, lon)
+    ] + _messages("FFF000", 51.52, -0.12)[:2]
+
+    batch_pipeline = MLATPipelineService()
+    mocker.patch.object(batch_pipeline, "_schedule_ai_analysis", mocker.AsyncMock())
+    batch_stored, batch_logged = _wire(batch_pipeline, mocker)
+    await batch_pipeline.process_mlat_batch(MLATBatchProcessRequest(messages=messages, timeWindowMs=2000))
+
+    pipeline = runtime.pipeline
+    staged_stored, staged_logged = _wire(pipeline, mocker)
+    items = await runtime._ingest(messages)
+    for stage in ("correlate", "solve", "persist", "notarize", "ai"):
+        items = await runtime.stages[stage].handler(items)
+
+    def _summary(positions):
+        return sorted((p.icaoAddress, round(p.latitude, 6), round(p.longitude, 6)) for p in positions)
+
+    assert _summary(staged_stored) == _summary(batch_stored) and len(staged_stored) == 2
+    assert sorted(p["icao"] for p in staged_logged) == sorted(p["icao"] for p in batch_logged)
+    assert all(p.hederaSequenceNumber is not None for p in staged_stored)
+    assert _summary(a.args[0] for a in pipeline._schedule_ai_analysis.await_args_list) == _summary(batch_stored)
+    # Timed and fed to the governor like the request paths
+    assert "solve_batch" in pipeline.metrics.render_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_runtime_solves_share_the_request_single_flight(runtime, mocker):
+    pipeline = runtime.pipeline
+    solve = pipeline.solver.solve_position
+    calls = []
+
+    def slow_solve(observations):
+        calls.append(observations)
+        time.sleep(0.05)
+        return solve(observations)
+
+    mocker.patch.object(pipeline.solver, "solve_position", side_effect=slow_solve)
+    await pipeline.ingest_messages(_messages("ABC123", 51.50, -0.10))
+    ready = pipeline.correlate(["ABC123"], 2000)
+
+    request = MLATProcessRequest(icaoAddress="ABC123", timeWindowMs=2000)
+
+    # A request arriving while the runtime solves shares that solve
+    staged = asyncio.ensure_future(pipeline.solve_batch(ready))
+    while "ABC123" not in pipeline._inflight_solves:
+        await asyncio.sleep(0)
+    response = await pipeline.process_mlat(request)
+    assert len(calls) == 1
+    assert response.success and (await staged)[0][0] is response.position
+
+    # ... and an aircraft a request is solving is left to that request
+    pipeline.min_resolve_interval_s = 0
+    requested = asyncio.ensure_future(pipeline.process_mlat(request))
+    while "ABC123" not in pipeline._inflight_solves:
+        await asyncio.sleep(0)
+    assert pipeline.correlate(["ABC123"], 2000) == []
+    assert await pipeline.solve_batch(ready) == []
+    assert (await requested).success and len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_stop_lets_queued_positions_reach_every_stage(runtime, mocker):
+    persisted, notarized = [], []
+
+    async def slow_store(items):
+        await asyncio.sleep(0.02)
+        persisted.extend(position for position, _ in items)
+
+    async def notarize(items):
+        notarized.extend(position for position, _ in items)
+
+    mocker.patch.object(runtime.pipeline, "store_positions", side_effect=slow_store)
+    mocker.patch.object(runtime.pipeline, "notarize_stored", side_effect=notarize)
+    await runtime.start()
+    for n in range(10):
+        runtime.stages["persist"].queue.put_nowait((f"P{n}", []))
+
+    await runtime.stop()
+
+    assert persisted == [f"P{n}" for n in range(10)]
+    assert sorted(notarized) == sorted(persisted)
+    assert runtime.pipeline._schedule_ai_analysis.await_count == 10
+
+
+@pytest.mark.asyncio
+async def test_positions_left_in_a_stuck_persist_stage_go_to_write_behind(runtime, mocker):
+    handed_over = []
+    stuck = asyncio.Event()
+
+    async def store(items):
+        if not handed_over and not stuck.is_set():
+            stuck.set()
+            await asyncio.sleep(60)
+        handed_over.extend(position for position, _ in items)
+
+    mocker.patch.object(runtime.pipeline, "store_positions", side_effect=store)
+    runtime.pipeline.write_behind = mocker.Mock()
+    runtime.drain_timeout_s = 0.05
+    await runtime.start()
+    for n in range(6):
+        runtime.stages["persist"].queue.put_nowait((f"P{n}", []))
+    await stuck.wait()
+
+    await runtime.stop()
+
+    # The first batch of 4 was cut off mid-write; the two still queued were handed over
+    assert handed_over == ["P4", "P5"]
+    assert runtime.stages["persist"].queue.qsize() == 0
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from services.bounded_executor import ExecutorSaturatedError
+from services.solve_scheduler import SolveScheduler
+
+
+async def _occupy(scheduler, release):
+    async def _job():
+        await release.wait()
+    return asyncio.ensure_future(scheduler.run("BUSY01", _job))
+
+
+@pytest.mark.asyncio
+async def test_grants_waiting_slots_by_interest():
+    scheduler = SolveScheduler(slots=1, aging_per_s=0.0)
+    scheduler.set_viewers({"VIEW01": 2})
+    release = asyncio.Event()
+    busy = await _occupy(scheduler, release)
+    order = []
+
+    async def _job(icao):
+        order.append(icao)
+
+    waiters = [
+        asyncio.ensure_future(scheduler.run("QUIET1", lambda: _job("QUIET1"))),
+        asyncio.ensure_future(scheduler.run("VIEW01", lambda: _job("VIEW01"))),
+        asyncio.ensure_future(scheduler.run("PAID01", lambda: _job("PAID01"), subscribers=1)),
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(busy, *waiters)
+
+    assert order == ["PAID01", "VIEW01", "QUIET1"]
+    latency = scheduler.stats()["wait_latency"]
+    assert latency["subscribed"]["count"] == 1
+    assert latency["viewed"]["count"] == 1
+
+
+def test_recently_solved_aircraft_rank_below_stale_ones():
+    scheduler = SolveScheduler(slots=1)
+    scheduler.mark_solved("FRESH1", now=100.0)
+    scheduler.mark_solved("STALE1", now=80.0)
+
+    assert scheduler.score("FRESH1", now=101.0) < scheduler.score("STALE1", now=101.0)
+    assert scheduler.score("NEW001", now=101.0) == scheduler.score("STALE1", now=200.0)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_preempts_lowest_priority_waiter():
+    scheduler = SolveScheduler(slots=1, max_pending=1, aging_per_s=0.0)
+    release = asyncio.Event()
+    busy = await _occupy(scheduler, release)
+
+    async def _noop():
+        return "done"
+
+    quiet = asyncio.ensure_future(scheduler.run("QUIET1", _noop))
+    await asyncio.sleep(0)
+    paid = asyncio.ensure_future(scheduler.run("PAID01", _noop, subscribers=1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await quiet
+    with pytest.raises(ExecutorSaturatedError):
+        await scheduler.run("QUIET2", _noop)
+
+    release.set()
+    assert await paid == "done"
+    await busy
+    assert scheduler.stats()["wait_latency"]["background"]["rejected"] == 2
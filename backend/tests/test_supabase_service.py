@@ -0,0 +1,106 @@
+import pytest
+
+from services import supabase_service
+from services.supabase_service import (
+    ROLE_ANON,
+    ROLE_SERVICE,
+    SupabaseService,
+    get_service_role_supabase,
+    get_supabase_client,
+    get_supabase_service,
+)
+
+
+@pytest.fixture
+def supabase_env(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon-key")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+    monkeypatch.setenv("SUPABASE_POOL_MAX_CONNECTIONS", "4")
+    supabase_service.close_supabase_clients()
+    yield
+    supabase_service.close_supabase_clients()
+
+
+def test_one_pooled_client_per_role(supabase_env, mocker):
+    create = mocker.spy(supabase_service, "create_client")
+
+    services = [SupabaseService() for _ in range(5)]
+    service_role = SupabaseService(use_service_role=True)
+
+    assert create.call_count == 2
+    assert all(service.client is get_supabase_client(ROLE_ANON) for service in services)
+    assert service_role.client is get_supabase_client(ROLE_SERVICE) is not services[0].client
+    assert get_supabase_service() is get_supabase_service()
+    assert get_service_role_supabase().client is service_role.client
+    assert services[0].client.postgrest.session is supabase_service._http_clients[ROLE_ANON]
+    stats = supabase_service.supabase_pool_stats()
+    assert stats["roles"] == [ROLE_ANON, ROLE_SERVICE] and stats["max_connections"] == 4
+
+
+def test_unconfigured_roles_are_retried_once_configured(monkeypatch):
+    supabase_service.close_supabase_clients()
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    assert not get_supabase_service().is_configured
+
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon-key")
+    try:
+        assert get_supabase_service().is_configured
+    finally:
+        supabase_service.close_supabase_clients()
+
+
+class _MessagesTable:
+    """Just enough of the PostgREST query builder for ``fetch_recent_messages_bulk``."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        self._filters = {}
+        return self
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self._filters["icao"] = set(values)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        self._filters["limit"] = count
+        return self
+
+    def execute(self):
+        self.queries.append(sorted(self._filters["icao"]))
+        rows = sorted(
+            (row for row in self.rows if row["icao_address"] in self._filters["icao"]),
+            key=lambda row: row["timestamp_ns"],
+            reverse=True,
+        )
+        return type("Response", (), {"data": rows[:self._filters["limit"]]})()
+
+
+def test_bulk_fetch_caps_each_aircraft_so_a_chatty_one_cannot_starve_the_rest():
+    now = 10_000_000_000
+    # CHATTY sent 50 messages after anything the quiet aircraft sent
+    rows = [{"icao_address": "CHATTY", "timestamp_ns": now - n * 1000} for n in range(50)]
+    rows += [
+        {"icao_address": icao, "timestamp_ns": now - 1_000_000 - n * 1000}
+        for icao in ("QUIET1", "QUIET2") for n in range(3)
+    ]
+    table = _MessagesTable(rows)
+    service = SupabaseService.__new__(SupabaseService)
+    service.client = table
+
+    grouped = service.fetch_recent_messages_bulk(["CHATTY", "QUIET1", "QUIET2"], 2000, per_icao_limit=8)
+
+    assert len(grouped["CHATTY"]) == 8
+    assert len(grouped["QUIET1"]) == 3 and len(grouped["QUIET2"]) == 3
+    # The first query came back full of CHATTY rows; the quiet aircraft were asked for again
+    assert table.queries == [["CHATTY", "QUIET1", "QUIET2"], ["QUIET1", "QUIET2"]]
@@ -0,0 +1,25 @@
+from models import AircraftPosition
+from services.track_store import TrackStore
+
+
+def _position(icao, n):
+    return AircraftPosition(icaoAddress=icao, latitude=51.0 + n, longitude=-0.1, confidenceScore=90, sensorCount=3)
+
+
+def test_ring_buffer_keeps_latest_positions_oldest_first():
+    store = TrackStore(max_points_per_icao=3)
+    for n in range(5):
+        store.add(_position("ABC123", n), now=0.0)
+
+    assert [p.latitude for p in store.recent("abc123")] == [53.0, 54.0, 55.0]
+    assert [p.latitude for p in store.recent("ABC123", limit=2)] == [54.0, 55.0]
+    assert store.recent("FFF000") == []
+
+
+def test_departed_aircraft_are_evicted_after_ttl():
+    store = TrackStore(idle_ttl_s=60)
+    store.add(_position("OLD001", 0), now=0.0)
+    store.add(_position("NEW001", 0), now=100.0)
+
+    assert store.recent("OLD001") == []
+    assert store.stats() == {"aircraft": 1, "positions": 1, "evicted_aircraft": 1}
@@ -0,0 +1,119 @@
+import asyncio
+import base64
+
+import httpx
+import pytest
+
+from services.transaction_verifier import LocalMirrorNode, MirrorNode, RestMirrorNode, TransactionVerifier
+
+TX = "0.0.5005@1700000000.000000001"
+PURCHASE = [{"account": "0.0.5005", "amount": -500}, {"account": "0.0.1234567", "amount": 500}]
+
+
+@pytest.mark.asyncio
+async def test_retried_and_concurrent_confirms_share_one_lookup():
+    mirror = LocalMirrorNode(latency_s=0.02)
+    mirror.record(TX, transfers=PURCHASE, memo="purchase")
+    verifier = TransactionVerifier(mirror)
+
+    results = await asyncio.gather(*(verifier.verify(TX, "0.0.5005") for _ in range(5)))
+    again = await verifier.verify(TX, "0.0.5005")
+
+    assert mirror.lookups == 1
+    assert all(result["success"] for result in results) and again == results[0]
+    assert again["transfers"] == PURCHASE
+    stats = verifier.stats()
+    assert stats["coalesced"] == 4 and stats["hits"] == 1 and stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_transactions_are_not_cached():
+    mirror = LocalMirrorNode()
+    verifier = TransactionVerifier(mirror)
+
+    assert (await verifier.verify(TX))["success"] is False
+    assert (await verifier.verify(TX))["success"] is False
+    assert mirror.lookups == 2
+
+    # Seen as soon as it lands, then served from the cache
+    mirror.record(TX)
+    assert (await verifier.verify(TX))["success"] is True
+    assert (await verifier.verify(TX))["success"] is True
+    assert mirror.lookups == 3
+
+
+@pytest.mark.asyncio
+async def test_failures_payer_mismatch_and_fallback():
+    mirror = LocalMirrorNode()
+    mirror.record("0.0.7@1.000000001", result="INSUFFICIENT_PAYER_BALANCE")
+    mirror.record(TX, transfers=PURCHASE)
+    # Fee paid by a relayer: the ID names 0.0.9, the buyer is the debited account
+    relayed = "0.0.9@1700000000.000000003"
+    mirror.record(relayed, transfers=PURCHASE)
+    verifier = TransactionVerifier(mirror)
+
+    failed = await verifier.verify("0.0.7@1.000000001")
+    assert not failed["success"] and "INSUFFICIENT_PAYER_BALANCE" in failed["error"]
+    assert not (await verifier.verify(TX, expected_payer="0.0.6"))["success"]
+    # Credited, not debited
+    assert not (await verifier.verify(TX, expected_payer="0.0.1234567"))["success"]
+    assert (await verifier.verify(relayed, expected_payer="0.0.5005"))["success"]
+    assert not (await verifier.verify(relayed, expected_payer="0.0.9"))["success"]
+
+    async def fallback(transaction_id):
+        return {"transaction_id": transaction_id, "result": "SUCCESS"}
+
+    assert (await verifier.verify("0.0.8@2.000000001", fallback=fallback))["success"]
+
+
+@pytest.mark.asyncio
+async def test_verify_many_checks_pending_purchases_concurrently():
+    mirror = LocalMirrorNode(latency_s=0.01)
+    ids = [f"0.0.5005@1700000000.{n:09d}" for n in range(40)]
+    for transaction_id in ids[::2]:
+        mirror.record(transaction_id, transfers=PURCHASE)
+    verifier = TransactionVerifier(mirror, max_concurrency=8)
+
+    results = await verifier.verify_many(ids + ids[:5], expected_payer="0.0.5005")
+
+    assert list(results) == ids
+    assert [results[t]["success"] for t in ids] == [n % 2 == 0 for n in range(40)]
+    assert mirror.lookups == 40 and mirror.max_concurrent == 8
+
+
+@pytest.mark.asyncio
+async def test_rest_mirror_node_reads_the_transactions_endpoint():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        if request.url.path.endswith("-000000002"):
+            return httpx.Response(404, json={"_status": {"messages": [{"message": "Not found"}]}})
+        return httpx.Response(200, json={"transactions": [{
+            "result": "SUCCESS",
+            "consensus_timestamp": "1700000001.123456789",
+            "charged_tx_fee": 84000,
+            "memo_base64": base64.b64encode(b"Marketplace purchase").decode(),
+            "transfers": [{"account": "0.0.5005", "amount": -500}, {"account": "0.0.1234567", "amount": 500}],
+        }]})
+
+    mirror = RestMirrorNode("https://mirror.test", transport=httpx.MockTransport(handler))
+    record = await mirror.get_transaction(TX)
+    missing = await mirror.get_transaction("0.0.5005@1700000000.000000002")
+    await mirror.close()
+
+    assert seen[0] == "/api/v1/transactions/0.0.5005-1700000000-000000001"
+    assert record["memo"] == "Marketplace purchase" and record["charged_tx_fee"] == 84000
+    assert record["transfers"][1] == {"account": "0.0.1234567", "amount": 500}
+    assert missing is None
+
+
+def test_mirror_node_is_abstract():
+    with pytest.raises(TypeError):
+        MirrorNode()
+
+    class Partial(MirrorNode):
+        pass
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+from models import MLATProcessRequest
+from services import hedera_client
+from services.mlat_pipeline import MLATPipelineService
+from services.write_behind import WriteBehindQueue
+from tests.test_mlat_pipeline import _mock_supabase, _mode_s_messages
+
+
+@pytest.mark.asyncio
+async def test_records_are_flushed_in_batches(tmp_path):
+    batches = []
+
+    async def handler(records):
+        batches.append([record["n"] for record in records])
+
+    queue = WriteBehindQueue(handler, tmp_path / "spool", batch_size=2, flush_interval_s=0.01)
+    for n in range(5):
+        queue.enqueue({"n": n})
+    await queue.stop()
+
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert queue.stats()["flushed"] == 5
+    assert not (tmp_path / "spool").exists()
+
+
+@pytest.mark.asyncio
+async def test_failed_flushes_are_spooled_and_replayed_in_order_after_restart(tmp_path):
+    spool = tmp_path / "spool"
+
+    async def unavailable(records):
+        raise ConnectionError("supabase down")
+
+    queue = WriteBehindQueue(unavailable, spool, batch_size=2, flush_interval_s=0.01)
+    for n in range(3):
+        queue.enqueue({"n": n})
+    await queue.stop()
+    assert queue.stats()["spooled"] == 3
+    assert len(spool.read_text().splitlines()) == 3
+
+    replayed = []
+
+    async def handler(records):
+        replayed.extend(record["n"] for record in records)
+
+    restarted = WriteBehindQueue(handler, spool, batch_size=2, flush_interval_s=0.01, replay_interval_s=60)
+    restarted.start()
+    assert restarted.stats()["spooling"]
+    restarted.enqueue({"n": 3})  # must land behind the spooled records
+    await asyncio.sleep(0.05)
+    assert await restarted.replay()
+    await restarted.stop()
+
+    assert replayed == [0, 1, 2, 3]
+    assert not spool.exists()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_flushes_are_spooled_only_when_the_write_is_idempotent(tmp_path):
+    committed = []
+
+    async def slow_but_committed(records):
+        committed.extend(record["n"] for record in records)
+        await asyncio.sleep(1)
+
+    unsafe = WriteBehindQueue(slow_but_committed, tmp_path / "unsafe", batch_size=2, flush_timeout_s=0.01)
+    unsafe.enqueue({"n": 0})
+    await unsafe.stop()
+    # It may have landed: dropping it is better than replaying a duplicate
+    assert unsafe.stats()["unknown_outcome"] == 1 and unsafe.stats()["spooled"] == 0
+    assert not (tmp_path / "unsafe").exists()
+
+    safe = WriteBehindQueue(
+        slow_but_committed, tmp_path / "safe", batch_size=2, flush_timeout_s=0.01, idempotent=True,
+    )
+    safe.enqueue({"n": 1})
+    await safe.stop()
+    assert safe.stats()["spooled"] == 1 and safe.stats()["unknown_outcome"] == 0
+    assert committed == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_flusher_cancelled_while_waiting_for_the_replayer_keeps_its_batch(tmp_path):
+    written = []
+
+    async def handler(records):
+        written.extend(record["n"] for record in records)
+
+    queue = WriteBehindQueue(handler, tmp_path / "spool", batch_size=2, flush_interval_s=0.01, replay_interval_s=60)
+    await queue._flush_lock.acquire()  # the spool replayer is mid-batch
+    for n in range(3):
+        queue.enqueue({"n": n})
+    await asyncio.sleep(0.05)  # the flusher is now waiting on the lock
+
+    queue._flusher.cancel()
+    await asyncio.gather(queue._flusher, return_exceptions=True)
+    assert queue.stats()["queued"] == 3
+
+    queue._flush_lock.release()
+    await queue.stop()
+    assert written == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_replayed_batch_changed_before_failing_is_respooled_with_the_change(tmp_path):
+    spool = tmp_path / "spool"
+    attempts = []
+
+    async def handler(records):
+        attempts.append([dict(record) for record in records])
+        if len(attempts) == 1:
+            for record in records:
+                record["sent"] = True  # work done before the failure
+            raise ConnectionError("supabase down")
+
+    spool.write_text('{"n":0}\n{"n":1}\n')
+    queue = WriteBehindQueue(handler, spool, batch_size=2, replay_interval_s=60)
+
+    assert not await queue.replay()
+    assert queue.stats()["respooled"] == 2
+    assert await queue.replay()
+
+    assert attempts[1] == [{"n": 0, "sent": True}, {"n": 1, "sent": True}]
+    assert not spool.exists()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_writes_positions_behind_the_response(monkeypatch, mocker, tmp_path):
+    for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "HEDERA_OPERATOR_ID", "HEDERA_OPERATOR_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MLAT_SPOOL_PATH", str(tmp_path / "spool"))
+    monkeypatch.setattr(hedera_client, "_provider", None)
+    pipeline = MLATPipelineService()
+    mocker.patch.object(pipeline, "_schedule_ai_analysis", mocker.AsyncMock())
+    pipeline.supabase = _mock_supabase(mocker, {})
+    pipeline.supabase.batch_store_aircraft_positions.side_effect = [ConnectionError("timeout"), 1]
+    pipeline.hedera.client = object()
+    log = mocker.patch.object(pipeline.hedera, "log_evaluation", mocker.AsyncMock(return_value=7))
+
+    response = await pipeline.process_mlat(
+        MLATProcessRequest(icaoAddress="ABC123", messages=_mode_s_messages("ABC123", 51.50, -0.10))
+    )
+    assert response.success
+    assert response.hederaSequenceNumber is None  # notarized after the response
+
+    await pipeline.stop()  # insert fails, batch is spooled with its HCS sequence
+    assert pipeline.health()["write_behind"]["spooled"] == 1
+    assert await pipeline.write_behind.replay()
+
+    assert log.await_count == 1
+    stored = pipeline.supabase.batch_store_aircraft_positions.call_args.args[0]
+    assert [(p.icaoAddress, p.hederaSequenceNumber) for p in stored] == [("ABC123", 7)]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_replay_never_relogs_a_position_whose_hcs_submit_started(monkeypatch, mocker, tmp_path):
+    for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "HEDERA_OPERATOR_ID", "HEDERA_OPERATOR_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MLAT_SPOOL_PATH", str(tmp_path / "spool"))
+    monkeypatch.setenv("MLAT_WRITE_BEHIND_TIMEOUT_S", "0.05")
+    monkeypatch.setenv("MLAT_MERKLE_WINDOW_MS", "0")
+    monkeypatch.setattr(hedera_client, "_provider", None)
+    pipeline = MLATPipelineService()
+    mocker.patch.object(pipeline, "_schedule_ai_analysis", mocker.AsyncMock())
+    pipeline.supabase = _mock_supabase(mocker, {})
+    pipeline.supabase.batch_store_aircraft_positions.return_value = 1
+    pipeline.hedera.client = object()
+    sent = []
+
+    async def posted_but_slow(payload, topic_id=None):
+        sent.append(payload)
+        await asyncio.sleep(1)  # the message is on HCS; its receipt outlives the flush timeout
+        return 7
+
+    mocker.patch.object(pipeline.hedera, "log_evaluation", side_effect=posted_but_slow)
+
+    await pipeline.process_mlat(
+        MLATProcessRequest(icaoAddress="ABC123", messages=_mode_s_messages("ABC123", 51.50, -0.10))
+    )
+    await pipeline.stop()
+    assert pipeline.health()["write_behind"]["spooled"] == 1
+    assert await pipeline.write_behind.replay()
+
+    assert len(sent) == 1
+    assert pipeline.health()["write_behind"]["hcs_unconfirmed"] == 1
+    stored = pipeline.supabase.batch_store_aircraft_positions.call_args.args[0]
+    assert [(p.icaoAddress, p.hederaSequenceNumber) for p in stored] == [("ABC123", None)]